@@ -0,0 +1,88 @@
+"""Measures the compilation of the large plugins on the start: compile() on every start against the CodeCache
+(cold cache, warm cache and one changed plugin). Plugins are generated to the temporary directory.
+Run it from the "src" directory: python -m benchmarks.codecache [plugins] [functions]"""
+
+import os
+import sys
+import time
+import tempfile
+from source.codecache import CodeCache
+
+
+def generate_plugins(plugins_dir: str, plugins: int, functions: int) -> list[str]:
+    """Generates the plugins with the commands-like functions
+
+    :returns: Paths to the plugins
+    """
+
+    paths = []
+
+    for n in range(plugins):
+        lines = ['import os', 'import re', '', f'CONSTANT = {n}', '']
+
+        for i in range(functions):
+            lines += [
+                f'async def command_{i}(event, args):',
+                f'    """Command number {i} of the plugin {n}"""',
+                f'    values = [x * {i} for x in range(10) if x % 2]',
+                f'    if args.get("name") == "cmd_{i}":',
+                f'        return {{"result": sum(values), "name": re.sub(r"\\s+", " ", str(args)), "n": {n}}}',
+                f'    return os.path.join("cache", "plugin_{n}", str(values))',
+                ''
+            ]
+
+        paths.append(path := os.path.join(plugins_dir, f'Generated{n}.plugin.py'))
+
+        with open(path, 'w') as f:
+            f.write('\n'.join(lines))
+
+    return paths
+
+
+def read(path: str) -> bytes:
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def start(paths: list[str], code_cache: CodeCache | None) -> float:
+    """Compiles the plugins as the plugins loading does (without the execution)
+
+    :returns: Time in seconds
+    """
+
+    started = time.perf_counter()
+
+    for path in paths:
+        name = os.path.basename(path)[:-10]
+
+        if code_cache is None:
+            compile(read(path), path, 'exec')
+        else:
+            code_cache.compile(name, read(path), path)
+
+    return time.perf_counter() - started
+
+
+def main(plugins: int = 20, functions: int = 3000):
+    with tempfile.TemporaryDirectory() as tmp:
+        plugins_dir, cache_dir = os.path.join(tmp, 'plugins'), os.path.join(tmp, 'cache')
+        os.makedirs(plugins_dir)
+
+        paths = generate_plugins(plugins_dir, plugins, functions)
+        size = sum(os.path.getsize(p) for p in paths) / 1024 / 1024
+
+        print(f'{plugins} generated plugins, {size:.1f} MB, {functions} functions each')
+        print(f'  compile on every start   {start(paths, None):.2f}s')
+        print(f'  cold cache (write)       {start(paths, CodeCache(cache_dir)):.2f}s')
+        print(f'  warm cache               {start(paths, CodeCache(cache_dir)):.2f}s')
+
+        with open(paths[0], 'a') as f:
+            f.write('\nCHANGED = True\n')
+
+        code_cache = CodeCache(cache_dir)
+        changed = start(paths, code_cache)
+        print(f'  one plugin changed       {changed:.2f}s ({code_cache.hits} hits, {code_cache.misses} miss)')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
@@ -0,0 +1,122 @@
+"""Measures the cost of the debug logging on the event loop: debug records disabled, written by the handlers
+in the event loop thread (sync) and written by the listener thread of the QueuedLogging (queued).
+Every command logs 8 debug records, the file handler writes DEBUG, the console handler writes INFO.
+The probe task measures the lateness of the 1 ms asyncio.sleep() (loop lag).
+Run it from the "src" directory: python -m benchmarks.logging_latency [seconds]"""
+
+import os
+import sys
+import time
+import asyncio
+import logging
+import tempfile
+import statistics
+from source.logqueue import QueuedLogging
+
+FORMAT = '%(asctime)s | %(levelname)-8s | %(name)-45s — %(message)s [%(pathname)s:%(funcName)s:%(lineno)d]'
+
+
+def command(logger: logging.Logger, n: int):
+    """Debug records of the one command (router, scheduler, parser, send)"""
+
+    logger.debug('A message with the command has been detected, MSG_SPLIT: %s', ['.', 'calc', str(n)])
+    logger.debug('Job #%s (%s) is submitted to the chat %s', n, 'calc', -100123)
+    logger.debug('Job #%s (%s) is started', n, 'calc')
+    logger.debug('ArgumentParser called with arguments: %s', str(n))
+    logger.debug('Call the function %s()', 'calc')
+    logger.debug('Send to %s: %s', -100123, n)
+    logger.debug('Message #%s is sent to %s', n, -100123)
+    logger.debug('Job #%s (%s) is done in %s seconds', n, 'calc', 0.001)
+
+
+async def probe(lags: list[float], stop: asyncio.Event):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.001)
+        lags.append(time.perf_counter() - started - 0.001)
+
+
+async def run(logger: logging.Logger, seconds: float, paced: bool) -> (float, list[float]):
+    """Runs the commands and the probe
+
+    :returns: Microseconds of the logging per command and the loop lags in seconds
+    """
+
+    lags, stop = [], asyncio.Event()
+    probe_task = asyncio.create_task(probe(lags, stop))
+
+    spent = 0.0
+    commands = 0
+    end = time.perf_counter() + seconds
+
+    while time.perf_counter() < end:
+        started = time.perf_counter()
+
+        for _ in range(5 if paced else 1):
+            command(logger, commands)
+            commands += 1
+
+        spent += time.perf_counter() - started
+
+        # paced: 5 commands every 5 ms, saturated: commands back to back (the probe runs between them)
+        await asyncio.sleep(0.005 if paced else 0)
+
+    stop.set()
+    await probe_task
+
+    return spent / commands * 1e6, lags
+
+
+def measure(mode: str, seconds: float, paced: bool, logs_dir: str) -> str:
+    root = logging.getLogger()
+    root.handlers.clear()
+    root.setLevel(logging.INFO if mode == 'debug off' else logging.DEBUG)
+
+    file_handler = logging.FileHandler(os.path.join(logs_dir, f'{mode}-log.txt'), encoding='utf8')
+    file_handler.setFormatter(logging.Formatter(FORMAT))
+    file_handler.setLevel(logging.DEBUG)
+
+    console_handler = logging.StreamHandler(open(os.devnull, 'w'))
+    console_handler.setFormatter(logging.Formatter(FORMAT))
+    console_handler.setLevel(logging.INFO)
+
+    log_queue = None
+
+    if mode == 'queued':
+        log_queue = QueuedLogging([console_handler, file_handler])
+        log_queue.start()
+        root.addHandler(log_queue.handler)
+    else:
+        root.addHandler(console_handler)
+        root.addHandler(file_handler)
+
+    try:
+        per_command, lags = asyncio.run(run(logging.getLogger('EasyTl : Benchmark'), seconds, paced))
+    finally:
+        if log_queue is not None:
+            log_queue.stop()
+
+        root.handlers.clear()
+        file_handler.close()
+        console_handler.stream.close()
+
+    lags_us = sorted(lag * 1e6 for lag in lags)
+    p99 = lags_us[int(len(lags_us) * 0.99)]
+
+    return f'  {mode:<10}{per_command:>7.1f} us/command   loop lag p50 {statistics.median(lags_us):>5.0f} us ' \
+           f'p99 {p99:>5.0f} us'
+
+
+def main(seconds: float = 3):
+    with tempfile.TemporaryDirectory() as logs_dir:
+        print('paced, 5 commands every 5 ms:')
+        for mode in ('debug off', 'sync', 'queued'):
+            print(measure(mode, seconds, True, logs_dir))
+
+        print('saturated, commands back to back:')
+        for mode in ('sync', 'queued'):
+            print(measure(mode, seconds, False, logs_dir))
+
+
+if __name__ == '__main__':
+    main(*map(float, sys.argv[1:2]))
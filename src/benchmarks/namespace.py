@@ -0,0 +1,39 @@
+"""Compares the membership checks of the shared instance Namespace: "in dir()" against the Namespace.__contains__()
+and Namespace.get(), and the size of the parsed arguments (slotted against dict-backed Namespace).
+Run it from the "src" directory: python -m benchmarks.namespace [number]"""
+
+import sys
+import timeit
+from source.namespace import Namespace, make_slotted_namespace
+
+
+def main(number: int = 200000):
+    ns = Namespace()
+
+    # the shared namespace of the instance has dozens of the attributes (plugins, libraries, managers)
+    for i in range(60):
+        setattr(ns, f'attr_{i}', i)
+
+    cases = [
+        ("'x' in dir(ns)", lambda: 'attr_30' in dir(ns)),
+        ("'x' in ns", lambda: 'attr_30' in ns),
+        ("ns.get('x')", lambda: ns.get('attr_30')),
+    ]
+
+    print(f'{len(ns.__dict__)}-attribute namespace, ns/op:')
+
+    for name, func in cases:
+        print(f'  {name:<16}{timeit.timeit(func, number=number) / number * 1e9:>7.0f}')
+
+    # parsed arguments with three fields
+    slotted = make_slotted_namespace('Arguments', ['message', 'translate_to', 'offline'])('text', 'en', False)
+    plain = Namespace()
+    plain.message, plain.translate_to, plain.offline = 'text', 'en', False
+
+    print('Parsed arguments with three fields, bytes:')
+    print(f'  slotted         {sys.getsizeof(slotted):>7}')
+    print(f'  Namespace       {sys.getsizeof(plain) + sys.getsizeof(plain.__dict__):>7}')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
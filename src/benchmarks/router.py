@@ -0,0 +1,91 @@
+"""Measures the throughput of the non-command messages: the legacy handler, that split every message, against
+the filter of the Instance.build_router() and the Instance.messages_handler.
+Run it from the "src" directory: python -m benchmarks.router"""
+
+import sys
+import time
+import types
+import random
+import string
+import asyncio
+import logging
+from source.core import Instance
+
+PREFIXES = ['.', '!', 'etl']
+
+
+async def legacy_messages_handler(instance: Instance, event):
+    """Handler of the messages before the router (all the incoming messages were split)"""
+
+    msg_split = event.message.message.split(' ')
+    if (l := len(msg_split)) == 0:
+        return
+
+    if msg_split[0] in instance.prefixes:
+        instance.logger.debug(f'A message with the command has been detected, MSG_SPLIT: {msg_split}')
+        await instance.command_handler(l - 1, msg_split, event)
+
+
+def make_instance() -> Instance:
+    """Creates the instance without the client and the config"""
+
+    instance = Instance.__new__(Instance)
+    instance.logger = logging.getLogger('EasyTl : Benchmark')
+    instance.trusted_ids = set()
+    instance.prefixes = PREFIXES
+
+    return instance
+
+
+def make_events(count: int) -> list:
+    """Generates the non-command messages from the other users"""
+
+    rnd = random.Random(0)
+    words = [''.join(rnd.choice(string.ascii_lowercase) for _ in range(rnd.randint(1, 10))) for _ in range(500)]
+
+    return [types.SimpleNamespace(
+        message=types.SimpleNamespace(message=' '.join(rnd.choices(words, k=rnd.randint(1, 40))), out=False),
+        out=False, sender_id=rnd.randint(1, 10 ** 9), chat_id=rnd.randint(1, 100), is_private=False,
+        is_group=True, is_channel=False, pattern_match=None
+    ) for _ in range(count)]
+
+
+async def run_legacy(instance: Instance, events: list, repeat: int) -> float:
+    started = time.perf_counter()
+
+    for _ in range(repeat):
+        for event in events:
+            await legacy_messages_handler(instance, event)
+
+    return len(events) * repeat / (time.perf_counter() - started)
+
+
+async def run_router(instance: Instance, events: list, repeat: int) -> float:
+    started = time.perf_counter()
+
+    # filter is built once, as Instance.initialize() does
+    router = instance.build_router()
+    router.resolved = True
+
+    for _ in range(repeat):
+        for event in events:
+            if router.filter(event):
+                await instance.messages_handler(event)
+
+    return len(events) * repeat / (time.perf_counter() - started)
+
+
+def main(count: int = 2000, repeat: int = 10):
+    instance = make_instance()
+    events = make_events(count)
+
+    legacy = asyncio.run(run_legacy(instance, events, repeat))
+    router = asyncio.run(run_router(instance, events, repeat))
+
+    print(f'{count} non-command messages x{repeat}')
+    print(f'  legacy handler      {legacy / 1000:>8.0f}k msgs/s')
+    print(f'  router + handler    {router / 1000:>8.0f}k msgs/s')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:3]))
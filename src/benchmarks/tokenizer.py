@@ -0,0 +1,52 @@
+"""Compares the tokenizers of the ArgumentParser: the split-based scanner and the legacy character loop.
+Run it from the "src" directory: python -m benchmarks.tokenizer"""
+
+import sys
+import types
+import random
+import timeit
+from source.argumentparser import ArgumentParser, tokenize_scanner
+
+# typical command strings (the parser joins the arguments and adds the "\00" sentinel)
+SAMPLES = {
+    'plain': 'user 12345 some reason for the ban\00',
+    'quoted': '"first argument" \'second one\' third "fourth with \'quotes\'"\00',
+    'escaped': 'say \\"hello\\" to \\\'everyone\\\' now\00',
+    'long': ' '.join(['word'] * 200 + ['"quoted words here"'] * 20) + '\00'
+}
+
+
+def parse_legacy(string: str, enable_escaping: bool) -> list[str]:
+    """Parses the string by the character loop without the ArgumentParser instance"""
+
+    return ArgumentParser.parse_string_legacy(types.SimpleNamespace(enable_escaping=enable_escaping), string)
+
+
+def check(count: int = 10000):
+    """Checks, that the tokenizers return the same results on the random strings"""
+
+    rnd = random.Random(0)
+    alphabet = '"\'\\ \00abcn'
+
+    for _ in range(count):
+        string = ''.join(rnd.choice(alphabet) for _ in range(rnd.randint(0, 40)))
+
+        for enable_escaping in (False, True):
+            assert tokenize_scanner(string, enable_escaping) == parse_legacy(string, enable_escaping), string
+
+
+def main(number: int = 20000):
+    check()
+
+    print(f'{"sample":<10}{"escaping":<10}{"legacy, us":>12}{"scanner, us":>13}{"speedup":>9}')
+
+    for name, string in SAMPLES.items():
+        for enable_escaping in (False, True):
+            legacy = timeit.timeit(lambda: parse_legacy(string, enable_escaping), number=number) / number * 1e6
+            scanner = timeit.timeit(lambda: tokenize_scanner(string, enable_escaping), number=number) / number * 1e6
+
+            print(f'{name:<10}{str(enable_escaping):<10}{legacy:>12.2f}{scanner:>13.2f}{legacy / scanner:>8.1f}x')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
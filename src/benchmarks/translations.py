@@ -0,0 +1,46 @@
+"""Compares the access to the translations: nested tomlkit and plain dict lookups against the Translator.key()
+handles. Run it from the "src" directory: python -m benchmarks.translations [number]"""
+
+import os
+import sys
+import timeit
+import tomllib
+import tomlkit
+from source.namespace import Namespace
+from source.translator import Translator
+
+LANG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'translations')
+
+
+def main(number: int = 200000):
+    with open(os.path.join(LANG_DIR, 'core_en.toml'), 'rb') as f:
+        data = f.read()
+
+    toml = {'core': tomlkit.parse(data.decode('utf8'))}
+    plain = {'core': tomllib.loads(data.decode('utf8'))}
+
+    translator = Translator(LANG_DIR, 'en')
+    translator.namespace = Namespace()
+    translator.namespace.translations = {}
+    translator.initialize('core')
+
+    handle = translator.key('core.command.calc.output_message')
+
+    cases = [
+        ("tomlkit nested ['core']['command']['calc']['output_message'].format(42)",
+         lambda: toml['core']['command']['calc']['output_message'].format(42)),
+        ("plain dict nested .format(42)",
+         lambda: plain['core']['command']['calc']['output_message'].format(42)),
+        ('handle.format(42)', lambda: handle.format(42)),
+        ('tomlkit nested string', lambda: toml['core']['command']['calc']['output_message']),
+        ('handle.value', lambda: handle.value),
+    ]
+
+    print(f'Per call, core_en.toml, {number} iterations:')
+
+    for name, func in cases:
+        print(f'  {name:<74}{timeit.timeit(func, number=number) / number * 1e9:>7.0f}ns')
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:2]))
@@ -44,6 +44,9 @@ console_log_level  = logging.INFO  # Set this to the logging.DEBUG if you want t
 disable_telethon_loggers    = True
 disable_utils_logger        = True
 disable_other_misc_loggers  = True
+queued_logging              = False  # write the logs by the background thread, so the logging doesn't slow the commands
+max_log_size                = 10 * 1024 * 1024  # rotate and compress the log file, when it's bigger (0 - without limit)
+log_rotate_interval         = 24 * 60 * 60      # rotate and compress the log file every day (0 - without limit)
 
 ####
 
@@ -64,7 +67,10 @@ if __name__ == '__main__':
                                      console_log_level,
                                      disable_telethon_loggers,
                                      disable_utils_logger,
-                                     disable_other_misc_loggers)
+                                     disable_other_misc_loggers,
+                                     queued_logging,
+                                     max_log_size,
+                                     log_rotate_interval)
 
     main_instance.namespace.enable_plugins_auto_update  = enable_plugins_auto_update
     main_instance.namespace.ffmpeg_dir                  = win_ffmpeg_dir
@@ -72,6 +78,11 @@ if __name__ == '__main__':
 
     main_instance.initialize()
 
+    # exit after the initialization, to measure the startup time by the scripts (see logs/startup-profile.json)
+    if '--exit-after-init' in sys.argv:
+        main_instance.logger.info('Exit after the initialization (--exit-after-init)')
+        sys.exit(0)
+
     if len(sys.argv) == 2:
         if sys.argv[1] == 'restart':  # check if EasyTl started from the restart command
             # add notify about the restart
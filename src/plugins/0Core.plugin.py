@@ -36,7 +36,7 @@ logs_dir   = namespace.instance.logs_dir
 cache_dir  = namespace.instance.cache_dir
 
 # check if namespace.instance_file is set
-namespace.instance_file = namespace.instance_file if 'instance_file' in dir(namespace) else None
+namespace.instance_file = namespace.get('instance_file')
 
 # check for the ffmpeg
 namespace.ffmpeg = False
@@ -56,17 +56,45 @@ Cast.setup_bool_cast_translations(namespace.translations['core']['argumentparser
                                   namespace.translations['core']['argumentparser']['boolcast_false_list'])
 
 
+# handles of the translations, that are used by the commands (see Translator.key())
+t_stop_notify = namespace.translator.key('core.command.stop.stop_notify')
+t_cant_restart_notify = namespace.translator.key('core.command.restart.cant_restart_notify')
+t_restart_notify = namespace.translator.key('core.command.restart.restart_notify')
+t_cache_cleaned = namespace.translator.key('core.command.clear-cache.cleaned_message')
+t_calc_output = namespace.translator.key('core.command.calc.output_message')
+t_cant_find_original = namespace.translator.key('core.argumentparser.cant_find_original_message')
+t_status_empty = namespace.translator.key('core.command.status.empty_message')
+t_status_running = namespace.translator.key('core.command.status.running_line')
+t_status_queued = namespace.translator.key('core.command.status.queued_line')
+t_status_output = namespace.translator.key('core.command.status.output_message')
+t_status_pools = namespace.translator.key('core.command.status.pools_header')
+t_status_pool = namespace.translator.key('core.command.status.pool_line')
+t_stats_empty = namespace.translator.key('core.command.stats.empty_message')
+t_stats_command = namespace.translator.key('core.command.stats.command_line')
+t_stats_phase = namespace.translator.key('core.command.stats.phase_line')
+t_stats_errors = namespace.translator.key('core.command.stats.errors_line')
+t_stats_output = namespace.translator.key('core.command.stats.output_message')
+t_cancel_not_found = namespace.translator.key('core.command.cancel.not_found_message')
+t_cancel_cancelled = namespace.translator.key('core.command.cancel.cancelled_message')
+t_language_current = namespace.translator.key('core.command.language.current_message')
+t_language_selected = namespace.translator.key('core.command.language.selected_message')
+t_language_selected_user = namespace.translator.key('core.command.language.selected_user_message')
+t_language_reset = namespace.translator.key('core.command.language.reset_message')
+t_language_unknown = namespace.translator.key('core.command.language.unknown_message')
+
+
 # stop the userbot
-@this.command(namespace.translations['core']['command']['stop']['names'])
+@this.command(namespace.translations['core']['command']['stop']['names'], queued=False)
 async def stop(event, _):
     this.logger.info('Stopping the instance')
 
     await namespace.instance.send(
         event,
-        namespace.instance.f_warning(namespace.translations['core']['command']['stop']['stop_notify'])
+        namespace.instance.f_warning(namespace.instance.localize(event, t_stop_notify))
     )
 
     namespace.is_run = False
+    namespace.executors.shutdown()
     await namespace.instance.client.disconnect()  # Disconnect from the telegram
     exit()
 
@@ -80,19 +108,23 @@ async def restart(event, _):
         this.logger.info('namespace.instance_file not set. Can\'t do restart')
         await namespace.instance.send(
             event,
-            namespace.instance.f_warning(namespace.translations['core']['command']['restart']['cant_restart_notify'])
+            namespace.instance.f_warning(namespace.instance.localize(event, t_cant_restart_notify))
         )
         return
 
     # notify about the being restart
     await namespace.instance.send(
         event,
-        namespace.instance.f_warning(namespace.translations['core']['command']['restart']['restart_notify'])
+        namespace.instance.f_warning(namespace.instance.localize(event, t_restart_notify))
     )
 
     command = ' '.join([sys.executable, namespace.instance_file, 'restart'])
     namespace.instance.logger.debug(f'Restart the instance with a command: {command}')
 
+    # the process is replaced without the exit handlers, so the queued log records are written now
+    if namespace.instance.log_queue is not None:
+        namespace.instance.log_queue.stop()
+
     os.execl(command)  # run instance again
     await namespace.instance.client.disconnect()  # Disconnect from the telegram
 
@@ -117,17 +149,12 @@ async def clear_cache(event, _):
 
     namespace.temp_files = []
 
-    await namespace.instance.send_success(event, namespace.translations['core']['command']['clear-cache']['cleaned_message'])
+    await namespace.instance.send_success(event, t_cache_cleaned)
 
 
 # send calculated expression to the current chat
 async def calculate(event, expr):
-    await namespace.instance.send_success(
-        event,
-        namespace.translations['core']['command']['calc']['output_message'].format(
-            eval(expr)
-        )
-    )
+    await namespace.instance.send_success(event, t_calc_output, eval(expr))
 
 
 # calculates the expression
@@ -139,11 +166,12 @@ async def calc(event, args):
     if args.expr == '<<reply_to>>':
         if event.reply_to:
             # find the "replied to" message
-            msg = [msg async for msg in namespace.instance.client.iter_messages(event.chat_id, 25)
-                            if msg.id == event.reply_to.reply_to_msg_id]
+            if (msg := await namespace.instance.get_reply_message(event)) is None:
+                await namespace.instance.send_unsuccess(event, t_cant_find_original)
+                return
 
             # calculate the "replied to" message text
-            await calculate(event, msg[0].message)
+            await calculate(event, msg.message)
             return
     else:
         # calculate the arguments
@@ -152,6 +180,103 @@ async def calc(event, args):
 namespace.pcommands[calc.__name__].append('danger')  # mark this command as danger
 
 
+# list the running and queued commands and the load of the executor pools
+@this.command(namespace.translations['core']['command']['status']['names'], queued=False)
+async def status(event, _):
+    running = namespace.scheduler.running()
+    queued = namespace.scheduler.queued()
+    pools = [m for m in namespace.executors.metrics() if m['submitted']]
+
+    if not running and not queued and not pools:
+        await namespace.instance.send_success(event, t_status_empty)
+        return
+
+    lang = namespace.translator.lang_of(event)
+    lines = [t_status_running.format_in(lang, j.job_id, j.name, j.plugin_name, j.chat_id, j.elapsed())
+             for j in running] + \
+            [t_status_queued.format_in(lang, j.job_id, j.name, j.plugin_name, j.chat_id, j.elapsed())
+             for j in queued]
+
+    if pools:
+        lines += ([''] if lines else []) + [t_status_pools.format_in(lang)] + \
+                 [t_status_pool.format_in(lang, m['name'], m['kind'], m['max_workers'], m['in_flight'],
+                                          m['queue_depth'], m['completed'], m['errors'],
+                                          m['avg_run_time'] * 1000, m['avg_wait_time'] * 1000)
+                  for m in pools]
+
+    await namespace.instance.send_success(event, t_status_output, len(running), len(queued), '\n'.join(lines))
+
+
+# phases of the commands in the order of the execution
+stats_phases = ['parse', 'reply_to', 'permissions', 'body', 'send', 'total']
+
+
+# show the time of the commands phases and the commands errors
+@this.command(namespace.translations['core']['command']['stats']['names'], queued=False)
+async def stats(event, _):
+    snapshot = namespace.stats.snapshot()
+
+    if not snapshot:
+        await namespace.instance.send_success(event, t_stats_empty)
+        return
+
+    lang = namespace.translator.lang_of(event)
+    lines = []
+
+    for name, s in sorted(snapshot.items(), key=lambda i: i[1]['count'], reverse=True):
+        lines.append(t_stats_command.format_in(lang, name, s['count'], sum(s['errors'].values())))
+
+        for phase in [p for p in stats_phases if p in s['phases']]:
+            h = s['phases'][phase]
+            lines.append(t_stats_phase.format_in(lang, phase, h['p50'] * 1000, h['p95'] * 1000, h['p99'] * 1000))
+
+        if s['errors']:
+            lines.append(t_stats_errors.format_in(lang, ', '.join(f'{e} ×{n}' for e, n in s['errors'].items())))
+
+    await namespace.instance.send_success(event, t_stats_output, '\n'.join(lines))
+
+
+# cancel the running or queued command
+@this.command(namespace.translations['core']['command']['cancel']['names'],
+              ap=ArgumentParser(this, [Argument('job_id', Cast.IntCast), ]),
+              queued=False)
+async def cancel(event, args):
+    if not namespace.scheduler.cancel(args.job_id):
+        await namespace.instance.send_unsuccess(event, t_cancel_not_found, args.job_id)
+        return
+
+    await namespace.instance.send_success(event, t_cancel_cancelled, args.job_id)
+
+
+# select the language of the chat or of the user ("default" - reset to the default language)
+@this.command(namespace.translations['core']['command']['language']['names'],
+              ap=ArgumentParser(this, [Argument('lang', default=''), Argument('for_user', Cast.BoolCast, False), ]),
+              queued=False)
+async def language(event, args):
+    translator = namespace.translator
+    available = ', '.join(f'`{lang}`' for lang in translator.available_languages())
+
+    if not args.lang:
+        await namespace.instance.send_success(event, t_language_current, translator.lang_of(event), available)
+        return
+
+    lang = None if args.lang == 'default' else args.lang
+    ids = {'user_id': event.sender_id} if args.for_user else {'chat_id': event.chat_id}
+
+    try:
+        translator.select(lang, **ids)
+    except ValueError:
+        await namespace.instance.send_unsuccess(event, t_language_unknown, args.lang, available)
+        return
+
+    # message is sent in the selected language
+    if lang is None:
+        await namespace.instance.send_success(event, t_language_reset, translator.lang_of(event))
+    else:
+        await namespace.instance.send_success(event, t_language_selected_user if args.for_user else t_language_selected,
+                                              lang)
+
+
 # do nothing
 @this.command(namespace.translations['core']['command']['pass']['names'])
 async def pass_(_, __):
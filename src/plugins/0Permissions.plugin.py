@@ -16,6 +16,12 @@ from source.argumentparser import ArgumentParser, Argument
 
 namespace.translator.initialize('permissions')
 
+# handles of the translations, that are used by the commands (see Translator.key())
+t_cant_find_original = namespace.translator.key('core.argumentparser.cant_find_original_message')
+t_danger_command = namespace.translator.key('permissions.command.trust.danger_command_message')
+t_already_trusted = namespace.translator.key('permissions.command.trust.already_trusted_message')
+t_trusted = namespace.translator.key('permissions.command.trust.trusted_message')
+
 
 async def call_w_permissions(func, event, args):
     """(System method) Calls the command (function) with checking the permissions
@@ -25,10 +31,11 @@ async def call_w_permissions(func, event, args):
     :param args: List with the arguments
     """
 
-    user_id = (await event.get_sender()).id
+    with namespace.stats.phase('permissions'):
+        user_id = (await event.get_sender()).id
 
-    this.logger.debug(f'call_w_permissions : '
-                                    f'Get permissions for the function {func.__name__}() for the user id {user_id}')
+    this.logger.debug('call_w_permissions : Get permissions for the function %s() for the user id %s',
+                      func.__name__, user_id)
 
     # check the sender id in the commands allowed ids
     if user_id not in namespace.pcommands[func.__name__]:
@@ -36,10 +43,10 @@ async def call_w_permissions(func, event, args):
                           f'User hasn\'t permissions to execute this function')
         return
 
-    this.logger.debug(f'call_w_permissions : '
-                      f'Call the function {func.__name__}()')
+    this.logger.debug('call_w_permissions : Call the function %s()', func.__name__)
 
-    await func(event, args)  # call the function
+    with namespace.stats.phase('body'):
+        await func(event, args)  # call the function
 
 
 # trusts some command to the user that message was replied
@@ -50,33 +57,36 @@ async def trust(event, args):
     # check if first argument is exists in the registered commands
     if args.command_name not in namespace.commands:
         return
+
+    # plugin of the deferred command is executed, so its permissions (danger mark) are set
+    if (deferred_plugin := getattr(namespace.commands[args.command_name], 'deferred_plugin', None)) is not None:
+        namespace.plugins.activate_deferred(deferred_plugin)
+
+        if args.command_name not in namespace.commands:
+            return
+
     fname = namespace.commands[args.command_name].__name__
 
     # check if the command is danger or no
     if 'danger' in namespace.pcommands[fname]:
-        await namespace.instance.send_unsuccess(
-            event,
-            namespace.translations['permissions']['command']['trust']['danger_command_message']
-        )
+        await namespace.instance.send_unsuccess(event, t_danger_command)
         return
 
     if not event.reply_to:
         return
 
     # find the message that was replied to
-    msg = [msg async for msg in namespace.instance.client.iter_messages(event.chat_id, 25)
-                    if msg.id == event.reply_to.reply_to_msg_id]
-
-    if (sender_id := (await msg[0].get_sender()).id) in namespace.pcommands[fname]:
-        await namespace.instance.send_success(
-            event,
-            namespace.translations['permissions']['command']['trust']['already_trusted_message']
-        )
+    if (msg := await namespace.instance.get_reply_message(event)) is None:
+        await namespace.instance.send_unsuccess(event, t_cant_find_original)
+        return
+
+    if (sender_id := (await msg.get_sender()).id) in namespace.pcommands[fname]:
+        await namespace.instance.send_success(event, t_already_trusted)
         return
 
     # add user id to the commands trusted ids
-    await namespace.instance.send_success(event,
-                                          namespace.translations['permissions']['command']['trust']['trusted_message'])
+    await namespace.instance.send_success(event, t_trusted)
     namespace.pcommands[fname].append(sender_id)
+    namespace.instance.trusted_ids.add(sender_id)  # pass the user messages to the commands router
 
 namespace.call_w_permissions = call_w_permissions
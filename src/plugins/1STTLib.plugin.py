@@ -22,15 +22,12 @@ from source.exceptions import PluginRequiresError
 from source.utils import install_requirements, log_exception
 
 # check for the FFMPEG
-if 'ffmpeg' not in dir(namespace) or not namespace.ffmpeg:
+if not namespace.get('ffmpeg'):
     this.logger.info('ffmpeg support is not enabled or not found')
     this.errored = True
 
     raise PluginRequiresError(this.plugin_name, 'bin: ffmpeg')
 
-# initialize recognizer
-recognizer = sr.Recognizer()
-
 # define the supported is offline mode
 offline_supported = False
 if namespace.platform == 'windows':
@@ -85,5 +82,5 @@ def recognize_speech_from_file(path: str, offline: bool = False, language: str =
 
 # initialize sttlib namespace
 namespace.sttlib = namespace.Namespace()
-namespace.sttlib.recognizer = recognizer
+namespace.sttlib.set_lazy('recognizer', sr.Recognizer)  # recognizer is created on the first use
 namespace.sttlib.recognize_speech_from_file = recognize_speech_from_file
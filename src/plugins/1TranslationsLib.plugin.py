@@ -17,9 +17,6 @@ import googletrans
 # settings
 default_translate_to = namespace.instance.translator.lang
 
-# initialize the Google translator
-translator = googletrans.Translator()
-
 
 def translate(text: str, to=default_translate_to) -> str:
     """Translates any text to other language.
@@ -53,10 +50,12 @@ def detect(text: str) -> str:
 # initializing translatelib namespace
 namespace.translatelib = namespace.Namespace()
 
+# the Google translator is created on the first use
+namespace.translatelib.set_lazy('translator', googletrans.Translator)
+
 # add functions to translatelib namespace
 namespace.translatelib.translate = translate
 namespace.translatelib.detect = detect
 
 # other variables
-namespace.translatelib.translator = translator
 namespace.translatelib.languages = googletrans.LANGUAGES
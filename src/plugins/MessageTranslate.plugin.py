@@ -15,7 +15,7 @@
 from source.argumentparser import ArgumentParser, Argument
 from source.exceptions import PluginRequiresError
 
-if 'translatelib' not in dir(namespace):
+if 'translatelib' not in namespace:
     this.logger.info('translatelib not found in the namespace!')
     this.errored = True
 
@@ -23,6 +23,12 @@ if 'translatelib' not in dir(namespace):
 
 namespace.translator.initialize('MessageTranslate')
 
+# handles of the translations, that are used by the commands (see Translator.key())
+t_cant_find_original = namespace.translator.key('core.argumentparser.cant_find_original_message')
+t_invalid_language = namespace.translator.key('MessageTranslate.command.gtranslate.invalid_language')
+t_translated = namespace.translator.key('MessageTranslate.command.gtranslate.translated_message')
+t_available_langs = namespace.translator.key('MessageTranslate.command.available_langs.message')
+
 # string with the available languages to translate
 languages_string = '\n'.join(
     [f'`{lang[0]}` -- {lang[1]}' for lang in namespace.translatelib.languages.items()]
@@ -40,37 +46,27 @@ async def gtranslate(event, args):
             return
 
         # find the "reply to" message
-        msg = [msg async for msg in namespace.instance.client.iter_messages(event.chat_id, 25)
-                        if msg.id == event.reply_to.reply_to_msg_id]
-        text = msg[0].message
+        if (msg := await namespace.instance.get_reply_message(event)) is None:
+            await namespace.instance.send_unsuccess(event, t_cant_find_original)
+            return
+        text = msg.message
     else:
         text = args.message
 
     translate_to = args.translate_to.lower()
 
     if translate_to not in namespace.translatelib.languages:
-        await namespace.instance.send_unsuccess(
-            event,
-            namespace.translations['MessageTranslate']['command']['gtranslate']['invalid_language'].format(
-                args.translate_to
-            )
-        )
+        await namespace.instance.send_unsuccess(event, t_invalid_language, args.translate_to)
         return
 
     # send translated message
     await namespace.instance.send_success(
         event,
-        namespace.translations['MessageTranslate']['command']['gtranslate']['translated_message'].format(
-            namespace.translatelib.translate(text, translate_to)
-        )
+        t_translated,
+        await this.run_in_thread(namespace.translatelib.translate, text, translate_to, pool='translate')
     )
 
 
 @this.command(namespace.translations['MessageTranslate']['command']['available_langs']['names'])
 async def available_langs(event, _):
-    await namespace.instance.send_success(
-        event,
-        namespace.translations['MessageTranslate']['command']['available_langs']['message'].format(
-            languages_string
-        )
-    )
+    await namespace.instance.send_success(event, t_available_langs, languages_string)
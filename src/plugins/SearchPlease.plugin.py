@@ -18,13 +18,20 @@ import re
 from urllib import request
 from urllib.parse import quote
 from googlesearch import search as gsearch
-from asyncio import sleep as async_sleep
+from asyncio import gather
 from bs4 import BeautifulSoup
 from source.argumentparser import ArgumentParser, Argument, Cast
 
 # initialize the searchplease translations
 namespace.translator.initialize('searchplease')
 
+# handles of the translations, that are used by the commands (see Translator.key())
+t_cant_find_original = namespace.translator.key('core.argumentparser.cant_find_original_message')
+t_unsupported_platform = namespace.translator.key('searchplease.unsupported_platform')
+t_query_opened = namespace.translator.key('searchplease.command.search.query_opened')
+t_link_found = namespace.translator.key('searchplease.command.gsearch.link_found')
+t_results = namespace.translator.key('searchplease.command.gimgsearch.results_message')
+
 # the commandline to open new tab in the browser
 browsers = {
     'Chrome': 'chrome.exe ',
@@ -58,8 +65,7 @@ gsibq_headers = {'User-Agent': 'Mozilla/5.0 (X11; Ubuntu; Linux x86_64; rv:47.0)
 
 
 async def unsupported_platform(event, _):
-    await namespace.instance.send_unsuccess(event,
-                                            namespace.translations['searchplease']['unsupported_platform'])
+    await namespace.instance.send_unsuccess(event, t_unsupported_platform)
 
 
 def google_search_image_by_query(query: str, count: int = 1, output_dir: str = namespace.instance.cache_dir):
@@ -121,8 +127,7 @@ def google_search_image_by_query(query: str, count: int = 1, output_dir: str = n
 async def search(event, args):
     # Execute the commandline to open the query in the browser
     os.system(search_line + quote(args.search_string))
-    await namespace.instance.send_success(event,
-                                          namespace.translations['searchplease']['command']['search']['query_opened'])
+    await namespace.instance.send_success(event, t_query_opened)
 
 if search is not unsupported_platform:
     namespace.pcommands[search.__name__].append('danger')  # mark this command as danger
@@ -140,19 +145,18 @@ async def gsearch_(event, args):
             return
 
         # find the "reply to" message
-        msg = [msg async for msg in namespace.instance.client.iter_messages(event.chat_id, 25)
-                        if msg.id == event.reply_to.reply_to_msg_id]
-        text = msg[0].message
+        if (msg := await namespace.instance.get_reply_message(event)) is None:
+            await namespace.instance.send_unsuccess(event, t_cant_find_original)
+            return
+        text = msg.message
     else:
         text = args.search_string
 
     # Send query to the Google
-    for url in gsearch(text, stop=args.number, num=args.number):
-        await namespace.instance.send_success(
-            event,
-            namespace.translations['searchplease']['command']['gsearch']['link_found'].format(url)
-        )
-        await async_sleep(0.2)
+    urls = await this.run_in_thread(lambda: list(gsearch(text, stop=args.number, num=args.number)), pool='search')
+
+    # queue all the links at once, the outbound queue will merge them
+    await gather(*[namespace.instance.send_success(event, t_link_found, url) for url in urls])
 
     namespace.temp_files.append(os.path.join(namespace.instance.install_dir, '.google-cookie'))
 
@@ -168,22 +172,19 @@ async def gimgsearch(event, args):
             return
 
         # find the "reply to" message
-        msg = [msg async for msg in namespace.instance.client.iter_messages(event.chat_id, 25)
-                        if msg.id == event.reply_to.reply_to_msg_id]
-        text = msg[0].message
+        if (msg := await namespace.instance.get_reply_message(event)) is None:
+            await namespace.instance.send_unsuccess(event, t_cant_find_original)
+            return
+        text = msg.message
     else:
         text = args.search_string
 
     # send message about success results
-    await namespace.instance.send_success(
-        event,
-        namespace.translations['searchplease']['command']['gimgsearch']['results_message']
-    )
+    await namespace.instance.send_success(event, t_results)
 
     # send founded images
-    for path in google_search_image_by_query(text, args.number)[1]:
-        await namespace.instance.client.send_file(event.chat_id, path)
-        await async_sleep(0.2)
+    for path in (await this.run_in_thread(google_search_image_by_query, text, args.number, pool='search'))[1]:
+        await namespace.instance.send_file(event, path)
 
 
 namespace.searchplease = namespace.Namespace()
@@ -16,7 +16,7 @@ import os
 from source.argumentparser import ArgumentParser, Argument, Cast
 from source.exceptions import PluginRequiresError
 
-if 'sttlib' not in dir(namespace):
+if 'sttlib' not in namespace:
     this.logger.info('sttlib not found in the namespace!')
     this.errored = True
 
@@ -24,6 +24,14 @@ if 'sttlib' not in dir(namespace):
 
 namespace.translator.initialize('VoiceToText')
 
+# handles of the translations, that are used by the commands (see Translator.key())
+t_cant_find_original = namespace.translator.key('core.argumentparser.cant_find_original_message')
+t_no_reply_to = namespace.translator.key('VoiceToText.command.vtt.no_reply_to_message')
+t_no_media = namespace.translator.key('VoiceToText.command.vtt.no_media_message')
+t_isnt_audio = namespace.translator.key('VoiceToText.command.vtt.isnt_audio_message')
+t_google_success = namespace.translator.key('VoiceToText.command.vtt.google_success_message')
+t_sphinx_success = namespace.translator.key('VoiceToText.command.vtt.sphinx_success_message')
+
 # advanced settings
 
 temp_file_path = os.path.join(namespace.instance.cache_dir, 'temp.')  # keep the dot at the end!
@@ -38,42 +46,32 @@ temp_file_path = os.path.join(namespace.instance.cache_dir, 'temp.')  # keep the
 async def vtt(event, args):
     # check if the message is "reply to"
     if not event.reply_to:
-        await namespace.instance.send_unsuccess(
-            event,
-            namespace.translations['VoiceToText']['command']['vtt']['no_reply_to_message']
-        )
+        await namespace.instance.send_unsuccess(event, t_no_reply_to)
         return
 
     # find the "reply to" message
-    msg = [msg async for msg in namespace.instance.client.iter_messages(event.chat_id, 25)
-                    if msg.id == event.reply_to.reply_to_msg_id]
-    msg = msg[0]
+    if (msg := await namespace.instance.get_reply_message(event)) is None:
+        await namespace.instance.send_unsuccess(event, t_cant_find_original)
+        return
 
     if not msg.media:
-        await namespace.instance.send_unsuccess(
-            event,
-            namespace.translations['VoiceToText']['command']['vtt']['no_media_message']
-        )
+        await namespace.instance.send_unsuccess(event, t_no_media)
         return
 
     # check if message media content is audio
     if not (mime_type := msg.media.document.mime_type.split('/'))[0] == 'audio':
-        await namespace.instance.send_unsuccess(
-            event,
-            namespace.translations['VoiceToText']['command']['vtt']['isnt_audio_message']
-        )
+        await namespace.instance.send_unsuccess(event, t_isnt_audio)
         return
 
     # download the message media
     await msg.download_media(temp_file_path+mime_type[1])
 
+    # recognize the speech in the thread pool
+    text = await this.run_in_thread(namespace.sttlib.recognize_speech_from_file,
+                                    temp_file_path+mime_type[1], args.offline, args.translate_from,
+                                    pool='stt')
+
     # send message with the recognized speech
-    await namespace.instance.send_success(
-        event,
-        namespace.translations['VoiceToText']['command']['vtt']['sphinx_success_message' if args.offline else 'google_success_message']
-        .format(
-            namespace.sttlib.recognize_speech_from_file(temp_file_path+mime_type[1], args.offline, args.translate_from)
-        )
-    )
+    await namespace.instance.send_success(event, t_sphinx_success if args.offline else t_google_success, text)
     return
 
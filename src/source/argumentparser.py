@@ -1,6 +1,10 @@
+import re
+import sys
 import logging
-from .namespace import Namespace
-from .utils import log_exception
+import copy
+import dataclasses
+from .namespace import Namespace, make_slotted_namespace
+from .utils import log_exception, LRUCache
 from .exceptions import ArgumentTypeCastingError
 from typing import Any
 from enum import Enum, auto
@@ -11,9 +15,6 @@ escape_dict = {
     "'": "'"
 }
 
-# number of messages to iter when reply-to functional is used
-RT_ITER_NUM = 50
-
 
 class ArgumentParseError(Enum):
     TooManyArguments = auto()
@@ -260,8 +261,119 @@ class ReplyToArgument(Argument):
     pass
 
 
-# cache of the ArgumentParser
-_CACHED = {}
+# special characters of the argument string for the scanner tokenizer
+_SCANNER_ESCAPING = re.compile(r'(\\.?|["\'\x00])', re.DOTALL)
+_SCANNER_PLAIN = re.compile(r'(["\'\x00])')
+
+
+def tokenize_scanner(string: str, enable_escaping: bool = False) -> list[str]:
+    """Parses the string to the list with the arguments. Works as ArgumentParser.parse_string_legacy(),
+    but splits the string by the special characters and spaces with the compiled regular expression
+    and str.split() instead of the walking it by the characters
+
+    :param string: String to parse
+    :type string: str
+    :param enable_escaping: Enable the escaping by "\\" character
+    :type enable_escaping: bool
+
+    :return: List with the parsed arguments
+    :rtype: list[str]
+    """
+
+    # backslashes are skipped if escaping is disabled
+    if not enable_escaping:
+        string = string.replace('\\', '')
+
+    # fast path for the strings without quotes, escaping and "\00" characters inside
+    if '"' not in string and "'" not in string and '\\' not in string and '\x00' not in string[:-1]:
+        temp_args = string.removesuffix('\x00').split(' ')
+        last = temp_args.pop()
+
+        # last argument is added only by the "\00" character
+        if last and string.endswith('\x00'):
+            temp_args.append(last)
+
+        return temp_args
+
+    temp_args = []
+    parts = []  # parts of the current argument
+    str_open_char = None
+
+    # even segments are the text without special characters, odd segments are the special characters
+    for i, segment in enumerate((_SCANNER_ESCAPING if enable_escaping else _SCANNER_PLAIN).split(string)):
+        if not i % 2:
+            # check for the open string
+            if str_open_char is not None or ' ' not in segment:
+                parts.append(segment)
+                continue
+
+            pieces = segment.split(' ')
+
+            parts.append(pieces[0])
+            temp_args.append(''.join(parts))
+            temp_args.extend(pieces[1:-1])  # every next space adds an argument, even if it is empty
+            parts = [pieces[-1]]
+
+        elif segment == '"' or segment == "'":
+            if str_open_char is None:
+                str_open_char = segment
+            elif str_open_char == segment:
+                str_open_char = None
+            else:
+                parts.append(segment)
+
+        elif segment == '\x00':
+            # "\00" adds the current argument, but doesn't clear it
+            if temp_str := ''.join(parts):
+                temp_args.append(temp_str)
+                parts = [temp_str]
+
+        # escaping (backslash without character at the end of string is skipped)
+        elif len(segment) == 2:
+            parts.append(escape_dict[segment[1]] if segment[1] in escape_dict else segment)
+
+    return temp_args
+
+
+def _build_result_class(arguments: list[Argument]) -> type:
+    """Generates the slotted class for the parsed arguments with the default values of the arguments
+
+    :param arguments: List with the arguments
+    :type arguments: list[Argument]
+
+    :return: Class with the PREFIX, CMD, REPLY_TO_MESSAGE and the arguments fields
+    :rtype: type
+    """
+
+    fields = [('PREFIX', str), ('CMD', str), ('REPLY_TO_MESSAGE', Any, dataclasses.field(default=None))]
+
+    for arg in arguments:
+        # mutable defaults are copied for the every result
+        fields.append((arg.arg_name, Any,
+                       dataclasses.field(default=arg.default) if getattr(arg.default, '__hash__', None) is not None
+                       else dataclasses.field(default_factory=lambda d=arg.default: copy.copy(d))))
+
+    return make_slotted_namespace('ParsedArguments', fields)
+
+
+# default limits of the ArgumentParser cache
+CACHE_SIZE = 256
+CACHE_MAX_BYTES = 256 * 1024
+
+
+def _parse_cache_sizeof(key: tuple[str, bool], value: tuple[str, ...]) -> int:
+    """Estimates the size of the parse cache entry in the bytes
+
+    :param key: Key of the entry (string, enable_escaping)
+    :type key: tuple[str, bool]
+    :param value: Parsed arguments
+    :type value: tuple[str, ...]
+
+    :returns: Estimated size in the bytes
+    :rtype: int
+    """
+
+    return sys.getsizeof(key[0]) + sys.getsizeof(value) + sum(sys.getsizeof(v) for v in value)
 
 
 class ArgumentParser:
@@ -273,12 +385,22 @@ class ArgumentParser:
     :type arguments: list[Argument]
     :ivar allow_caching: Use the caching when it parses the arguments
     :type allow_caching: bool
+    :ivar cache: LRU cache of the parsed strings, None if caching isn't allowed
+    :type cache: LRUCache | None
+    :ivar tokenizer: Tokenizer of the argument strings ("scanner" or "legacy")
+    :type tokenizer: str
     :ivar logger: Logger of the argument parser
     :type logger: logging.Logger
     :ivar position_arguments: Number of the position arguments
     :type position_arguments: int
     :ivar default_arguments: Number of the default arguments
     :type default_arguments: int
+    :ivar reply_to_argument: The reply-to argument, if it is the first argument
+    :type reply_to_argument: ReplyToArgument | None
+    :ivar bind_arguments: Arguments, that are bound to the parsed strings in the order
+    :type bind_arguments: tuple[Argument]
+    :ivar result_class: Generated slotted class of the parsed arguments with the default values
+    :type result_class: type
     """
 
     def __init__(self,
@@ -287,7 +409,10 @@ class ArgumentParser:
                  allow_caching: bool = True,
                  enable_escaping: bool = False,
                  subcommands: bool = False,
-                 main_command_aliases: str | list[str] | None = None
+                 main_command_aliases: str | list[str] | None = None,
+                 cache_size: int = CACHE_SIZE,
+                 cache_max_bytes: int | None = CACHE_MAX_BYTES,
+                 tokenizer: str = 'scanner'
                  ):
         """
         :param parent_plugin: Parent plugin of this parser
@@ -302,6 +427,12 @@ class ArgumentParser:
         :type subcommands: bool
         :param main_command_aliases: Name of the main commands (requires "subcommands")
         :type main_command_aliases: str | list[str] | None = None
+        :param cache_size: Maximum number of the parsed strings in the cache
+        :type cache_size: int
+        :param cache_max_bytes: Maximum estimated size of the cache in the bytes, None - without limit
+        :type cache_max_bytes: int | None
+        :param tokenizer: Tokenizer of the argument strings ("scanner" or "legacy")
+        :type tokenizer: str
         """
 
         self.parent_plugin = parent_plugin
@@ -309,19 +440,22 @@ class ArgumentParser:
         self.allow_caching = allow_caching
         self.enable_escaping = enable_escaping
         self.subcommands = subcommands
+        self.tokenizer = tokenizer
+        self.cache = LRUCache(cache_size, cache_max_bytes, _parse_cache_sizeof) if allow_caching else None
 
         self.logger = logging.getLogger('EasyTl : ArgumentParser')
 
-        self.logger.debug('Initializing the values')
-        self.position_arguments = 0
-        self.default_arguments = 0
+        self.logger.debug('Compiling the binding plan')
 
-        for arg in self.arguments:
-            if arg.default:
-                self.default_arguments += 1
-                continue
+        # the reply-to argument is bound to the replied message, other arguments are bound to the strings
+        self.reply_to_argument = self.arguments[0] \
+            if len(self.arguments) > 0 and isinstance(self.arguments[0], ReplyToArgument) else None
+        self.bind_arguments = tuple(arg for arg in self.arguments if arg is not self.reply_to_argument)
 
-            self.position_arguments += 1
+        self.default_arguments = sum(1 for arg in self.bind_arguments if arg.is_optional)
+        self.position_arguments = len(self.bind_arguments) - self.default_arguments
+
+        self.result_class = _build_result_class(self.arguments)
 
         self.subcommands_dict = {}
 
@@ -329,11 +463,6 @@ class ArgumentParser:
             # create empty command by the plugin decorator
             self.parent_plugin.command(main_command_aliases, ap=self)(self.parent_plugin.async_empty)
 
-        # check for the reply-to argument
-        if len(self.arguments) > 0 and isinstance(self.arguments[0], ReplyToArgument):
-            if self.arguments[0].default is None:
-                self.position_arguments -= 1
-
     def _cached_check(self, string: str) -> list[str]:
         """Checker for the caching
 
@@ -344,21 +473,37 @@ class ArgumentParser:
         :rtype: list[str]
         """
 
-        if not self.allow_caching:
+        if self.cache is None:
             return self.parse_string(string)
 
-        # get hash of the string
-        str_hash = hash(string)
+        # the parser options are the part of the key, because they change the result
+        key = (string, self.enable_escaping)
 
-        if str_hash not in _CACHED:
-            _CACHED[str_hash] = self.parse_string(string)
+        if (result := self.cache.get(key)) is None:
+            result = tuple(self.parse_string(string))
+            self.cache.put(key, result)
 
-        return _CACHED[str_hash]
+        return list(result)
 
     ####
 
     def parse_string(self, string: str) -> list[str]:
-        """Parses the string to the list with the arguments
+        """Parses the string to the list with the arguments by the selected tokenizer
+
+        :param string: String to parse
+        :type string: str
+
+        :return: List with the parsed arguments
+        :rtype: list[str]
+        """
+
+        if self.tokenizer == 'legacy':
+            return self.parse_string_legacy(string)
+
+        return tokenize_scanner(string, self.enable_escaping)
+
+    def parse_string_legacy(self, string: str) -> list[str]:
+        """Parses the string to the list with the arguments character by character
 
         :param string: String to parse
         :type string: str
@@ -441,7 +586,9 @@ class ArgumentParser:
         :rtype: (bool, Namespace | ArgumentParseError)
         """
 
-        self.logger.debug('ArgumentParser called with arguments: ' + ', '.join(args))
+        # arguments are joined only if the debug records are written
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug('ArgumentParser called with arguments: %s', ', '.join(args))
 
         # check for the subcommands
         if self.subcommands:
@@ -467,9 +614,7 @@ class ArgumentParser:
                 return ArgumentParseError.IncorrectSubcommand
 
         # initialize the variables
-        output_args = Namespace()
-        output_args.PREFIX = args[0]
-        output_args.CMD = args[1]
+        values = {}
         temp_args = []
 
         if len(args) > 2:
@@ -479,17 +624,13 @@ class ArgumentParser:
             temp_args = self._cached_check(input_str)
 
         # check for the reply-to argument
-        if len(self.arguments) > 0 and isinstance(self.arguments[0], ReplyToArgument):
-            arg = self.arguments[0]
-
+        if (arg := self.reply_to_argument) is not None:
             # check if message has reply-to
             if event.reply_to:
                 # find reply-to message
-                msg = [msg async for msg in self.parent_plugin.namespace.instance.client.iter_messages(event.chat_id, RT_ITER_NUM)
-                       if msg.id == event.reply_to.reply_to_msg_id]
-                if len(msg) == 0:
+                msg = await self.parent_plugin.namespace.instance.get_reply_message(event)
+                if msg is None:
                     return ArgumentParseError.CantFindOriginalMessage
-                msg = msg[0]
 
                 # type-cast the argument
                 error, result = arg.typecast(msg.message)
@@ -502,8 +643,8 @@ class ArgumentParser:
                     return ArgumentParseError.IncorrectType
 
                 # set up the type-casted reply-to message
-                setattr(output_args, arg.arg_name, result)
-                setattr(output_args, 'REPLY_TO_MESSAGE', msg)
+                values[arg.arg_name] = result
+                values['REPLY_TO_MESSAGE'] = msg
             else:
                 if arg.default is None:
                     return ArgumentParseError.ReplyToRequired
@@ -518,13 +659,8 @@ class ArgumentParser:
             self.logger.debug('Too much arguments')
             return ArgumentParseError.TooManyArguments
 
-        # initialize the default arguments
-        for arg in self.arguments:
-            if arg.default:
-                setattr(output_args, arg.arg_name, arg.default)
-
         # type-cast & define the arguments
-        for arg, targ in zip(self.arguments, temp_args):
+        for arg, targ in zip(self.bind_arguments, temp_args):
             # type-cast the argument
             error, result = arg.typecast(targ)
 
@@ -536,7 +672,10 @@ class ArgumentParser:
                 return ArgumentParseError.IncorrectType
 
             # define variable
-            setattr(output_args, arg.arg_name, result)
+            values[arg.arg_name] = result
+
+        # create the result, other arguments are already set to the default values
+        output_args = self.result_class(args[0], args[1], **values)
 
         # call the command
         await self.parent_plugin.namespace.call_w_permissions(command_func, event, output_args)
@@ -0,0 +1,147 @@
+import os
+import marshal
+import logging
+import importlib.util
+from .utils import toml_loads, log_exception
+from .manifest import FileManifest
+
+
+def compile_catalog(path: str) -> dict:
+    """Parses the translations file to the plain dicts, lists and strings
+
+    :param path: Path to the translations file
+    :type path: str
+
+    :returns: Catalog of the translations
+    :rtype: dict
+    """
+
+    with open(path, 'rb') as f:
+        catalog = toml_loads(f.read().decode('utf-8'))
+
+    # tomlkit (python < 3.11) returns the style-preserving containers
+    return catalog.unwrap() if hasattr(catalog, 'unwrap') else catalog
+
+
+class CatalogCache:
+    """Persistent snapshot of the compiled translations catalogs. Catalogs are marshalled to the one file
+    with the sha256 hashes of the translations files from the manifest (files are hashed again only if
+    their size or mtime is changed), so the unchanged files are not parsed on the next starts
+
+    :ivar path: Path to the snapshot file
+    :type path: str
+    :ivar manifest: Fingerprints of the files
+    :type manifest: FileManifest
+    :ivar entries: Dict with the "sha256" and "catalog" by the paths of the translations files
+    :type entries: dict[str, dict]
+    :ivar changed: Snapshot is changed and must be saved
+    :type changed: bool
+    :ivar hits: Number of the catalogs, that are taken from the snapshot
+    :type hits: int
+    :ivar misses: Number of the compiled catalogs
+    :type misses: int
+    :ivar logger: Logger of the cache
+    :type logger: logging.Logger
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str, manifest: FileManifest):
+        """
+        :param path: Path to the snapshot file
+        :type path: str
+        :param manifest: Fingerprints of the files
+        :type manifest: FileManifest
+        """
+
+        self.path = path
+        self.manifest = manifest
+        self.entries = {}
+        self.changed = False
+
+        self.hits = 0
+        self.misses = 0
+
+        self.logger = logging.getLogger('EasyTl : CatalogCache')
+
+        self.load()
+
+    def _header(self) -> bytes:
+        """(System method) Returns the header of the snapshot file
+
+        :returns: Python magic number and version of the snapshot
+        :rtype: bytes
+        """
+
+        return importlib.util.MAGIC_NUMBER + self.VERSION.to_bytes(1, 'little')
+
+    def load(self):
+        """Loads the snapshot file. Snapshot is empty, if the file isn't exists or was written by the other Python"""
+
+        header = self._header()
+
+        try:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+
+            if data[:len(header)] == header:
+                self.entries = marshal.loads(data[len(header):])
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning('Can\'t load the translations snapshot. It will be created again')
+            log_exception(self.logger, e)
+
+    def save(self):
+        """Writes the snapshot file, if it was changed. Catalogs of the removed files are not written"""
+
+        if not self.changed:
+            return
+
+        entries = {p: e for p, e in self.entries.items() if os.path.exists(p)}
+
+        try:
+            with open(self.path + '.tmp', 'wb') as f:
+                f.write(self._header() + marshal.dumps(entries))
+
+            os.replace(self.path + '.tmp', self.path)
+            self.entries, self.changed = entries, False
+        except Exception as e:
+            self.logger.warning('Can\'t write the translations snapshot')
+            log_exception(self.logger, e)
+
+    ####
+
+    def get(self, path: str) -> dict:
+        """Returns the catalog of the translations file. Catalog is taken from the snapshot,
+        if the file hash in the manifest isn't changed. Otherwise, file is compiled
+
+        :param path: Path to the translations file
+        :type path: str
+
+        :returns: Catalog of the translations
+        :rtype: dict
+        """
+
+        key = os.path.abspath(path)
+        sha256 = self.manifest.sha256(path)
+        entry = self.entries.get(key)
+
+        if entry is not None and entry['sha256'] == sha256:
+            self.hits += 1
+            return entry['catalog']
+
+        self.misses += 1
+        catalog = compile_catalog(path)
+
+        # values, that can't be marshalled (for example, TOML dates), are not cached
+        try:
+            marshal.dumps(catalog)
+        except ValueError:
+            self.logger.debug(f'get() : Catalog of the {path} can\'t be cached')
+            return catalog
+
+        self.entries[key] = {'sha256': sha256, 'catalog': catalog}
+        self.changed = True
+
+        return catalog
@@ -0,0 +1,160 @@
+import os
+import sys
+import marshal
+import hashlib
+import logging
+import importlib.util
+from .utils import log_exception
+
+
+class CodeCache:
+    """Persistent cache of the compiled plugins code. Code objects are marshalled to the "<name>.code" files.
+    Header of the file contains the Python magic number, optimization level and sha256 hash of the source,
+    so the code is compiled again, if the plugin file or the Python version is changed.
+    With the hash from the FileManifest, the cached code is loaded without reading the source
+
+    :ivar cache_dir: Path to the directory with the compiled code
+    :type cache_dir: str
+    :ivar optimize: Optimization level of the compile()
+    :type optimize: int
+    :ivar hits: Number of the code objects, that are loaded from the cache
+    :type hits: int
+    :ivar misses: Number of the compiled code objects
+    :type misses: int
+    :ivar logger: Logger of the cache
+    :type logger: logging.Logger
+    """
+
+    def __init__(self, cache_dir: str, optimize: int = -1):
+        """
+        :param cache_dir: Path to the directory with the compiled code
+        :type cache_dir: str
+        :param optimize: Optimization level of the compile() (-1 - level of the interpreter)
+        :type optimize: int
+        """
+
+        self.cache_dir = cache_dir
+        self.optimize = sys.flags.optimize if optimize == -1 else optimize
+
+        self.hits = 0
+        self.misses = 0
+
+        self.logger = logging.getLogger('EasyTl : CodeCache')
+
+    def _header(self, sha256: str) -> bytes:
+        """(System method) Returns the header of the cache file
+
+        :param sha256: Hex digest of the source hash
+        :type sha256: str
+
+        :returns: Magic number, optimization level and hash of the source
+        :rtype: bytes
+        """
+
+        return importlib.util.MAGIC_NUMBER + self.optimize.to_bytes(1, 'little') + bytes.fromhex(sha256)
+
+    def _path(self, name: str) -> str:
+        """(System method) Returns the path to the cache file
+
+        :param name: Name of the code (plugin name)
+        :type name: str
+
+        :returns: Path to the file
+        :rtype: str
+        """
+
+        return os.path.join(self.cache_dir, name + '.code')
+
+    def load(self, name: str, filename: str, sha256: str):
+        """Loads the compiled code from the cache
+
+        :param name: Name of the code (plugin name)
+        :type name: str
+        :param filename: Path to the source file
+        :type filename: str
+        :param sha256: Hex digest of the source hash (see FileManifest.sha256())
+        :type sha256: str
+
+        :returns: Code object or None, if it isn't cached for this source
+        """
+
+        header = self._header(sha256)
+
+        try:
+            with open(self._path(name), 'rb') as f:
+                data = f.read()
+
+            if data[:len(header)] == header:
+                code = marshal.loads(data[len(header):])
+
+                # path of the plugin may be changed with the same source
+                if code.co_filename == filename:
+                    self.hits += 1
+                    return code
+
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.debug(f'load() : Can\'t load the cached code of {name}')
+            log_exception(self.logger, e)
+
+    def store(self, name: str, sha256: str, code):
+        """Writes the compiled code to the cache
+
+        :param name: Name of the code (plugin name)
+        :type name: str
+        :param sha256: Hex digest of the source hash
+        :type sha256: str
+        :param code: Code object
+        """
+
+        path = self._path(name)
+
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+
+            # write to the temporary file and replace, so the broken file is never read
+            with open(tmp := f'{path}.{os.getpid()}.tmp', 'wb') as f:
+                f.write(self._header(sha256) + marshal.dumps(code))
+            os.replace(tmp, path)
+
+        except Exception as e:
+            self.logger.warning(f'Can\'t write the compiled code of {name} to the cache')
+            log_exception(self.logger, e)
+
+    def compile(self, name: str, source: bytes, filename: str):
+        """Loads the compiled source from the cache or compiles it and writes to the cache
+
+        :param name: Name of the code (plugin name)
+        :type name: str
+        :param source: Source code
+        :type source: bytes
+        :param filename: Path to the source file (for the tracebacks)
+        :type filename: str
+
+        :returns: Code object
+        :raises SyntaxError: Source can't be compiled
+        """
+
+        sha256 = hashlib.sha256(source).hexdigest()
+
+        if (code := self.load(name, filename, sha256)) is not None:
+            return code
+
+        self.misses += 1
+        code = compile(source, filename, 'exec', optimize=self.optimize)
+        self.store(name, sha256, code)
+
+        return code
+
+    def remove(self, name: str):
+        """Removes the cached code
+
+        :param name: Name of the code (plugin name)
+        :type name: str
+        """
+
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
@@ -1,13 +1,32 @@
 import os
+import re
 import logging
 import time
 import sys
+import asyncio
+import itertools
 import tomlkit
+from collections import deque
 from getpass import getpass
 from telethon import TelegramClient, events
 from .namespace import Namespace
-from .translator import Translator
+from .translator import Translator, TranslationKey
 from .argumentparser import ArgumentParser, ArgumentParseError
+from .utils import log_exception, LRUCache
+from .executors import Executors
+from .outbound import OutboundQueue
+from .stats import CommandStats
+from .updater import PluginUpdater
+from .codecache import CodeCache
+from .pluginindex import PluginIndex
+from .manifest import FileManifest
+from .requirements import RequirementsResolver
+from .lazymanifest import LazyManifest
+from .watcher import FileWatcher
+from .profiler import StartupProfiler
+from .catalog import CatalogCache
+from .logqueue import QueuedLogging
+from .logrotate import RotatingLogHandler, LogRetention
 from . import pluginapi
 
 sys.path.append('..')
@@ -15,6 +34,266 @@ sys.path.append('..')
 from external.colargulog import ColorizedArgsFormatter, BraceFormatStyleFormatter
 
 
+class CommandJob:
+    """The command, that is queued or executing by the CommandScheduler
+
+    :ivar job_id: Id of the job
+    :type job_id: int
+    :ivar chat_id: Id of the chat, where command was called
+    :type chat_id: int
+    :ivar name: Alias of the command, that was called
+    :type name: str
+    :ivar plugin_name: Name of the plugin, that owns the command
+    :type plugin_name: str
+    :ivar event: Telethon's event variable
+    :ivar func: Function, that returns the coroutine of the command
+    :type func: () -> Coroutine
+    :ivar state: State of the job ("queued", "running", "done", "cancelled", "timeout", "errored")
+    :type state: str
+    :ivar created: Time (time.monotonic()) when the job was created
+    :type created: float
+    :ivar started: Time (time.monotonic()) when the job was started
+    :type started: float | None
+    :ivar task: Task of the executing command
+    :type task: asyncio.Task | None
+    """
+
+    def __init__(self, job_id: int, chat_id: int, name: str, plugin_name: str, event, func):
+        """
+        :param job_id: Id of the job
+        :type job_id: int
+        :param chat_id: Id of the chat, where command was called
+        :type chat_id: int
+        :param name: Alias of the command, that was called
+        :type name: str
+        :param plugin_name: Name of the plugin, that owns the command
+        :type plugin_name: str
+        :param event: Telethon's event variable
+        :param func: Function, that returns the coroutine of the command
+        :type func: () -> Coroutine
+        """
+
+        self.job_id, self.chat_id, self.name, self.plugin_name, self.event, self.func \
+            = job_id, chat_id, name, plugin_name, event, func
+
+        self.state    = 'queued'
+        self.created  = time.monotonic()
+        self.started  = None
+        self.task     = None
+
+    def elapsed(self) -> float:
+        """Returns the seconds, that the job is running (or waiting, if it queued)
+
+        :returns: Seconds since the start (or creation) of the job
+        :rtype: float
+        """
+
+        return time.monotonic() - (self.started if self.started is not None else self.created)
+
+
+class CommandScheduler:
+    """Runs the commands as the separate tasks. Commands in the same chat are executed in the order
+    they were called, commands in the different chats are executed concurrently
+
+    :ivar max_concurrency: Maximum number of the commands, that are executing at the same time
+    :type max_concurrency: int
+    :ivar plugin_concurrency: Maximum number of the commands of one plugin, that are executing at the same time
+    :type plugin_concurrency: int
+    :ivar timeout: Timeout of the command in seconds. If 0 or None, commands are executing without timeout
+    :type timeout: float | None
+    :ivar on_timeout: Coroutine function, that is called with the CommandJob when it's timed out
+    :type on_timeout: ((CommandJob) -> Coroutine) | None
+    :ivar jobs: Dict with the queued and running jobs by its ids
+    :type jobs: dict[int, CommandJob]
+    :ivar logger: Logger of the scheduler
+    :type logger: logging.Logger
+    """
+
+    def __init__(self, max_concurrency: int = 8, plugin_concurrency: int = 2, timeout: float | None = 300):
+        """
+        :param max_concurrency: Maximum number of the commands, that are executing at the same time
+        :type max_concurrency: int
+        :param plugin_concurrency: Maximum number of the commands of one plugin, that are executing at the same time
+        :type plugin_concurrency: int
+        :param timeout: Timeout of the command in seconds. If 0 or None, commands are executing without timeout
+        :type timeout: float | None
+        """
+
+        self.max_concurrency     = max_concurrency
+        self.plugin_concurrency  = plugin_concurrency
+        self.timeout             = timeout if timeout else None
+        self.on_timeout          = None
+
+        self.jobs = {}
+
+        self._ids = itertools.count(1)
+        self._chats = {}
+        self._workers = {}
+        self._global_semaphore = asyncio.Semaphore(max_concurrency)
+        self._plugin_semaphores = {}
+
+        self.logger = logging.getLogger('EasyTl : CommandScheduler')
+
+    def submit(self, chat_id: int, name: str, plugin_name: str, event, func, queued: bool = True) -> CommandJob:
+        """Adds the command to the chat queue
+
+        :param chat_id: Id of the chat, where command was called
+        :type chat_id: int
+        :param name: Alias of the command, that was called
+        :type name: str
+        :param plugin_name: Name of the plugin, that owns the command
+        :type plugin_name: str
+        :param event: Telethon's event variable
+        :param func: Function, that returns the coroutine of the command
+        :type func: () -> Coroutine
+        :param queued: If False, the command is started at once, without waiting for the other commands in the chat
+        :type queued: bool
+
+        :returns: Created job
+        :rtype: CommandJob
+        """
+
+        job = CommandJob(next(self._ids), chat_id, name, plugin_name, event, func)
+        self.jobs[job.job_id] = job
+
+        self.logger.debug('Submit the job #%s (%s) to the chat %s', job.job_id, name, chat_id)
+
+        if not queued:
+            asyncio.create_task(self._run(job))
+            return job
+
+        self._chats.setdefault(chat_id, deque()).append(job)
+
+        # start the worker of the chat, if it isn't running
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._chat_worker(chat_id))
+
+        return job
+
+    def cancel(self, job_id: int) -> bool:
+        """Cancels the queued or running job
+
+        :param job_id: Id of the job
+        :type job_id: int
+
+        :returns: True if the job was found and cancelled
+        :rtype: bool
+        """
+
+        if (job := self.jobs.get(job_id)) is None:
+            return False
+
+        if job.state == 'queued':
+            # not queued jobs (queued=False) wait for the semaphores without the chat queue
+            if job in self._chats.get(job.chat_id, ()):
+                self._chats[job.chat_id].remove(job)
+            job.state = 'cancelled'
+        elif job.task is not None:
+            job.task.cancel()
+
+        self.jobs.pop(job_id, None)
+
+        self.logger.debug('Job #%s (%s) is cancelled', job_id, job.name)
+        return True
+
+    def running(self) -> list[CommandJob]:
+        """Returns the running jobs
+
+        :returns: List with the running jobs
+        :rtype: list[CommandJob]
+        """
+
+        return [j for j in self.jobs.values() if j.state == 'running']
+
+    def queued(self) -> list[CommandJob]:
+        """Returns the queued jobs
+
+        :returns: List with the queued jobs
+        :rtype: list[CommandJob]
+        """
+
+        return [j for j in self.jobs.values() if j.state == 'queued']
+
+    ####
+
+    def _plugin_semaphore(self, plugin_name: str) -> asyncio.Semaphore:
+        """(System method) Gets the semaphore of the plugin
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+
+        :returns: Semaphore of the plugin
+        :rtype: asyncio.Semaphore
+        """
+
+        if plugin_name not in self._plugin_semaphores:
+            self._plugin_semaphores[plugin_name] = asyncio.Semaphore(self.plugin_concurrency)
+
+        return self._plugin_semaphores[plugin_name]
+
+    async def _chat_worker(self, chat_id: int):
+        """(System method) Executes the jobs of the chat one by one
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        """
+
+        queue = self._chats[chat_id]
+
+        try:
+            while queue:
+                await self._run(queue[0])
+        finally:
+            del self._workers[chat_id]
+            if not queue:
+                del self._chats[chat_id]
+
+    async def _run(self, job: CommandJob):
+        """(System method) Executes the job with the concurrency limits and timeout
+
+        :param job: The job
+        :type job: CommandJob
+        """
+
+        async with self._plugin_semaphore(job.plugin_name), self._global_semaphore:
+            # remove the job from the chat queue
+            if (queue := self._chats.get(job.chat_id)) and queue[0] is job:
+                queue.popleft()
+
+            if job.state == 'cancelled':
+                return
+
+            job.state = 'running'
+            job.started = time.monotonic()
+            job.task = asyncio.create_task(asyncio.wait_for(job.func(), self.timeout))
+
+            self.logger.debug('Job #%s (%s) is started', job.job_id, job.name)
+
+            # wait for the task without raising its errors
+            await asyncio.wait((job.task, ))
+
+        self.jobs.pop(job.job_id, None)
+
+        if job.task.cancelled():
+            job.state = 'cancelled'
+        elif isinstance(e := job.task.exception(), asyncio.TimeoutError):
+            job.state = 'timeout'
+            self.logger.info('Job #%s (%s) is timed out after %s seconds', job.job_id, job.name, self.timeout)
+
+            if self.on_timeout is not None:
+                try:
+                    await self.on_timeout(job)
+                except Exception as e:
+                    log_exception(self.logger, e)
+        elif e is not None:
+            job.state = 'errored'
+            log_exception(self.logger, e)
+        else:
+            job.state = 'done'
+
+        self.logger.debug('Job #%s (%s) is finished in %.3fs, state: %s', job.job_id, job.name, job.elapsed(), job.state)
+
+
 class Instance:
     """Instance object of EasyTl userbot for Telegram
 
@@ -40,8 +319,40 @@ class Instance:
     :type logs_dir: str
     :ivar logs_dir: Directory with the logs
     :type logs_dir: str
+    :ivar parse_error_messages: Handles of the translations of the arguments parsing errors
+    :type parse_error_messages: dict[ArgumentParseError, TranslationKey]
     :ivar prefixes: List with the EasyTl prefixes, by the default is "easy"
     :type prefixes: list[str]
+    :ivar prefix_pattern: Compiled pattern, that matches the prefix as first word of the message
+    :type prefix_pattern: re.Pattern
+    :ivar trusted_ids: Ids of the users, whose incoming messages are passed to the commands router
+    :type trusted_ids: set[int]
+    :ivar scheduler: Scheduler, that executes the commands
+    :type scheduler: CommandScheduler
+    :ivar executors: Pools, that run the blocking functions of the plugins
+    :type executors: Executors
+    :ivar messages_cache: Recently seen messages by the (chat id, message id), used for the reply-to lookups
+    :type messages_cache: LRUCache
+    :ivar outbound: Queue of the outgoing messages
+    :type outbound: OutboundQueue
+    :ivar stats: Time of the commands phases and the commands errors
+    :type stats: CommandStats
+    :ivar updater: Downloader of the plugins updates
+    :type updater: PluginUpdater
+    :ivar code_cache: Cache of the compiled plugins code (None if it's disabled)
+    :type code_cache: CodeCache | None
+    :ivar manifest: Fingerprints of the plugins and translations files
+    :type manifest: FileManifest
+    :ivar plugin_index: Index of the plugins information
+    :type plugin_index: PluginIndex
+    :ivar catalogs: Snapshot of the compiled translations catalogs
+    :type catalogs: CatalogCache
+    :ivar requirements: Resolver of the plugins requirements
+    :type requirements: RequirementsResolver
+    :ivar watcher: Watcher of the plugins and translations directories, None if it's disabled
+    :type watcher: FileWatcher | None
+    :ivar profiler: Wall and CPU time of the startup phases and the plugins activation steps
+    :type profiler: StartupProfiler
     :ivar client: Telethon TelegramClient instance
     :type client: TelegramClient
     :ivar config: System configuration of the EasyTl-CLI
@@ -54,6 +365,10 @@ class Instance:
     :type logger: logging.Logger
     :ivar addition_handlers: The addition handlers for the logging
     :type addition_handlers: list[logging.StreamHandler]
+    :ivar log_queue: Queued logging pipeline (if it's enabled in the Instance.initialize_logging())
+    :type log_queue: QueuedLogging | None
+    :ivar log_retention: Compresses and removes the old logs to keep the logs directory in the disk budget
+    :type log_retention: LogRetention | None
     """
 
     def __init__(self,
@@ -102,11 +417,39 @@ class Instance:
 
         self.client             = None
         self.config             = None
+        self.scheduler          = None
+        self.executors          = None
+        self.messages_cache     = None
+        self.outbound           = None
+        self.stats              = None
+        self.updater            = None
+        self.code_cache         = None
+        self.manifest           = None
+        self.plugin_index       = None
+        self.catalogs           = None
+        self.requirements       = None
+        self.watcher            = None
+        self.profiler           = StartupProfiler()
         self.logger             = None
         self.addition_handlers  = []
+        self.log_queue          = None
+        self.log_retention      = None
 
         self.prefixes = ['easy', ]
 
+        # handles of the arguments parsing errors messages
+        self.parse_error_messages = {
+            error: self.translator.key('core.argumentparser.' + key) for error, key in (
+                (ArgumentParseError.TooLittleArguments, 'too_little_arguments'),
+                (ArgumentParseError.TooManyArguments, 'too_much_arguments'),
+                (ArgumentParseError.IncorrectType, 'incorrect_type'),
+                (ArgumentParseError.IncorrectSubcommand, 'incorrect_subcommand'),
+                (ArgumentParseError.ReplyToRequired, 'reply_to_required'),
+                (ArgumentParseError.CantFindOriginalMessage, 'cant_find_original_message'),
+            )
+        }
+        self.trusted_ids = set(self.owner_ids)
+
         # initialize working namespace
         self.namespace               = Namespace()
         self.namespace.instance      = self
@@ -118,6 +461,7 @@ class Instance:
         self.namespace.pcommands     = {}
         self.namespace.notify_stack  = []
         self.namespace.misc_loggers  = []
+        self.namespace.profiler      = self.profiler
 
         # load the plugins
         plugins_list = [pluginapi.Plugin(os.path.basename(f)[:-10], os.path.join(self.plugins_dir, f))
@@ -133,49 +477,212 @@ class Instance:
         # other
         self.disable_misc_loggers = False
 
+    @property
+    def prefixes(self) -> list[str]:
+        """List with the EasyTl prefixes. Setting it recompiles the Instance.prefix_pattern"""
+        return self._prefixes
+
+    @prefixes.setter
+    def prefixes(self, value: list[str]):
+        self._prefixes = list(value)
+        self.prefix_pattern = re.compile(
+            '(?:' + '|'.join(re.escape(p) for p in sorted(self._prefixes, key=len, reverse=True)) + r')(?: |$)'
+        )
+
+    def build_router(self) -> events.NewMessage:
+        """Builds the event filter for the Instance.messages_handler.
+        Only messages, that start with the prefix and sent by the owner or trusted users are passed
+
+        :returns: Telethon's NewMessage event builder
+        :rtype: events.NewMessage
+        """
+
+        return events.NewMessage(pattern=self._route_prefix, func=self._route_sender)
+
+    def _route_prefix(self, text: str) -> re.Match | None:
+        """(System method) Matches the prefix at the start of the message text
+
+        :param text: Text of the message
+        :type text: str
+
+        :returns: Match object if the message starts with the prefix, otherwise None
+        :rtype: re.Match | None
+        """
+
+        return self.prefix_pattern.match(text)
+
+    def _route_sender(self, event) -> bool:
+        """(System method) Checks that message is outgoing or sent by the trusted user
+
+        :param event: Telethon's event variable
+
+        :returns: True if the message can be passed to the Instance.messages_handler
+        :rtype: bool
+        """
+
+        return event.out or event.sender_id in self.trusted_ids
+
     def initialize(self):
         """Initializes the working environment for userbot"""
 
-        self.logger.debug('Creating instance of TelegramClient in instance.client')
+        with self.profiler.phase('telegram_client'):
+            self.logger.debug('Creating instance of TelegramClient in instance.client')
+
+            # init telethon's TelegramClient
+            self.client = TelegramClient('EasyTl-'+self.instance_name, self.api_id, self.api_hash)
+            self.client.add_event_handler(self.messages_handler, self.build_router())
+            self.namespace.client = self.client
+
+        with self.profiler.phase('config'):
+            self.logger.debug('Loading config for the instance')
+
+            with open(self.config_file, 'r') as f:
+                self.config = tomlkit.load(f)
+
+            self.logger.debug('Checking the config')
+            self.check_config()
+
+        with self.profiler.phase('services'):
+            self.logger.debug('Creating the commands scheduler')
+
+            scheduler_config = self.config.get('scheduler', {})
+            self.scheduler = CommandScheduler(scheduler_config.get('max_concurrency', 8),
+                                              scheduler_config.get('plugin_concurrency', 2),
+                                              scheduler_config.get('command_timeout', 300))
+            self.scheduler.on_timeout = self._command_timeout
+            self.namespace.scheduler = self.scheduler
+
+            self.logger.debug('Creating the executor pools')
+
+            executors_config = self.config.get('executors', {})
+            self.executors = Executors(executors_config.get('thread_workers', 4),
+                                       executors_config.get('process_workers', 2),
+                                       executors_config.get('sizes', {}))
+            self.namespace.executors = self.executors
+
+            self.logger.debug('Creating the messages cache')
+
+            self.messages_cache = LRUCache(self.config.get('cache', {}).get('messages', 2000))
+            self.client.add_event_handler(self.cache_handler, events.NewMessage)
+            self.client.add_event_handler(self.cache_handler, events.MessageEdited)
+            self.client.add_event_handler(self.cache_delete_handler, events.MessageDeleted)
+
+            self.logger.debug('Creating the outbound queue')
+
+            outbound_config = self.config.get('outbound', {})
+            self.outbound = OutboundQueue(self.client,
+                                          outbound_config.get('global_rate', 25),
+                                          outbound_config.get('global_burst', 30),
+                                          outbound_config.get('chat_rate', 1),
+                                          outbound_config.get('chat_burst', 5),
+                                          outbound_config.get('max_merge_length', 4096),
+                                          outbound_config.get('flood_retries', 3),
+                                          outbound_config.get('max_flood_wait', 300))
 
-        # init telethon's TelegramClient
-        self.client = TelegramClient('EasyTl-'+self.instance_name, self.api_id, self.api_hash)
-        self.client.add_event_handler(self.messages_handler, events.NewMessage)
-        self.namespace.client = self.client
+            self.logger.debug('Creating the commands statistics')
 
-        self.logger.debug('Loading config for the instance')
+            self.stats = CommandStats(self.config.get('stats', {}).get('samples', 1024))
+            self.namespace.stats = self.stats
 
-        with open(self.config_file, 'r') as f:
-            self.config = tomlkit.load(f)
+            self.logger.debug('Creating the plugins updater')
 
-        self.logger.debug('Checking the config')
-        self.check_config()
+            updates_config = self.config.get('updates', {})
+            self.updater = PluginUpdater(self.cache_dir,
+                                         updates_config.get('max_workers', 8),
+                                         updates_config.get('connect_timeout', 5),
+                                         updates_config.get('read_timeout', 30))
+            self.namespace.updater = self.updater
 
-        self.logger.debug('Loading translator')
+            code_cache_config = self.config.get('code_cache', {})
+            if code_cache_config.get('enabled', True):
+                self.code_cache = CodeCache(self.cache_dir, code_cache_config.get('optimize', -1))
+            self.namespace.code_cache = self.code_cache
 
-        # init the translator
-        self.namespace.translator.namespace = self.namespace
-        self.namespace.translator.load_languages()
+        with self.profiler.phase('caches'):
+            self.manifest = FileManifest(os.path.join(self.cache_dir, 'manifest.json'))
+            self.namespace.manifest = self.manifest
+
+            self.plugin_index = PluginIndex(os.path.join(self.cache_dir, 'plugins-index.json'), self.manifest)
+            self.namespace.plugin_index = self.plugin_index
+
+            self.catalogs = CatalogCache(os.path.join(self.cache_dir, 'translations.catalog'), self.manifest)
+            self.namespace.catalogs = self.catalogs
+
+            requirements_config = self.config.get('requirements', {})
+            self.requirements = RequirementsResolver(os.path.join(self.cache_dir, 'requirements.json'),
+                                                     self.logs_dir,
+                                                     requirements_config.get('wheelhouse', ''),
+                                                     requirements_config.get('offline', False))
+            self.namespace.requirements = self.requirements
+
+        with self.profiler.phase('translator'):
+            self.logger.debug('Loading translator')
+
+            # init the translator
+            # fallback languages are merged to the default translations too
+            translations_config = self.config.get('translations', {})
+            self.translator.fallback = translations_config.get('fallback', ['en'])
+
+            self.namespace.translator.namespace = self.namespace
+            self.namespace.translator.load_languages()
+
+            # locales of the other languages are built on the first use in the chats, that selected them
+            self.translator.set_locales_limits(translations_config.get('max_locales', 4),
+                                               translations_config.get('max_locales_kb', 8192) * 1024)
+            self.translator.load_selections(os.path.join(self.install_dir, 'languages.json'))
+
+            # get the prefixes for the commands router
+            if 'core' in self.namespace.translations:
+                self.prefixes = self.namespace.translations['core']['prefixes']
 
         self.logger.debug('Loading plugins list')
 
         # activate the plugins
         self.logger.info('Activating plugins')
 
-        self.namespace.plugins.activate_plugin_list()
+        self.namespace.plugins.activation_workers = self.config.get('activation', {}).get('workers', 4)
+        self.namespace.plugins.all_languages = self.config.get('translations', {}).get('download_all', False)
+
+        lazy_config = self.config.get('lazy', {})
+        if lazy_config.get('enabled', False):
+            self.namespace.plugins.lazy_manifest = LazyManifest(os.path.join(self.cache_dir, 'lazy-manifest.json'),
+                                                                self.manifest)
+            self.namespace.plugins.eager = set(lazy_config.get('eager', ['0Core', '0Permissions']))
+
+        with self.profiler.phase('activate_plugin_list'):
+            self.namespace.plugins.activate_plugin_list()
+
+        with self.profiler.phase('save_caches'):
+            if self.namespace.plugins.lazy_manifest is not None:
+                self.namespace.plugins.lazy_manifest.prune(list(self.namespace.plugins.plugins))
+                self.namespace.plugins.lazy_manifest.save()
+
+            self.plugin_index.prune([p.plugin_path for p in self.namespace.plugins.plugins.values()])
+            self.plugin_index.save()
+            self.catalogs.save()
+            self.manifest.prune()
+            self.manifest.save()
 
         # disable misc logger if it required
         if self.disable_misc_loggers:
             for logger in self.namespace.misc_loggers:
                 logger.setLevel(logging.ERROR)
 
+        # report of the startup time
+        self.profiler.finish()
+        self.profiler.log_table()
+        self.profiler.save(os.path.join(self.logs_dir, 'startup-profile.json'))
+
     def initialize_logging(self,
                            auto_config: bool = False,
                            log_level: str | int = logging.DEBUG,
                            console_log_level: str | int = logging.INFO,
                            disable_telethon_loggers: bool = True,
                            disable_utils_logger: bool = False,
-                           disable_misc_loggers: bool = True):
+                           disable_misc_loggers: bool = True,
+                           queued: bool = False,
+                           max_log_size: int = 0,
+                           log_rotate_interval: float = 0):
         """Initializes the logging system
 
         :param auto_config: Auto configure the logging
@@ -190,6 +697,13 @@ class Instance:
         :type disable_utils_logger: bool
         :param disable_misc_loggers: Disable other misc loggers
         :type disable_misc_loggers: bool
+        :param queued: Write the records by the background thread (see source.logqueue.QueuedLogging),
+            so the logging doesn't block the event loop by the formatting and the disk writes
+        :type queued: bool
+        :param max_log_size: Size of the log file in the bytes, when it's rotated and compressed (0 - without limit)
+        :type max_log_size: int
+        :param log_rotate_interval: Seconds, after which the log file is rotated and compressed (0 - without limit)
+        :type log_rotate_interval: float
         """
 
         if auto_config:
@@ -203,11 +717,11 @@ class Instance:
             stdout_handler.setFormatter(stdout_formatter)
             stdout_handler.setLevel(console_log_level)
 
-            # init a stream handler for the file log
-            file_handler = logging.FileHandler(
+            # init a rotating handler for the file log
+            file_handler = RotatingLogHandler(
                 os.path.join(self.logs_dir, f'{time.strftime("%Y-%m-%d_%H-%M", time.localtime())}-log.txt'),
-                'w',
-                'utf8'
+                max_log_size,
+                log_rotate_interval
             )
             file_handler.setFormatter(file_formatter)
             file_handler.setLevel(logging.DEBUG)
@@ -216,10 +730,15 @@ class Instance:
             self.addition_handlers.append(stdout_handler)
             self.addition_handlers.append(file_handler)
 
+            # records are passed to the handlers by the listener thread
+            if queued:
+                self.log_queue = QueuedLogging(self.addition_handlers)
+                self.log_queue.start()
+
             # configure the logger
             logging.basicConfig(
                 format=s_format, datefmt='%H:%M:%S',
-                handlers=self.addition_handlers,
+                handlers=[self.log_queue.handler] if queued else self.addition_handlers,
                 level=log_level
             )
 
@@ -261,6 +780,32 @@ class Instance:
             self.logger.warning('This is a beta version. If you have some problems with EasyTl, '
                              'inform about it there: https://github.com/ftdot/EasyTl/issues')
         
+        # write the commands statistics to the logs directory periodically
+        if (interval := self.config.get('stats', {}).get('snapshot_interval', 300)) > 0:
+            self.client.loop.create_task(
+                self.stats.snapshot_loop(os.path.join(self.logs_dir, 'command-stats.json'), interval)
+            )
+
+        # compress the closed logs and remove the old logs, when the logs directory exceeds the budget
+        logs_config = self.config.get('logs', {})
+        self.log_retention = LogRetention(self.logs_dir,
+                                          logs_config.get('max_total_mb', 500) * 1024 * 1024,
+                                          logs_config.get('max_age_days', 30) * 24 * 60 * 60,
+                                          logs_config.get('idle', 300),
+                                          {h.baseFilename for h in self.addition_handlers
+                                           if isinstance(h, logging.FileHandler)})
+        self.client.loop.create_task(self.log_retention.run(logs_config.get('interval', 600)))
+
+        # reload the changed plugins and translations without the restart
+        watcher_config = self.config.get('watcher', {})
+        if watcher_config.get('enabled', False):
+            self.watcher = FileWatcher([self.plugins_dir, self.translator.lang_dir],
+                                       self.namespace.plugins.reload_files,
+                                       interval=watcher_config.get('interval', 1.0),
+                                       debounce=watcher_config.get('debounce', 0.5),
+                                       use_inotify=watcher_config.get('inotify', True))
+            self.client.loop.create_task(self.watcher.run())
+
         if run_until_disconnected:
             self.client.run_until_disconnected()
 
@@ -276,45 +821,52 @@ class Instance:
         :param event: Telethon's event variable
         """
 
-        self.logger.debug(f'command_handler, LENGTH: {length} ARGS: {args}')
+        self.logger.debug('command_handler, LENGTH: %s ARGS: %s', length, args)
 
         # check if the command is exists
         if length < 1 or args[1] not in self.namespace.commands:
-            self.logger.debug(f'Command {args[1]} not found in Instance.namespace.commands')
+            self.logger.debug('Command %s not found in Instance.namespace.commands', args[1])
             return
 
-        # check if the notify stack have some messages
-        await self.check_notifies_stack(event)
-
         # get function for the command
         command_func = self.namespace.commands[args[1]]
 
-        # parsing the arguments or use arguments list without prefix
-        # WARNING! Raw arguments list without prefix will be deleted in 1.5.1 releases
-        if isinstance(command_func.ap, ArgumentParser):
-            error = await command_func.ap.parse(args, event, command_func)
+        trace = self.stats.start(command_func.__name__)
 
-            if error:
-                message = 'Unknown error'
+        try:
+            await self._execute_command(command_func, args, event)
+        except asyncio.CancelledError:
+            self.stats.error(trace.name, 'Cancelled')
+            raise
+        except Exception as e:
+            self.stats.error(trace.name, type(e).__name__)
+            raise
+        finally:
+            self.stats.finish(trace)
 
-                match error:
-                    case ArgumentParseError.TooLittleArguments:
-                        message = self.namespace.translations['core']['argumentparser']['too_little_arguments']
+    async def _execute_command(self, command_func, args: list, event):
+        """(System method) Parses the arguments and calls the command
 
-                    case ArgumentParseError.TooManyArguments:
-                        message = self.namespace.translations['core']['argumentparser']['too_much_arguments']
+        :param command_func: Function of the command
+        :param args: The args, split by space list
+        :type args: list
+        :param event: Telethon's event variable
+        """
 
-                    case ArgumentParseError.IncorrectType:
-                        message = self.namespace.translations['core']['argumentparser']['incorrect_type']
+        # check if the notify stack have some messages
+        await self.check_notifies_stack(event)
 
-                    case ArgumentParseError.IncorrectSubcommand:
-                        message = self.namespace.translations['core']['argumentparser']['incorrect_subcommand']
+        # parsing the arguments or use arguments list without prefix
+        # WARNING! Raw arguments list without prefix will be deleted in 1.5.1 releases
+        if isinstance(command_func.ap, ArgumentParser):
+            with self.stats.phase('parse'):
+                error = await command_func.ap.parse(args, event, command_func)
 
-                    case ArgumentParseError.ReplyToRequired:
-                        message = self.namespace.translations['core']['argumentparser']['reply_to_required']
+            if error:
+                self.stats.error(command_func.__name__, error.name)
 
-                    case ArgumentParseError.CantFindOriginalMessage:
-                        message = self.namespace.translations['core']['argumentparser']['cant_find_original_message']
+                handle = self.parse_error_messages.get(error)
+                message = handle.get(self.translator.lang_of(event)) if handle is not None else 'Unknown error'
 
                 await self.send_unsuccess(event, message)
 
@@ -330,15 +882,83 @@ class Instance:
         :param event: Telethon's event variable
         """
 
-        # split message by space and check if message isn't empty
-        msg_split = event.message.message.split(' ')
-        if (l := len(msg_split)) == 0:
+        text = event.message.message
+
+        # check the first word of the message without splitting the whole text
+        if not text or text.partition(' ')[0] not in self._prefixes:
+            return
+
+        msg_split = text.split(' ')
+        self.logger.debug('A message with the command has been detected, MSG_SPLIT: %s', msg_split)
+        self.schedule_command(len(msg_split) - 1, msg_split, event)
+
+    async def cache_handler(self, event):
+        """(System method) Saves the new or the edited message to the messages cache
+
+        :param event: Telethon's event variable
+        """
+
+        self.messages_cache.put((event.chat_id, event.message.id), event.message)
+
+    async def cache_delete_handler(self, event):
+        """(System method) Removes the deleted messages from the messages cache
+
+        :param event: Telethon's MessageDeleted event
+        """
+
+        # chat isn't known for the deletions in the private chats and the small groups
+        if event.chat_id is None:
+            deleted = set(event.deleted_ids)
+
+            for key in self.messages_cache.keys():
+                if key[1] in deleted:
+                    self.messages_cache.discard(key)
+            return
+
+        for message_id in event.deleted_ids:
+            self.messages_cache.discard((event.chat_id, message_id))
+
+    def schedule_command(self, length: int, args: list, event) -> CommandJob | None:
+        """(System method) Submits the command to the scheduler
+
+        :param length: Length of "cmd" list
+        :type length: int
+        :param args: The args, split by space list
+        :type args: list
+        :param event: Telethon's event variable
+
+        :returns: Submitted job, or None if the command isn't exists
+        :rtype: CommandJob | None
+        """
+
+        # check if the command is exists
+        if length < 1 or args[1] not in self.namespace.commands:
+            self.logger.debug('Command %s not found in Instance.namespace.commands', args[1] if length else None)
             return
 
-        # check if the message is had some prefixes
-        if msg_split[0] in self.prefixes:
-            self.logger.debug(f'A message with the command has been detected, MSG_SPLIT: {msg_split}')
-            await self.command_handler(l - 1, msg_split, event)
+        command_func = self.namespace.commands[args[1]]
+
+        # plugin of the command is deferred. Execute it, then the real command is registered
+        if (deferred_plugin := getattr(command_func, 'deferred_plugin', None)) is not None:
+            self.namespace.plugins.activate_deferred(deferred_plugin)
+
+            if (command_func := self.namespace.commands.get(args[1])) is None:
+                self.logger.debug('Command %s isn\'t registered by the deferred plugin %s', args[1], deferred_plugin)
+                return
+
+        return self.scheduler.submit(event.chat_id, args[1], getattr(command_func, 'plugin_name', None), event,
+                                     lambda: self.command_handler(length, args, event),
+                                     getattr(command_func, 'queued', True))
+
+    async def _command_timeout(self, job: CommandJob):
+        """(System method) Notifies about the timed out command
+
+        :param job: The timed out job
+        :type job: CommandJob
+        """
+
+        await self.send_unsuccess(job.event, self.translator.key('core.scheduler.timeout_message'),
+                                  job.name, self.scheduler.timeout)
 
     ####
 
@@ -349,11 +969,47 @@ class Instance:
         """
 
         if len(self.namespace.notify_stack) > 0:
-            for m in self.namespace.notify_stack:
-                self.logger.debug(f'Send message from notify stack: {m}')
-                await self.send(event, self.f_notify(m))  # send the message to a chat
+            notifies, self.namespace.notify_stack = self.namespace.notify_stack, []  # clear the notifies stack
+
+            self.logger.debug(f'Send {len(notifies)} messages from notify stack')
+
+            # queue all the notifies at once, so they are merged into one message
+            await asyncio.gather(*[self.send(event, self.f_notify(m)) for m in notifies])
+
+    async def get_message(self, chat_id: int, message_id: int):
+        """Gets the message by its id. Looks for the message in the messages cache first
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        :param message_id: Id of the message
+        :type message_id: int
+
+        :returns: Telethon's Message or None, if message isn't found
+        """
 
-            self.namespace.notify_stack = []  # clear the notifies stack
+        if (msg := self.messages_cache.get((chat_id, message_id))) is not None:
+            return msg
+
+        self.logger.debug('Message %s not found in the cache. Get it from the CHAT_ID: %s', message_id, chat_id)
+
+        if (msg := await self.client.get_messages(chat_id, ids=message_id)) is not None:
+            self.messages_cache.put((chat_id, message_id), msg)
+
+        return msg
+
+    async def get_reply_message(self, event):
+        """Gets the message, that event is replied to
+
+        :param event: Telethon's event variable
+
+        :returns: Telethon's Message or None, if event isn't reply or message isn't found
+        """
+
+        if not event.reply_to:
+            return None
+
+        with self.stats.phase('reply_to'):
+            return await self.get_message(event.chat_id, event.reply_to.reply_to_msg_id)
 
     def check_config(self):
         """Checks for the config values"""
@@ -415,61 +1071,115 @@ class Instance:
 
         return f'`EasyTl` ⚠️ {message}'
 
-    async def send(self, event, message: str):
-        """Send message to current chat.
-        Shorthand for client.send_message(event.chat_id, ...)
+    def localize(self, event, message, *args, **kwargs) -> str:
+        """Formats the handle of the translation in the language of the chat or the user (see Translator.lang_of()).
+        Strings are returned as is
 
         :param event: Telethon's event variable
-        :param message: Message that will be sent
-        :type message: str
+        :param message: Message or the handle of the translation
+        :type message: str | TranslationKey
+        :param args: Arguments of the template
+        :param kwargs: Keyword arguments of the template
+
+        :returns: Localized message
+        :rtype: str
+        """
+
+        if isinstance(message, TranslationKey):
+            return message.format_in(self.translator.lang_of(event), *args, **kwargs)
+
+        return message
+
+    async def send(self, event, message, *args, **kwargs):
+        """Send message to current chat through the Instance.outbound queue.
+        Messages, queued to the same chat at the same time, may be merged into one message
+
+        :param event: Telethon's event variable
+        :param message: Message that will be sent or the handle of the translation (see Instance.localize())
+        :type message: str | TranslationKey
+        :param args: Arguments of the translation template
+        :param kwargs: Keyword arguments of the translation template
+
+        :returns: Telethon's Message, that was sent
         """
 
-        self.logger.debug(f'Send message to the CHAT_ID: {event.chat_id} MESSAGE: {message}')
-        await self.client.send_message(event.chat_id, message)
+        message = self.localize(event, message, *args, **kwargs)
+
+        self.logger.debug('Send message to the CHAT_ID: %s MESSAGE: %s', event.chat_id, message)
 
-    async def send_success(self, event, message: str):
+        with self.stats.phase('send'):
+            msg = await self.outbound.send_message(event.chat_id, message)
+        self.messages_cache.put((event.chat_id, msg.id), msg)
+
+        return msg
+
+    async def send_file(self, event, file, **kwargs):
+        """Send file to current chat through the Instance.outbound queue.
+        Shorthand for client.send_file(event.chat_id, ...)
+
+        :param event: Telethon's event variable
+        :param file: File that will be sent
+        :param kwargs: Other arguments of the TelegramClient.send_file()
+
+        :returns: Telethon's Message, that was sent
+        """
+
+        self.logger.debug('Send file to the CHAT_ID: %s FILE: %s', event.chat_id, file)
+
+        with self.stats.phase('send'):
+            return await self.outbound.send_file(event.chat_id, file, **kwargs)
+
+    async def send_success(self, event, message, *args, **kwargs):
         """Send message to current chat, formatted as success.
         Shorthand for Instance.send(event, Instance.f_success(message))
 
         :param event: Telethon's event variable
-        :param message: Message that will be formatted as success and sent
-        :type message: str
+        :param message: Message that will be formatted as success and sent or the handle of the translation
+        :type message: str | TranslationKey
+        :param args: Arguments of the translation template
+        :param kwargs: Keyword arguments of the translation template
         """
 
-        await self.send(event, self.f_success(message))
+        await self.send(event, self.f_success(self.localize(event, message, *args, **kwargs)))
 
-    async def send_unsuccess(self, event, message: str):
+    async def send_unsuccess(self, event, message, *args, **kwargs):
         """Send message to current chat, formatted as unsuccess.
         Shorthand for Instance.send(event, Instance.f_unsuccess(message))
 
         :param event: Telethon's event variable
-        :param message: Message that will be formatted as unsuccess and sent
-        :type message: str
+        :param message: Message that will be formatted as unsuccess and sent or the handle of the translation
+        :type message: str | TranslationKey
+        :param args: Arguments of the translation template
+        :param kwargs: Keyword arguments of the translation template
         """
 
-        await self.send(event, self.f_unsuccess(message))
+        await self.send(event, self.f_unsuccess(self.localize(event, message, *args, **kwargs)))
 
-    async def send_notify(self, event, message: str):
+    async def send_notify(self, event, message, *args, **kwargs):
         """Send message to current chat, formatted as notify.
         Shorthand for Instance.send(event, Instance.f_notify(message))
 
         :param event: Telethon's event variable
-        :param message: Message that will be formatted as notify and sent
-        :type message: str
+        :param message: Message that will be formatted as notify and sent or the handle of the translation
+        :type message: str | TranslationKey
+        :param args: Arguments of the translation template
+        :param kwargs: Keyword arguments of the translation template
         """
 
-        await self.send(event, self.f_notify(message))
+        await self.send(event, self.f_notify(self.localize(event, message, *args, **kwargs)))
 
-    async def send_warning(self, event, message: str):
+    async def send_warning(self, event, message, *args, **kwargs):
         """Send message to current chat, formatted as warning.
         Shorthand for Instance.send(event, Instance.f_warning(message))
 
         :param event: Telethon's event variable
-        :param message: Message that will be formatted as warning and sent
-        :type message: str
+        :param message: Message that will be formatted as warning and sent or the handle of the translation
+        :type message: str | TranslationKey
+        :param args: Arguments of the translation template
+        :param kwargs: Keyword arguments of the translation template
         """
 
-        await self.send(event, self.f_warning(message))
+        await self.send(event, self.f_warning(self.localize(event, message, *args, **kwargs)))
 
     ####
 
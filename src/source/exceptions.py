@@ -27,7 +27,8 @@ class PluginError(Exception):
 class PluginRequiresError(PluginError):
 
     def __init__(self, plugin_name: str, required: str, *args):
-        super().__init__(plugin_name, f'requires the "{self.required}" to work', *args)
+        super().__init__(plugin_name, f'requires the "{required}" to work', *args)
+        self.required = required
 
 
 class PluginExitedError(PluginError):
@@ -0,0 +1,243 @@
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Future
+
+
+def _timed_call(func, args: tuple, kwargs: dict) -> (bool, object, float, float):
+    """(System function) Calls the function in the worker and measures it
+
+    :param func: Function to call
+    :param args: Positional arguments of the function
+    :type args: tuple
+    :param kwargs: Keyword arguments of the function
+    :type kwargs: dict
+
+    :return: Tuple with bool ERROR, result or exception, wall time of the start and run time in seconds
+    :rtype: (bool, object, float, float)
+    """
+
+    started = time.time()
+    counter = time.perf_counter()
+
+    try:
+        return False, func(*args, **kwargs), started, time.perf_counter() - counter
+    except Exception as e:
+        return True, e, started, time.perf_counter() - counter
+
+
+class ExecutorPool:
+    """Named thread or process pool, that runs the blocking functions outside the event loop
+
+    :ivar name: Name of the pool
+    :type name: str
+    :ivar kind: Kind of the pool ("thread" or "process")
+    :type kind: str
+    :ivar max_workers: Number of the workers
+    :type max_workers: int
+    :ivar executor: The executor of the pool
+    :type executor: ThreadPoolExecutor | ProcessPoolExecutor
+    :ivar submitted: Number of the submitted calls
+    :type submitted: int
+    :ivar completed: Number of the completed calls
+    :type completed: int
+    :ivar errors: Number of the calls, that raised an exception
+    :type errors: int
+    :ivar run_time: Sum of the run time of the calls in seconds
+    :type run_time: float
+    :ivar max_run_time: Maximum run time of the call in seconds
+    :type max_run_time: float
+    :ivar wait_time: Sum of the time, that calls are waited for the free worker, in seconds
+    :type wait_time: float
+    """
+
+    def __init__(self, name: str, kind: str = 'thread', max_workers: int = 4):
+        """
+        :param name: Name of the pool
+        :type name: str
+        :param kind: Kind of the pool ("thread" or "process")
+        :type kind: str
+        :param max_workers: Number of the workers
+        :type max_workers: int
+        """
+
+        self.name, self.kind, self.max_workers = name, kind, max_workers
+
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix=f'EasyTl-{name}') \
+            if kind == 'thread' else \
+            ProcessPoolExecutor(max_workers)
+
+        self.submitted     = 0
+        self.completed     = 0
+        self.errors        = 0
+        self.run_time      = 0.0
+        self.max_run_time  = 0.0
+        self.wait_time     = 0.0
+
+        # metrics are updated by the done callbacks of the futures in the worker threads
+        self._metrics_lock = threading.Lock()
+
+    async def run(self, func, *args, **kwargs):
+        """Runs the function in the pool and waits for the result.
+        Functions for the process pools must be picklable (defined in the importable module)
+
+        :param func: Function to run
+        :param args: Positional arguments of the function
+        :param kwargs: Keyword arguments of the function
+
+        :returns: Result of the function
+        :raises Exception: Exception, raised by the function
+        """
+
+        submitted = time.time()
+
+        with self._metrics_lock:
+            self.submitted += 1
+
+        future = self.executor.submit(_timed_call, func, args, kwargs)
+
+        # the call is completed, when the future is done, even if the awaiting coroutine is cancelled earlier
+        # (the call, that is already running in the worker, isn't cancelled)
+        future.add_done_callback(lambda f: self._done(f, submitted))
+
+        error, result, _, _ = await asyncio.wrap_future(future)
+
+        if error:
+            raise result
+
+        return result
+
+    def _done(self, future: Future, submitted: float):
+        """(System method) Updates the metrics, when the call is done
+
+        :param future: Future of the call
+        :type future: Future
+        :param submitted: time() of the submitting
+        :type submitted: float
+        """
+
+        with self._metrics_lock:
+            self.completed += 1
+
+            if future.cancelled():
+                return
+
+            if future.exception() is not None:
+                self.errors += 1
+                return
+
+            error, _, started, run_time = future.result()
+
+            self.run_time += run_time
+            self.max_run_time = max(self.max_run_time, run_time)
+            self.wait_time += max(0.0, started - submitted)
+
+            if error:
+                self.errors += 1
+
+    def metrics(self) -> dict:
+        """Returns the metrics of the pool
+
+        :returns: Dict with the metrics
+        :rtype: dict
+        """
+
+        in_flight = self.submitted - self.completed
+        finished = self.completed if self.completed else 1
+
+        return {
+            'name': self.name,
+            'kind': self.kind,
+            'max_workers': self.max_workers,
+            'submitted': self.submitted,
+            'completed': self.completed,
+            'in_flight': in_flight,
+            'queue_depth': max(0, in_flight - self.max_workers),
+            'errors': self.errors,
+            'avg_run_time': self.run_time / finished,
+            'max_run_time': self.max_run_time,
+            'avg_wait_time': self.wait_time / finished
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Shutdowns the pool
+
+        :param wait: Wait for the running calls
+        :type wait: bool
+        """
+
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+
+class Executors:
+    """Creates and keeps the named executor pools
+
+    :ivar thread_workers: Default number of the workers in the thread pools
+    :type thread_workers: int
+    :ivar process_workers: Default number of the workers in the process pools
+    :type process_workers: int
+    :ivar sizes: Number of the workers of the concrete pools by its names
+    :type sizes: dict[str, int]
+    :ivar pools: Dict with the created pools by the (kind, name)
+    :type pools: dict[tuple[str, str], ExecutorPool]
+    :ivar logger: Logger of the executors
+    :type logger: logging.Logger
+    """
+
+    def __init__(self, thread_workers: int = 4, process_workers: int = 2, sizes: dict[str, int] | None = None):
+        """
+        :param thread_workers: Default number of the workers in the thread pools
+        :type thread_workers: int
+        :param process_workers: Default number of the workers in the process pools
+        :type process_workers: int
+        :param sizes: Number of the workers of the concrete pools by its names
+        :type sizes: dict[str, int] | None
+        """
+
+        self.thread_workers, self.process_workers = thread_workers, process_workers
+        self.sizes = dict(sizes) if sizes is not None else {}
+        self.pools = {}
+
+        self.logger = logging.getLogger('EasyTl : Executors')
+
+    def get(self, name: str = 'default', kind: str = 'thread') -> ExecutorPool:
+        """Gets the pool. If it isn't exists, creates it
+
+        :param name: Name of the pool
+        :type name: str
+        :param kind: Kind of the pool ("thread" or "process")
+        :type kind: str
+
+        :returns: The pool
+        :rtype: ExecutorPool
+        """
+
+        if (kind, name) not in self.pools:
+            max_workers = self.sizes.get(name, self.thread_workers if kind == 'thread' else self.process_workers)
+
+            self.logger.debug(f'Creating the {kind} pool "{name}" with {max_workers} workers')
+            self.pools[(kind, name)] = ExecutorPool(name, kind, max_workers)
+
+        return self.pools[(kind, name)]
+
+    def metrics(self) -> list[dict]:
+        """Returns the metrics of all the pools
+
+        :returns: List with the metrics of the pools
+        :rtype: list[dict]
+        """
+
+        return [p.metrics() for p in self.pools.values()]
+
+    def shutdown(self, wait: bool = False):
+        """Shutdowns all the pools
+
+        :param wait: Wait for the running calls
+        :type wait: bool
+        """
+
+        for p in self.pools.values():
+            p.shutdown(wait)
+
+        self.pools = {}
@@ -14,6 +14,10 @@ def get_string_hash(string: str | bytes) -> str:
     return hashlib.sha256(string.encode() if isinstance(string, str) else string).hexdigest()
 
 
+# size of the blocks, that are read to calculate the hash, if hashlib.file_digest() isn't available
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
 def get_file_hash(path: str | bytes) -> str:
     """Calculates the file hash
 
@@ -24,8 +28,11 @@ def get_file_hash(path: str | bytes) -> str:
     :rtype: str
     """
 
-    sha256_hash = hashlib.sha256()  # create the sha256 hash object
-    with open(path, "rb") as f:  # open file to be hashed
-        for byte_block in iter(lambda: f.read(4096), b""):  # read the file by the byte blocks
+    with open(path, 'rb') as f:  # open file to be hashed
+        if hasattr(hashlib, 'file_digest'):  # python 3.11+
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+
+        sha256_hash = hashlib.sha256()  # create the sha256 hash object
+        for byte_block in iter(lambda: f.read(HASH_BUFFER_SIZE), b''):  # read the file by the byte blocks
             sha256_hash.update(byte_block)  # update the sha256 hash object by the byte block
-    return sha256_hash.hexdigest()  # return hex digest of the hash
+        return sha256_hash.hexdigest()  # return hex digest of the hash
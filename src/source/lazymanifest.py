@@ -0,0 +1,143 @@
+import os
+import json
+import logging
+from .utils import log_exception
+from .manifest import FileManifest
+
+
+class LazyManifest:
+    """Persistent list of the exports of the plugins: commands, that are registered by the plugin,
+    and names, that are added by the plugin to the global namespace. Exports are recorded when the plugin is executed
+    and are valid while the plugin file (sha256 from the manifest) and the translations are not changed.
+    With them, the plugin can be activated on the first use instead of the startup
+
+    :ivar path: Path to the manifest file
+    :type path: str
+    :ivar manifest: Fingerprints of the files
+    :type manifest: FileManifest
+    :ivar entries: Dict with the "sha256", "translations", "commands" and "namespaces" by the plugin names
+    :type entries: dict[str, dict]
+    :ivar changed: Manifest is changed and must be saved
+    :type changed: bool
+    :ivar logger: Logger of the manifest
+    :type logger: logging.Logger
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: str, manifest: FileManifest):
+        """
+        :param path: Path to the manifest file
+        :type path: str
+        :param manifest: Fingerprints of the files
+        :type manifest: FileManifest
+        """
+
+        self.path = path
+        self.manifest = manifest
+        self.entries = {}
+        self.changed = False
+
+        self.logger = logging.getLogger('EasyTl : LazyManifest')
+
+        self.load()
+
+    def load(self):
+        """Loads the manifest file. Manifest is empty, if the file isn't exists or has the other version"""
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+
+            if data.get('version') == self.VERSION:
+                self.entries = data['plugins']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning('Can\'t load the lazy activation manifest. It will be created again')
+            log_exception(self.logger, e)
+
+    def save(self):
+        """Writes the manifest file, if it was changed"""
+
+        if not self.changed:
+            return
+
+        try:
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump({'version': self.VERSION, 'plugins': self.entries}, f)
+
+            os.replace(self.path + '.tmp', self.path)
+            self.changed = False
+        except Exception as e:
+            self.logger.warning('Can\'t write the lazy activation manifest')
+            log_exception(self.logger, e)
+
+    ####
+
+    def get(self, plugin_name: str, plugin_path: str, translations: str) -> dict | None:
+        """Returns the recorded exports of the plugin
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+        :param plugin_path: Path to the plugin file
+        :type plugin_path: str
+        :param translations: Fingerprint of the translations (see Translator.fingerprint())
+        :type translations: str
+
+        :returns: Dict with the "commands" and "namespaces" or None, if the exports are not recorded
+            or the plugin or translations are changed
+        :rtype: dict | None
+        """
+
+        entry = self.entries.get(plugin_name)
+
+        if entry is None or entry['translations'] != translations \
+                or entry['sha256'] != self.manifest.sha256(plugin_path):
+            return None
+
+        return entry
+
+    def record(self, plugin_name: str, plugin_path: str, translations: str, commands: list[dict],
+               namespaces: list[str]):
+        """Records the exports of the executed plugin
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+        :param plugin_path: Path to the plugin file
+        :type plugin_path: str
+        :param translations: Fingerprint of the translations
+        :type translations: str
+        :param commands: Dicts with the "aliases", "name", "pname", "queued" of the registered commands
+        :type commands: list[dict]
+        :param namespaces: Names, that were added to the global namespace
+        :type namespaces: list[str]
+        """
+
+        entry = {'sha256': self.manifest.sha256(plugin_path), 'translations': translations,
+                 'commands': commands, 'namespaces': namespaces}
+
+        if self.entries.get(plugin_name) != entry:
+            self.entries[plugin_name] = entry
+            self.changed = True
+
+    def remove(self, plugin_name: str):
+        """Removes the plugin from the manifest
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+        """
+
+        if self.entries.pop(plugin_name, None) is not None:
+            self.changed = True
+
+    def prune(self, plugin_names: list[str]):
+        """Removes the plugins, that are not in the given list, from the manifest
+
+        :param plugin_names: Names of the existing plugins
+        :type plugin_names: list[str]
+        """
+
+        for n in [n for n in self.entries if n not in plugin_names]:
+            del self.entries[n]
+            self.changed = True
@@ -0,0 +1,68 @@
+import queue
+import atexit
+import logging
+import logging.handlers
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler, that puts the records to the queue as is. Unlike the QueueHandler, the message isn't formatted
+    by the thread, that logs it, so the formatting (and the writing) is done by the listener thread only"""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """Returns the record without the formatting (records aren't pickled, queue is used in the same process)
+
+        :param record: The log record
+        :type record: logging.LogRecord
+
+        :returns: The same record
+        :rtype: logging.LogRecord
+        """
+
+        return record
+
+
+class QueuedLogging:
+    """Non-blocking logging pipeline. Loggers put the records to the queue by the DeferredQueueHandler,
+    the background thread of the QueueListener formats the records and passes them to the real handlers
+    (console, file). Queue is flushed at the exit of the interpreter
+
+    :ivar queue: Queue of the records
+    :type queue: queue.SimpleQueue
+    :ivar handler: Handler, that must be added to the root logger
+    :type handler: DeferredQueueHandler
+    :ivar listener: Listener, that passes the records to the handlers
+    :type listener: logging.handlers.QueueListener
+    """
+
+    def __init__(self, handlers: list[logging.Handler]):
+        """
+        :param handlers: Handlers, that write the records. Levels of the handlers are respected
+        :type handlers: list[logging.Handler]
+        """
+
+        self.queue = queue.SimpleQueue()
+        self.handler = DeferredQueueHandler(self.queue)
+        self.listener = logging.handlers.QueueListener(self.queue, *handlers, respect_handler_level=True)
+
+        self._started = False
+
+    def start(self):
+        """Starts the listener thread"""
+
+        if self._started:
+            return
+
+        self.listener.start()
+        self._started = True
+
+        # registered after the logging module, so it's called before the logging.shutdown()
+        atexit.register(self.stop)
+
+    def stop(self):
+        """Writes the queued records and stops the listener thread"""
+
+        if not self._started:
+            return
+
+        self._started = False
+        self.listener.stop()
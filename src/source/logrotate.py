@@ -0,0 +1,295 @@
+import os
+import re
+import gzip
+import time
+import shutil
+import asyncio
+import logging
+import logging.handlers
+import threading
+from .utils import log_exception
+
+# logs of the instance and the pip ("2024-01-01_12-00-log.txt", "pip-...-log.txt"), their rotated parts
+# ("...-log.1.txt") and the compressed files ("...-log.1.txt.gz", "...-log.1.2.txt.gz")
+LOG_FILE_PATTERN = re.compile(r'.+-log(\.\d+)*\.txt(\.gz)?')
+
+
+def gzip_file(path: str) -> str:
+    """Compresses the file to the gzip file near it and removes the original file. Modification time is kept,
+    so the age of the compressed file is the age of the logs in it
+
+    :param path: Path to the file
+    :type path: str
+
+    :returns: Path to the compressed file
+    :rtype: str
+    """
+
+    dest = path + '.gz'
+    n = 1
+
+    # file with the same name may be compressed earlier (for example, pip log of the same minute)
+    while os.path.exists(dest):
+        root, ext = os.path.splitext(path)
+        dest = f'{root}.{n}{ext}.gz'
+        n += 1
+
+    st = os.stat(path)
+
+    with open(path, 'rb') as src, gzip.open(dest + '.tmp', 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+
+    os.utime(dest + '.tmp', ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(dest + '.tmp', dest)
+    os.remove(path)
+
+    return dest
+
+
+class RotatingLogHandler(logging.handlers.BaseRotatingHandler):
+    """File handler, that rotates the file, when its size or age exceeds the limits. Rotated parts are renamed
+    to the "<name>.<part>.txt" and compressed by the background thread
+
+    :ivar max_bytes: Size of the file in the bytes, when it's rotated (0 - without limit)
+    :type max_bytes: int
+    :ivar max_age: Seconds since the file is opened, when it's rotated (0 - without limit)
+    :type max_age: float
+    :ivar compress: Compress the rotated parts
+    :type compress: bool
+    :ivar part: Number of the last rotated part
+    :type part: int
+    :ivar opened: time() of the file opening
+    :type opened: float
+    """
+
+    def __init__(self, filename: str, max_bytes: int = 0, max_age: float = 0, compress: bool = True,
+                 encoding: str = 'utf8'):
+        """
+        :param filename: Path to the log file
+        :type filename: str
+        :param max_bytes: Size of the file in the bytes, when it's rotated (0 - without limit)
+        :type max_bytes: int
+        :param max_age: Seconds since the file is opened, when it's rotated (0 - without limit)
+        :type max_age: float
+        :param compress: Compress the rotated parts
+        :type compress: bool
+        :param encoding: Encoding of the file
+        :type encoding: str
+        """
+
+        super().__init__(filename, 'a', encoding)
+
+        self.max_bytes, self.max_age, self.compress = max_bytes, max_age, compress
+        self.part = 0
+        self.opened = time.time()
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        """Checks if the file must be rotated before the record is written. Size is checked after the last write,
+        so the part may exceed the limit by the one record
+
+        :param record: The log record
+        :type record: logging.LogRecord
+
+        :returns: True, if the size or the age of the file exceeds the limit
+        :rtype: bool
+        """
+
+        if self.stream is None:
+            self.stream = self._open()
+
+        if self.max_age and time.time() - self.opened >= self.max_age:
+            return True
+
+        return bool(self.max_bytes) and self.stream.tell() >= self.max_bytes
+
+    def doRollover(self):
+        """Renames the file to the next part, opens the new file and compresses the part in the background"""
+
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        root, ext = os.path.splitext(self.baseFilename)
+
+        while True:
+            self.part += 1
+            dest = f'{root}.{self.part}{ext}'
+
+            if not os.path.exists(dest) and not os.path.exists(dest + '.gz'):
+                break
+
+        if os.path.exists(self.baseFilename):
+            os.replace(self.baseFilename, dest)
+
+            if self.compress:
+                threading.Thread(target=self._compress, args=(dest, ), daemon=True,
+                                 name='EasyTl log compressor').start()
+
+        self.stream = self._open()
+        self.opened = time.time()
+
+    @staticmethod
+    def _compress(path: str):
+        """(System method) Compresses the rotated part. Part, that isn't compressed (for example, the process
+        is exited), is compressed by the LogRetention later
+
+        :param path: Path to the part
+        :type path: str
+        """
+
+        try:
+            gzip_file(path)
+        except Exception as e:
+            logging.getLogger('EasyTl : LogRetention').warning(f'Can\'t compress the log {path}: {e}')
+
+
+class LogRetention:
+    """Keeps the logs directory in the disk budget: compresses the closed logs (previous starts, pip logs,
+    not compressed rotated parts), removes the logs older than the maximum age and then removes the oldest logs
+    until the directory fits the budget. Files of the active handlers and the other files (for example, JSON reports)
+    are never removed
+
+    :ivar logs_dir: Path to the directory with the logs
+    :type logs_dir: str
+    :ivar max_total_bytes: Disk budget of the directory in the bytes (0 - without limit)
+    :type max_total_bytes: int
+    :ivar max_age: Seconds since the last modification, when the log is removed (0 - without limit)
+    :type max_age: float
+    :ivar idle: Seconds since the last modification, when the log is considered closed and compressed
+    :type idle: float
+    :ivar active: Paths to the files, that are written by the handlers
+    :type active: set[str]
+    :ivar logger: Logger of the retention
+    :type logger: logging.Logger
+    """
+
+    def __init__(self, logs_dir: str, max_total_bytes: int = 0, max_age: float = 0, idle: float = 300,
+                 active: set[str] | None = None):
+        """
+        :param logs_dir: Path to the directory with the logs
+        :type logs_dir: str
+        :param max_total_bytes: Disk budget of the directory in the bytes (0 - without limit)
+        :type max_total_bytes: int
+        :param max_age: Seconds since the last modification, when the log is removed (0 - without limit)
+        :type max_age: float
+        :param idle: Seconds since the last modification, when the log is considered closed and compressed
+        :type idle: float
+        :param active: Paths to the files, that are written by the handlers
+        :type active: set[str] | None
+        """
+
+        self.logs_dir = logs_dir
+        self.max_total_bytes, self.max_age, self.idle = max_total_bytes, max_age, idle
+        self.active = {os.path.abspath(p) for p in active or ()}
+
+        self.logger = logging.getLogger('EasyTl : LogRetention')
+
+    def _scan(self) -> list[tuple[str, os.stat_result]]:
+        """(System method) Returns the files of the logs directory. Files, that are removed while the scan
+        (for example, rotated part is compressed by the handler), are skipped
+
+        :returns: Paths and stats of the files
+        :rtype: list[tuple[str, os.stat_result]]
+        """
+
+        files = []
+
+        with os.scandir(self.logs_dir) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        files.append((entry.path, entry.stat()))
+                except FileNotFoundError:
+                    pass
+
+        return files
+
+    def _closed(self, path: str, st: os.stat_result, now: float) -> bool:
+        """(System method) Checks if the file is the closed log: it isn't written by the handlers and the not
+        compressed log isn't changed for the idle time (for example, pip log of the running installation isn't closed)
+
+        :param path: Path to the file
+        :type path: str
+        :param st: Stat of the file
+        :type st: os.stat_result
+        :param now: Current time()
+        :type now: float
+
+        :returns: True, if the file may be compressed or removed
+        :rtype: bool
+        """
+
+        if LOG_FILE_PATTERN.fullmatch(os.path.basename(path)) is None or os.path.abspath(path) in self.active:
+            return False
+
+        return path.endswith('.gz') or now - st.st_mtime >= self.idle
+
+    def enforce(self) -> dict[str, int]:
+        """Compresses the closed logs and removes the old logs. Blocks, run it in the thread
+
+        :returns: Dict with the number of the "compressed" and "removed" files and the "bytes" of the directory
+        :rtype: dict[str, int]
+        """
+
+        now = time.time()
+        compressed = removed = 0
+
+        for path, st in self._scan():
+            if self._closed(path, st, now) and not path.endswith('.gz'):
+                try:
+                    gzip_file(path)
+                    compressed += 1
+                except FileNotFoundError:
+                    pass  # rotated part is compressed by the handler at the same time
+                except Exception as e:
+                    self.logger.warning(f'Can\'t compress the log {path}')
+                    log_exception(self.logger, e)
+
+        files = self._scan()
+        total = sum(st.st_size for _, st in files)
+
+        # oldest logs first
+        for path, st in sorted((f for f in files if self._closed(*f, now)), key=lambda f: f[1].st_mtime):
+            expired = self.max_age and now - st.st_mtime >= self.max_age
+
+            if not expired and (not self.max_total_bytes or total <= self.max_total_bytes):
+                break
+
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            except OSError as e:
+                self.logger.warning(f'Can\'t remove the log {path}')
+                log_exception(self.logger, e)
+                continue
+
+            total -= st.st_size
+            removed += 1
+
+        if compressed or removed:
+            self.logger.info(f'Logs: {compressed} compressed, {removed} removed, '
+                             f'{total / 1024 / 1024:.1f} MB in the logs directory')
+
+        if self.max_total_bytes and total > self.max_total_bytes:
+            self.logger.warning(f'Logs directory exceeds the budget ({total / 1024 / 1024:.1f} MB), '
+                                f'but the other files are active logs or aren\'t logs')
+
+        return {'compressed': compressed, 'removed': removed, 'bytes': total}
+
+    async def run(self, interval: float):
+        """Enforces the retention at the start and then periodically. Files are processed by the thread,
+        so the event loop isn't blocked
+
+        :param interval: Seconds between the checks
+        :type interval: float
+        """
+
+        while True:
+            try:
+                await asyncio.to_thread(self.enforce)
+            except Exception as e:
+                self.logger.warning('Can\'t enforce the logs retention')
+                log_exception(self.logger, e)
+
+            await asyncio.sleep(interval)
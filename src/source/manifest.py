@@ -0,0 +1,132 @@
+import os
+import json
+import logging
+from .utils import log_exception
+from .filehash import get_file_hash
+
+
+class FileManifest:
+    """Persistent fingerprints (size, mtime_ns and sha256) of the plugins and translations files.
+    Files are hashed again only if the size or mtime is changed
+
+    :ivar path: Path to the manifest file
+    :type path: str
+    :ivar files: Dict with the "size", "mtime_ns" and "sha256" by the absolute paths of the files
+    :type files: dict[str, dict]
+    :ivar changed: Manifest is changed and must be saved
+    :type changed: bool
+    :ivar hashed: Number of the files, that were hashed
+    :type hashed: int
+    :ivar logger: Logger of the manifest
+    :type logger: logging.Logger
+    """
+
+    VERSION = 1
+
+    def __init__(self, path: str):
+        """
+        :param path: Path to the manifest file
+        :type path: str
+        """
+
+        self.path = path
+        self.files = {}
+        self.changed = False
+        self.hashed = 0
+
+        self.logger = logging.getLogger('EasyTl : FileManifest')
+
+        self.load()
+
+    def load(self):
+        """Loads the manifest file. Manifest is empty, if the file isn't exists or has the other version"""
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+
+            if data.get('version') == self.VERSION:
+                self.files = data['files']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning('Can\'t load the files manifest. It will be created again')
+            log_exception(self.logger, e)
+
+    def save(self):
+        """Writes the manifest file, if it was changed"""
+
+        if not self.changed:
+            return
+
+        try:
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump({'version': self.VERSION, 'files': self.files}, f)
+
+            os.replace(self.path + '.tmp', self.path)
+            self.changed = False
+        except Exception as e:
+            self.logger.warning('Can\'t write the files manifest')
+            log_exception(self.logger, e)
+
+    ####
+
+    def fingerprint(self, path: str) -> dict:
+        """Returns the fingerprint of the file. File is hashed, if it's new or its size or mtime is changed
+
+        :param path: Path to the file
+        :type path: str
+
+        :returns: Dict with the "size", "mtime_ns" and "sha256"
+        :rtype: dict
+        :raises OSError: File can't be read
+        """
+
+        key = os.path.abspath(path)
+        stat = os.stat(path)
+        entry = self.files.get(key)
+
+        if entry is not None and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry
+
+        self.hashed += 1
+        self.files[key] = entry = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': get_file_hash(path)}
+        self.changed = True
+
+        return entry
+
+    def sha256(self, path: str) -> str:
+        """Returns the sha256 hash of the file
+
+        :param path: Path to the file
+        :type path: str
+
+        :returns: Hex digest of the hash
+        :rtype: str
+        """
+
+        return self.fingerprint(path)['sha256']
+
+    def is_changed(self, path: str, sha256: str) -> bool:
+        """Checks if the file is changed from the known hash (or isn't exists)
+
+        :param path: Path to the file
+        :type path: str
+        :param sha256: Known hash of the file
+        :type sha256: str
+
+        :returns: True, if the file has the other hash or isn't exists
+        :rtype: bool
+        """
+
+        try:
+            return self.sha256(path) != sha256
+        except FileNotFoundError:
+            return True
+
+    def prune(self):
+        """Removes the files, that are not exist anymore, from the manifest"""
+
+        for key in [k for k in self.files if not os.path.exists(k)]:
+            del self.files[key]
+            self.changed = True
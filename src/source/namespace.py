@@ -1,3 +1,11 @@
+import threading
+import dataclasses
+
+# creates the lazy values of all the namespaces. Reentrant, because the factory may use the other lazy values.
+# Also taken by the activation of the deferred plugins (their factories activate them), so the locks can't be
+# taken in the different order by the different threads
+lazy_lock = threading.RLock()
+
 
 class Namespace:
     """Object, that replaces dict with the sample namespace
@@ -8,11 +16,147 @@ class Namespace:
 
     def __init__(self, init_dict: dict | None = None):
         if init_dict is not None:
-            for k, v in init_dict.items():
-                setattr(self, k, v)
+            self.__dict__.update(init_dict)
+
+    def __contains__(self, name: str) -> bool:
+        """Checks if the value is set in the namespace (instead of the slow `name in dir(namespace)`)
+
+        :param name: Name of the value
+        :type name: str
+
+        :returns: True, if the value is set (or will be created on the first use)
+        :rtype: bool
+        """
+
+        return name in self.__dict__ or name in self.__dict__.get('__lazy__', ())
+
+    def __getattr__(self, name: str):
+        # called only if the value isn't set. Creates the lazy value
+        lazy = self.__dict__.get('__lazy__')
+
+        if lazy is None or name not in lazy:
+            raise AttributeError(f'Namespace has no value "{name}"')
+
+        with lazy_lock:
+            # value may be created by the other thread, while this thread waited for the lock
+            if name in self.__dict__:
+                return self.__dict__[name]
+
+            if name not in lazy:
+                raise AttributeError(f'Namespace has no value "{name}"')
+
+            # factory is removed only after it returns, so the factory, that raised, is called again on the next use
+            value = lazy[name]()
+            lazy.pop(name, None)
+
+            # factory may set the value itself (for example, when it activates the plugin)
+            if name not in self.__dict__:
+                self.__dict__[name] = value
+
+            return self.__dict__[name]
+
+    def get(self, name: str, default=None):
+        """Gets the value from the namespace
+
+        :param name: Name of the value
+        :type name: str
+        :param default: Value to return, if the value isn't set
+        :type default: Any
+
+        :returns: The value or the default
+        """
+
+        if name in self.__dict__:
+            return self.__dict__[name]
+
+        return getattr(self, name, default)
+
+    def set_lazy(self, name: str, factory):
+        """Sets the value, that is created by the factory on the first use
+
+        :param name: Name of the value
+        :type name: str
+        :param factory: Function without arguments, that returns the value
+        :type factory: () -> Any
+        """
+
+        with lazy_lock:
+            self.__dict__.pop(name, None)
+            self.__dict__.setdefault('__lazy__', {})[name] = factory
+
+    def discard_lazy(self, name: str):
+        """Removes the not created lazy value
+
+        :param name: Name of the value
+        :type name: str
+        """
+
+        with lazy_lock:
+            self.__dict__.get('__lazy__', {}).pop(name, None)
 
     def __str__(self):
         return self.__repr__()
 
     def __repr__(self):
-        return f'Namespace({" ".join([f"{attr}={getattr(self, attr)}" for attr in dir(self) if not attr.startswith("__")])})'
+        return f'Namespace({" ".join([f"{attr}={value}" for attr, value in self.__dict__.items() if not attr.startswith("__")])})'
+
+
+class SlottedNamespace:
+    """Base class of the namespaces with the fixed set of the values (fields), that are stored in the slots.
+    Used for the hot objects, that are created often (for example, parsed arguments of the commands).
+    Classes are generated by the make_slotted_namespace()
+
+    :ivar _fields: Names of the fields
+    :type _fields: tuple[str, ...]
+    """
+
+    __slots__ = ()
+    _fields = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._fields = tuple(dict.fromkeys(
+            f for c in reversed(cls.__mro__) for f in c.__dict__.get('__slots__', ())
+        ))
+
+    def __contains__(self, name: str) -> bool:
+        """Checks if the value is set in the namespace
+
+        :param name: Name of the value
+        :type name: str
+
+        :returns: True, if the value is set
+        :rtype: bool
+        """
+
+        return name in self._fields and hasattr(self, name)
+
+    def get(self, name: str, default=None):
+        """Gets the value from the namespace
+
+        :param name: Name of the value
+        :type name: str
+        :param default: Value to return, if the value isn't set
+        :type default: Any
+
+        :returns: The value or the default
+        """
+
+        return getattr(self, name, default) if name in self._fields else default
+
+
+def make_slotted_namespace(name: str, fields: list[tuple], frozen: bool = False) -> type:
+    """Generates the SlottedNamespace class with the given fields
+
+    :param name: Name of the class
+    :type name: str
+    :param fields: Fields in the dataclasses.make_dataclass() format: name, (name, type) or (name, type, field)
+    :type fields: list[tuple]
+    :param frozen: Forbid the changing of the values after the creation
+    :type frozen: bool
+
+    :returns: The generated class
+    :rtype: type
+    """
+
+    return dataclasses.make_dataclass(name, fields, bases=(SlottedNamespace,), eq=False, frozen=frozen, slots=True)
@@ -0,0 +1,323 @@
+import time
+import asyncio
+import logging
+from collections import deque
+from telethon.errors import FloodWaitError
+from .utils import log_exception
+
+
+class TokenBucket:
+    """Rate limiter by the token bucket algorithm
+
+    :ivar rate: Number of the tokens, that are added per second
+    :type rate: float
+    :ivar capacity: Maximum number of the tokens (burst)
+    :type capacity: float
+    :ivar tokens: Current number of the tokens
+    :type tokens: float
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        :param rate: Number of the tokens, that are added per second
+        :type rate: float
+        :param capacity: Maximum number of the tokens (burst)
+        :type capacity: float
+        """
+
+        self.rate, self.capacity = rate, capacity
+        self.tokens = capacity
+
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        """(System method) Adds the tokens for the elapsed time"""
+
+        now = time.monotonic()
+
+        if now > self._updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def delay(self) -> float:
+        """Returns the seconds until the token is available
+
+        :returns: Seconds to wait, 0 if token is available now
+        :rtype: float
+        """
+
+        self._refill()
+
+        if self._updated > time.monotonic():  # bucket is paused
+            return self._updated - time.monotonic() + max(0.0, 1 - self.tokens) / self.rate
+
+        return max(0.0, 1 - self.tokens) / self.rate
+
+    def consume(self):
+        """Takes one token from the bucket"""
+        self.tokens -= 1
+
+    def pause(self, seconds: float):
+        """Empties the bucket and stops adding the tokens for the given time
+
+        :param seconds: Seconds to pause
+        :type seconds: float
+        """
+
+        self.tokens = 0
+        self._updated = max(self._updated, time.monotonic() + seconds)
+
+
+class OutboundQueue:
+    """Queue of the outgoing messages. Sends the messages with the rate limits per chat and globally,
+    waits on the FloodWaitError and merges the queued text messages to the same chat into one message
+
+    :ivar client: Telethon's TelegramClient
+    :type client: TelegramClient
+    :ivar global_bucket: Global rate limiter
+    :type global_bucket: TokenBucket
+    :ivar chat_rate: Number of the messages per second to the one chat
+    :type chat_rate: float
+    :ivar chat_burst: Number of the messages, that can be sent to the one chat without waiting
+    :type chat_burst: float
+    :ivar max_merge_length: Maximum length of the merged message
+    :type max_merge_length: int
+    :ivar flood_retries: Number of the retries on the FloodWaitError
+    :type flood_retries: int
+    :ivar max_flood_wait: Maximum seconds to wait on the FloodWaitError, if server requires more - error is raised
+    :type max_flood_wait: int
+    :ivar counters: Dict with the counters of the queue
+    :type counters: dict[str, int | float]
+    :ivar logger: Logger of the queue
+    :type logger: logging.Logger
+    """
+
+    def __init__(self,
+                 client,
+                 global_rate: float = 25,
+                 global_burst: float = 30,
+                 chat_rate: float = 1,
+                 chat_burst: float = 5,
+                 max_merge_length: int = 4096,
+                 flood_retries: int = 3,
+                 max_flood_wait: int = 300):
+        """
+        :param client: Telethon's TelegramClient
+        :type client: TelegramClient
+        :param global_rate: Number of the messages per second to all the chats
+        :type global_rate: float
+        :param global_burst: Number of the messages, that can be sent without waiting
+        :type global_burst: float
+        :param chat_rate: Number of the messages per second to the one chat
+        :type chat_rate: float
+        :param chat_burst: Number of the messages, that can be sent to the one chat without waiting
+        :type chat_burst: float
+        :param max_merge_length: Maximum length of the merged message
+        :type max_merge_length: int
+        :param flood_retries: Number of the retries on the FloodWaitError
+        :type flood_retries: int
+        :param max_flood_wait: Maximum seconds to wait on the FloodWaitError
+        :type max_flood_wait: int
+        """
+
+        self.client = client
+        self.global_bucket = TokenBucket(global_rate, global_burst)
+        self.chat_rate, self.chat_burst = chat_rate, chat_burst
+        self.max_merge_length = max_merge_length
+        self.flood_retries, self.max_flood_wait = flood_retries, max_flood_wait
+
+        self.counters = {
+            'messages': 0,       # messages, that are passed to the queue
+            'requests': 0,       # requests, that are sent to the Telegram
+            'merged': 0,         # messages, that are merged to the other messages
+            'flood_waits': 0,    # received FloodWaitError
+            'errors': 0,         # requests, that are failed
+            'queue_depth': 0,    # messages in the queue now
+            'max_queue_depth': 0,
+            'latency_sum': 0.0,  # seconds from the queueing to the sending
+            'latency_max': 0.0
+        }
+
+        self._chats = {}
+        self._buckets = {}
+        self._workers = {}
+
+        self.logger = logging.getLogger('EasyTl : OutboundQueue')
+
+    async def send_message(self, chat_id: int, message: str):
+        """Queues the text message and waits until it sent
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        :param message: Text of the message
+        :type message: str
+
+        :returns: Telethon's Message, that was sent (may contain other merged messages)
+        """
+
+        return await self._put(chat_id, 'text', message)
+
+    async def send_file(self, chat_id: int, file, **kwargs):
+        """Queues the file and waits until it sent
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        :param file: File to send (see TelegramClient.send_file())
+        :param kwargs: Other arguments of the TelegramClient.send_file()
+
+        :returns: Telethon's Message, that was sent
+        """
+
+        return await self._put(chat_id, 'file', (file, kwargs))
+
+    def stats(self) -> dict[str, int | float]:
+        """Returns the counters of the queue with the average latency
+
+        :returns: Dict with the counters
+        :rtype: dict[str, int | float]
+        """
+
+        sent = self.counters['messages'] - self.counters['queue_depth']
+        return self.counters | {'latency_avg': self.counters['latency_sum'] / sent if sent else 0.0}
+
+    ####
+
+    async def _put(self, chat_id: int, kind: str, payload):
+        """(System method) Adds the item to the chat queue and waits for its result
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        :param kind: Kind of the item ("text" or "file")
+        :type kind: str
+        :param payload: Text of the message or tuple with file and arguments
+
+        :returns: Telethon's Message
+        """
+
+        future = asyncio.get_running_loop().create_future()
+        self._chats.setdefault(chat_id, deque()).append((kind, payload, future, time.monotonic()))
+
+        self.counters['messages'] += 1
+        self.counters['queue_depth'] += 1
+        self.counters['max_queue_depth'] = max(self.counters['max_queue_depth'], self.counters['queue_depth'])
+
+        # start the worker of the chat, if it isn't running
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._chat_worker(chat_id))
+
+        return await future
+
+    async def _acquire(self, chat_id: int):
+        """(System method) Waits for the tokens of the chat and global buckets
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        """
+
+        if chat_id not in self._buckets:
+            self._buckets[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        chat_bucket = self._buckets[chat_id]
+
+        while (d := max(self.global_bucket.delay(), chat_bucket.delay())) > 0:
+            await asyncio.sleep(d)
+
+        self.global_bucket.consume()
+        chat_bucket.consume()
+
+    def _take(self, queue: deque) -> list[tuple]:
+        """(System method) Takes the next item from the queue, merging the following text messages into it
+
+        :param queue: Queue of the chat
+        :type queue: deque
+
+        :returns: List with the taken items
+        :rtype: list[tuple]
+        """
+
+        items = [queue.popleft()]
+
+        if items[0][0] == 'text':
+            length = len(items[0][1])
+
+            while queue and queue[0][0] == 'text' and length + 2 + len(queue[0][1]) <= self.max_merge_length:
+                length += 2 + len(queue[0][1])
+                items.append(queue.popleft())
+
+        return items
+
+    async def _request(self, chat_id: int, items: list[tuple]):
+        """(System method) Sends the items to the Telegram, retrying on the FloodWaitError
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        :param items: Items to send
+        :type items: list[tuple]
+
+        :returns: Telethon's Message
+        """
+
+        kind, payload = items[0][0], items[0][1]
+
+        for attempt in range(self.flood_retries + 1):
+            await self._acquire(chat_id)
+            self.counters['requests'] += 1
+
+            try:
+                if kind == 'text':
+                    return await self.client.send_message(chat_id, '\n\n'.join(i[1] for i in items))
+
+                return await self.client.send_file(chat_id, payload[0], **payload[1])
+
+            except FloodWaitError as e:
+                self.counters['flood_waits'] += 1
+
+                if attempt == self.flood_retries or e.seconds > self.max_flood_wait:
+                    raise
+
+                self.logger.info(f'FloodWaitError in the CHAT_ID: {chat_id}. Waiting {e.seconds} seconds')
+                self._buckets[chat_id].pause(e.seconds)
+
+    async def _chat_worker(self, chat_id: int):
+        """(System method) Sends the queued items of the chat one by one
+
+        :param chat_id: Id of the chat
+        :type chat_id: int
+        """
+
+        queue = self._chats[chat_id]
+
+        try:
+            while queue:
+                items = self._take(queue)
+                self.counters['queue_depth'] -= len(items)
+
+                # skip the items, that are not awaited anymore
+                items = [i for i in items if not i[2].done()]
+
+                if not items:
+                    continue
+
+                self.counters['merged'] += len(items) - 1
+
+                try:
+                    result = await self._request(chat_id, items)
+                except Exception as e:
+                    log_exception(self.logger, e)
+                    self.counters['errors'] += 1
+
+                    for i in items:
+                        if not i[2].done():
+                            i[2].set_exception(e)
+                    continue
+
+                now = time.monotonic()
+                for i in items:
+                    self.counters['latency_sum'] += (latency := now - i[3])
+                    self.counters['latency_max'] = max(self.counters['latency_max'], latency)
+
+                    if not i[2].done():
+                        i[2].set_result(result)
+        finally:
+            del self._workers[chat_id]
+            if not queue:
+                del self._chats[chat_id]
@@ -1,16 +1,18 @@
 import os
 import sys
-import requests
 import subprocess
 import logging
 import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
 
-from .namespace import Namespace
+from .namespace import Namespace, lazy_lock
 from .argumentparser import ArgumentParser
-from .utils import VersionCheckOperation, check_version_compatibility, parse_plugin_information, log_exception, \
-    install_requirements
-from .exceptions import PluginExitedError, IncorrectCommandAliasesError
-from .filehash import get_file_hash, get_string_hash
+from .utils import VersionCheckOperation, check_version_compatibility, read_plugin_information, log_exception, \
+    install_requirements, toml_loads
+from .exceptions import PluginExitedError, PluginRequiresError, IncorrectCommandAliasesError
+from .filehash import get_string_hash, get_file_hash
+from .updater import UpdateResult
 
 required_info_lines = {'description', 'required_platforms', 'required_plugins',
                        'etl_version_min', 'etl_version_max', 'version', 'update_link',
@@ -36,6 +38,14 @@ class Plugin:
     :type logger: logging.Logger
     :ivar activation_steps: Contains the tuples with the FUNCTION and LOG DESCRIPTION
     :type activation_steps: list[tuple[() -> None, str]]
+    :ivar update_result: Result of the update check, None if the plugin wasn't checked
+    :type update_result: UpdateResult | None
+    :ivar deferred: Plugin isn't executed yet, it will be executed on the first use (see PluginsList.defer())
+    :type deferred: bool
+    :ivar exports: Registered commands and names, that were added to the global namespace by the execution
+    :type exports: dict | None
+    :ivar unload_callbacks: Functions, that are called when the plugin is unloaded (see Plugin.on_unload())
+    :type unload_callbacks: list[() -> None]
     """
 
     def __init__(self, plugin_name: str, plugin_path: str):
@@ -54,6 +64,10 @@ class Plugin:
         self.info = None
 
         self.errored = False
+        self.update_result = None
+        self.deferred = False
+        self.exports = None
+        self.unload_callbacks = []
         self.logger = logging.getLogger(f'EasyTl : Plugin {self.plugin_name}')
 
         self.activation_steps = [
@@ -73,13 +87,49 @@ class Plugin:
         if self.errored or self.active:
             return
 
-        for step in self.activation_steps:
+        self.run_steps(self.activation_steps)
+
+    def run_steps(self, steps: list[tuple]) -> bool:
+        """Calls the given activation steps until the error
+
+        :param steps: Activation steps (part of the Plugin.activation_steps)
+        :type steps: list[tuple[() -> None, str]]
+
+        :returns: False, if the plugin is errored
+        :rtype: bool
+        """
+
+        if self.errored or self.active:
+            return not self.errored
+
+        profiler = self.namespace.get('profiler') if self.namespace is not None else None
+
+        for step in steps:
             self.logger.debug('activate() : ' + step[1])
-            step[0]()
+
+            if profiler is not None and profiler.enabled:
+                with profiler.step(self.plugin_name, step[0].__name__):
+                    step[0]()
+            else:
+                step[0]()
 
             if self.errored:
                 self.logger.debug('activate() : Error detected, exit from activation_steps cycle')
-                return
+                return False
+
+        return True
+
+    def dependencies(self) -> list[str]:
+        """Returns the names of the plugins from the "required_plugins" info line
+
+        :returns: List with the names of the required plugins
+        :rtype: list[str]
+        """
+
+        if self.info is None or not isinstance(self.info.get('required_plugins'), list):
+            return []
+
+        return [rp if isinstance(rp, str) else rp[0] for rp in self.info['required_plugins']]
 
     def do_update_only(self):
         """Updates the plugin. Calls all steps without last"""
@@ -106,10 +156,9 @@ class Plugin:
     def parse_info_v2(self):
         """Parses the information about the plugin"""
 
-        with open(self.plugin_path) as f:
-            lines = f.read().splitlines()
-
-        is_v2, info = parse_plugin_information(lines)
+        # info of the unchanged plugins is taken from the index
+        is_v2, info = self.namespace.plugin_index.get_info(self.plugin_path) \
+            if self.namespace.get('plugin_index') is not None else read_plugin_information(self.plugin_path)
 
         if not is_v2:
             self.logger.error('parse_info_v2() : Error! Plugin is using the old v1 format of the info lines')
@@ -123,45 +172,122 @@ class Plugin:
             self.logger.error('parse_info_v2() : Plugin is passed required info lines: ' + ' '.join(list(missing)))
             self.errored = True
 
+    def language_links(self, all_languages: bool = False) -> list[tuple[str, str, str | None]]:
+        """Returns the translations files from the "lang_links" info line. Link may have the third element
+        with the sha256 hash of the file: [ "name_en.toml", "link", "sha256" ]
+
+        :param all_languages: Return the files of all the languages. By default, only the files of the current,
+            fallback and selected (see Translator.used_languages()) languages are returned
+        :type all_languages: bool
+
+        :returns: List with the file name, link and sha256 (or None) of the files
+        :rtype: list[tuple[str, str, str | None]]
+        """
+
+        if self.info is None or not isinstance(self.info.get('lang_links'), list):
+            return []
+
+        # files of the default, fallback and selected by the chats languages
+        suffixes = tuple(f'_{lang}.toml' for lang in self.namespace.translator.used_languages())
+
+        return [(ll[0], ll[1], ll[2] if len(ll) > 2 else None) for ll in self.info['lang_links']
+                if all_languages or ll[0].endswith(suffixes)]
+
+    def apply_language(self, file_name: str, sha256: str | None, result: UpdateResult) -> bool:
+        """Validates the downloaded translations file and writes it, if it's changed
+
+        :param file_name: Name of the translations file
+        :type file_name: str
+        :param sha256: Expected sha256 hash of the file, None if it isn't set
+        :type sha256: str | None
+        :param result: Result of the PluginUpdater.fetch()
+        :type result: UpdateResult
+
+        :returns: False, if the file can't be downloaded or isn't valid
+        :rtype: bool
+        """
+
+        path = os.path.join(self.namespace.translator.lang_dir, file_name)
+        manifest = self.namespace.get('manifest')
+
+        def local_hash():
+            return manifest.sha256(path) if manifest is not None else get_file_hash(path)
+
+        if result.status == 'not_modified':
+            self.logger.debug(f'apply_language() : {file_name} is not modified')
+            digest = local_hash() if sha256 is not None and os.path.exists(path) else sha256
+        elif result.content is None:
+            self.logger.warning(f'Can\'t download the language {file_name}: {result.error}')
+            return False
+        else:
+            digest = get_string_hash(result.content)
+
+        if sha256 is not None and digest != sha256.lower():
+            self.logger.warning(f'Checksum of the language {file_name} doesn\'t match')
+            result.status, result.error = 'error', 'checksum mismatch'
+            return False
+
+        if result.status == 'not_modified':
+            return True
+
+        # response must be the translations file (not the error page)
+        try:
+            toml_loads(result.content.decode('utf-8'))
+        except Exception as e:
+            self.logger.warning(f'Language {file_name} isn\'t valid TOML file')
+            log_exception(self.logger, e)
+            result.status, result.error = 'error', 'invalid TOML'
+            return False
+
+        if os.path.exists(path) and local_hash() == digest:
+            self.logger.debug(f'apply_language() : {file_name} is unchanged')
+        else:
+            self.logger.debug(f'apply_language() : Writing the language {file_name}')
+
+            with open(path + '.tmp', 'wb') as f:
+                f.write(result.content)
+            os.replace(path + '.tmp', path)
+
+            result.status = 'updated'
+
+            # file of the current language (or of its fallback language) is loaded at once
+            translator = self.namespace.translator
+            head, file_lang = file_name[:-5].rpartition('_')[::2]
+
+            if file_lang == translator.lang or (file_lang in translator.chain(translator.lang)
+                                                and head in self.namespace.translations):
+                translator.load_file(path)
+            self.namespace.translator.forget_locales()
+
+        self.namespace.updater.commit(result)
+        return True
+
     def download_languages(self):
-        """Does check for the plugin languages files and download it"""
+        """Downloads the translations files of the plugin concurrently (see Plugin.language_links())"""
 
-        languages_link = self.info['lang_links']
+        plugins = self.namespace.get('plugins')
+        links = self.language_links(plugins.all_languages if plugins is not None else False)
 
-        if languages_link == "no link":
+        if not links:
             self.logger.debug('download_languages() : No links to the languages')
             return
 
         try:
-            self.logger.debug('download_languages() : Try to download the languages')
+            self.logger.debug('download_languages() : Downloading the languages: ' + ', '.join(l[0] for l in links))
 
-            # check for update link and save the remote file hash
-            for ll in languages_link:
-                lname = ll[0]
-                llink = ll[1]
-                self.logger.debug(f'download_languages() : Downloading the language "{lname}" ({llink})')
+            # missing files are downloaded without the conditional headers
+            for n, _, _ in links:
+                if not os.path.exists(os.path.join(self.namespace.translator.lang_dir, n)):
+                    self.namespace.updater.forget('lang-' + n)
 
-                # get request
-                r = requests.get(llink)
+            results = self.namespace.updater.fetch_all({'lang-' + n: link for n, link, _ in links})
 
-                # check for the status code
-                if not r.status_code != 200:
-                    self.logger.debug('download_languages() : Request returned non 200 code')
-
-                    self.namespace.notify_stack.append(
-                        self.namespace.translations['core']['error_notify'].format(
-                            self.namespace.translations['core']['pluginapi']['send_request_error'].format(
-                                self.plugin_name)
-                        )
-                    )
-                    self.errored = True
-                    return
-
-                with open(os.path.join(self.namespace.instance.translator.lang_dir, lname), 'wb') as f:
-                    f.write(r.content)
+            for n, _, sha256 in links:
+                if not self.apply_language(n, sha256, results['lang-' + n]):
+                    raise RuntimeError(f'Language {n} can\'t be downloaded')
 
         except Exception as e:
-            self.log_exception(e)
+            log_exception(self.logger, e)
 
             # write notify about the error
             self.namespace.notify_stack.append(
@@ -205,128 +331,139 @@ class Plugin:
 
     ####
 
-    def check_for_updates(self):
-        """Does check for the plugin updates"""
+    def prepare_update(self) -> str | None:
+        """Parses the info lines of the plugin before the update check
+
+        :returns: Update link of the plugin, None if the plugin can't be updated
+        :rtype: str | None
+        """
 
-        if 'enable_plugins_auto_update' not in dir(self.namespace) \
-                or not getattr(self.namespace, 'enable_plugins_auto_update', False):
-            self.logger.debug('check_for_updates() : Auto-updates is disabled. Parse info lines')
+        self.update_result = UpdateResult(self.plugin_name, status='disabled')
+
+        if not self.namespace.get('enable_plugins_auto_update', False):
+            self.logger.debug('prepare_update() : Auto-updates is disabled. Parse info lines')
             self.parse_info_v2()
             return
 
-        hash_path = os.path.join(self.namespace.instance.cache_dir, self.plugin_name + '.hash')
+        self.logger.debug('prepare_update() : Parsing the info lines of the plugin')
+        self.parse_info_v2()
 
-        self.logger.debug('check_for_updates() : Check for the existing of hash cache of the plugin')
+        if self.errored:
+            self.logger.debug('prepare_update() : Error detected')
+            self.update_result.status = 'error'
+            return
 
-        # check for the hash file
-        if not os.path.exists(hash_path):
-            # write the sha256 hash of the file in the cache
-            with open(hash_path, 'w') as f:
-                f.write((fhash := get_file_hash(self.plugin_path)))
+        update_link = self.info['update_link']
 
-        else:
-            # read the already cached file hash
-            with open(hash_path) as f:
-                fhash = f.read()
+        if update_link == 'no link':
+            self.logger.debug('prepare_update() : Link not setup. Skip the updating')
+            self.update_result.status = 'no_link'
+            return
 
-        self.logger.debug('check_for_updates() : Parsing the info lines of the plugin')
-        self.parse_info_v2()
+        return update_link
 
-        if self.errored:
-            self.logger.debug('check_for_updates() : Error detected')
-            return
+    def apply_update(self, result: UpdateResult, languages: bool = True):
+        """Applies the result of the update check: replaces the plugin file, if the remote file hash differs
 
-        try:
-            self.logger.debug('check_for_updates() : Try to update the plugin')
-
-            update_link = self.info['update_link']
-
-            # check for update link and save the remote file hash
-            if update_link != 'no link':
-                self.logger.debug(f'Link found ({update_link}). Sending request')
-                try:
-                    r = requests.get(update_link)
-
-                    # check for the success
-                    if r.status_code != 200:
-                        self.logger.debug('Update request returned non 200 code')
-                        rhash = fhash
-                    else:
-                        rhash = get_string_hash(r.content)
-                except Exception as e:
-                    log_exception(self.logger, e)
-
-                    self.logger.info('check_for_updates() : Can\'t connect to the update link. Skip the update')
-                    rhash = fhash
-            else:
-                self.logger.debug('Link not setup. Skip the updating')
-                rhash = fhash  # write remote hash as local file hash to skip the update
+        :param result: Result of the PluginUpdater.fetch()
+        :type result: UpdateResult
+        :param languages: Download the languages of the updated plugin. If False, they are downloaded
+            by the PluginsList.download_languages() with the languages of the other plugins
+        :type languages: bool
+        """
 
-        except Exception as e:
-            log_exception(self.logger, e)
+        self.update_result = result
 
-            # write notify about the error
-            self.namespace.notify_stack.append(
-                self.namespace.translations['core']['error_notify'].format(
-                    self.namespace.translations['core']['pluginapi']['send_request_error'].format(self.plugin_name)
-                )
-            )
-            self.errored = True
+        if result.content is None:
+            if result.status == 'failed':
+                self.logger.info(f'apply_update() : Can\'t connect to the update link ({result.error}). '
+                                 f'Skip the update')
+            else:
+                self.logger.debug('apply_update() : Plugin is not modified')
             return
 
-        # compare the local file hash with the remote file hash
-        if fhash != rhash:
-            self.logger.debug('check_for_updates() : Hash isn\'t equals. Updating the plugin')
-            self.logger.debug('check_for_updates() : Writing new content to the plugin file')
+        # compare the local file hash (file is hashed again, if it was edited) with the remote file hash
+        if self.namespace.manifest.sha256(self.plugin_path) == get_string_hash(result.content):
+            self.logger.debug('apply_update() : No updates')
+            self.namespace.updater.commit(result)
+            return
 
-            # replace a local plugin with the remote plugin code
-            with open(self.plugin_path, 'wb') as f:
-                f.write(r.content)
+        self.logger.debug('apply_update() : Hash isn\'t equals. Updating the plugin')
+        self.logger.debug('apply_update() : Writing new content to the plugin file')
 
-            # Parse info lines
-            self.logger.debug('check_for_updates() : Parsing new information about the plugin')
-            self.parse_info_v2()
+        # replace a local plugin with the remote plugin code
+        with open(self.plugin_path, 'wb') as f:
+            f.write(result.content)
 
-            # check for the error
-            if self.errored:
-                self.logger.debug('check_for_updates() : Error detected')
-                return
+        # Parse info lines
+        self.logger.debug('apply_update() : Parsing new information about the plugin')
+        self.parse_info_v2()
 
-            self.logger.debug('check_for_updates() : Downloading the languages for the plugin')
+        # check for the error
+        if self.errored:
+            self.logger.debug('apply_update() : Error detected')
+            result.status = 'error'
+            return
+
+        if languages:
+            self.logger.debug('apply_update() : Downloading the languages for the plugin')
             self.download_languages()
 
             # check for the error
             if self.errored:
-                self.logger.debug('check_for_updates() : Error detected')
+                self.logger.debug('apply_update() : Error detected')
+                result.status = 'error'
                 return
 
-            self.logger.debug('check_for_updates() : Add notifies about the update')
+        result.status = 'updated'
+        self.logger.debug('apply_update() : Add notifies about the update')
 
-            try:
-                # write notify about the update of plugin
+        try:
+            # write notify about the update of plugin
+            self.namespace.notify_stack.append(
+                self.namespace.translations['core']['pluginapi']['update_notify'].format(self.plugin_name)
+            )
+
+            # check for the changelog info line and add it to the notify stack
+            if 'changelog' in self.info:
                 self.namespace.notify_stack.append(
-                    self.namespace.translations['core']['pluginapi']['update_notify'].format(self.plugin_name)
+                    self.namespace.translations['core']['pluginapi']['changelog_notify'].format(
+                        self.info['version'], '\n— '.join(self.info['changelog'])
+                    )
                 )
+        except Exception as e:
+            self.logger.warning('Can\'t write a notify about the update')
 
-                # check for the changelog info line and add it to the notify stack
-                if 'changelog' in self.info:
-                    self.namespace.notify_stack.append(
-                        self.namespace.translations['core']['pluginapi']['changelog_notify'].format(
-                            self.info['version'], '\n— '.join(self.info['changelog'])
-                        )
-                    )
-            except Exception as e:
-                self.logger.warning('Can\'t write a notify about the update')
+            log_exception(self.logger, e)
 
-                log_exception(self.logger, e)
+        self.namespace.updater.commit(result)
 
-            # Write new hash
-            with open(hash_path, 'w') as f:
-                f.write(get_file_hash(self.plugin_path))
+    def check_for_updates(self):
+        """Does check for the plugin updates. Skipped, if the plugin was already checked by the
+        PluginsList.check_updates()"""
 
+        if self.update_result is not None:
+            self.logger.debug('check_for_updates() : Already checked')
             return
 
-        self.logger.debug('check_for_updates() : No updates')
+        update_link = self.prepare_update()
+
+        if update_link is None or self.errored:
+            return
+
+        try:
+            self.apply_update(self.namespace.updater.fetch(self.plugin_name, update_link))
+        except Exception as e:
+            log_exception(self.logger, e)
+
+            # write notify about the error
+            self.namespace.notify_stack.append(
+                self.namespace.translations['core']['error_notify'].format(
+                    self.namespace.translations['core']['pluginapi']['send_request_error'].format(self.plugin_name)
+                )
+            )
+            self.update_result.status = 'error'
+            self.errored = True
 
     def check_platform(self):
         """Checks the platform compatibility with the plugin"""
@@ -384,7 +521,8 @@ class Plugin:
             self.logger.debug(f'check_required_plugins() : Plugin hasn\'t requirement for the others plugins')
             return
 
-        current_plugins_list = [p for p in self.namespace.plugins.plugins if self.namespace.plugins.plugins[p].active]
+        # deferred plugins are activated on the first use
+        current_plugins_list = [n for n, p in self.namespace.plugins.plugins.items() if p.active or p.deferred]
 
         for rp in required_plugins:
             if isinstance(rp, str):
@@ -442,7 +580,8 @@ class Plugin:
         self.logger.debug(f'check_required_plugins() : Plugin passed check for the required plugins')
 
     def check_requirements(self):
-        """Checks the plugin requirements"""
+        """Checks the plugin requirements. Requirements, that were resolved by the
+        PluginsList.resolve_requirements(), are not checked again"""
 
         requirements = self.info['requirements']
 
@@ -451,7 +590,19 @@ class Plugin:
             return
 
         try:
-            install_requirements(requirements, self.namespace.instance.logs_dir)
+            resolver = self.namespace.get('requirements')
+
+            if resolver is None:
+                install_requirements(requirements, self.namespace.instance.logs_dir)
+                return
+
+            # plugin wasn't in the batch (for example, it was added after the startup)
+            if self.plugin_name not in resolver.results:
+                resolver.resolve({self.plugin_name: requirements})
+
+            if failed := resolver.results[self.plugin_name]:
+                raise PluginRequiresError(self.plugin_name, ', '.join(failed))
+
         except Exception as e:
             log_exception(self.logger, e)
 
@@ -471,13 +622,32 @@ class Plugin:
 
         self.logger.debug('Executing the plugin')
 
-        with open(self.plugin_path) as f:
-            code = f.read()
-
         try:
+            code = None
+            code_cache = self.namespace.get('code_cache')
+
+            # compiled code is loaded from the cache, if the hash of the plugin in the manifest isn't changed
+            if code_cache is not None and self.namespace.get('manifest') is not None:
+                code = code_cache.load(self.plugin_name, self.plugin_path,
+                                       self.namespace.manifest.sha256(self.plugin_path))
+
+            if code is None:
+                with open(self.plugin_path, 'rb') as f:
+                    source = f.read()
+
+                code = code_cache.compile(self.plugin_name, source, self.plugin_path) \
+                    if code_cache is not None else compile(source, self.plugin_path, 'exec')
+
+            # names of the global namespace before the execution. New names are the exports of the plugin
+            before = set(self.namespace.__dict__)
+            self.exports = {'commands': [], 'namespaces': []}
+
             # Execute a plugin
-            c = exec(compile(code, self.plugin_path, 'exec'), {'namespace': self.namespace, 'this': self})
+            exec(code, {'namespace': self.namespace, 'this': self})
             self.active = True
+
+            self.exports['namespaces'] = sorted(n for n in self.namespace.__dict__
+                                                if n not in before and not n.startswith('__'))
         except PluginExitedError:
             pass
         except Exception as e:
@@ -493,6 +663,37 @@ class Plugin:
 
     ####
 
+    async def run_in_thread(self, func, *args, pool: str = 'default', **kwargs):
+        """Runs the blocking function in the named thread pool, without blocking the event loop
+
+        :param func: Function to run
+        :param args: Positional arguments of the function
+        :param pool: Name of the thread pool
+        :type pool: str
+        :param kwargs: Keyword arguments of the function
+
+        :returns: Result of the function
+        """
+
+        return await self.namespace.executors.get(pool, 'thread').run(func, *args, **kwargs)
+
+    async def run_in_process(self, func, *args, pool: str = 'default', **kwargs):
+        """Runs the CPU-bound function in the named process pool.
+        Function and arguments must be picklable, so functions defined in the plugin file can't be used
+
+        :param func: Function to run
+        :param args: Positional arguments of the function
+        :param pool: Name of the process pool
+        :type pool: str
+        :param kwargs: Keyword arguments of the function
+
+        :returns: Result of the function
+        """
+
+        return await self.namespace.executors.get(pool, 'process').run(func, *args, **kwargs)
+
+    ####
+
     def mark_danger(self, pname: str):
         """Marks given pname (command function name) as danger
 
@@ -506,7 +707,7 @@ class Plugin:
     ####
 
     def command(self, aliases: str | list | None = None, ap: ArgumentParser | None = None,
-                static_pname: str | None = None):
+                static_pname: str | None = None, queued: bool = True):
         """Decorator, that helps register the new command
 
         :param aliases: Aliases to the command
@@ -515,6 +716,8 @@ class Plugin:
         :type ap: ArgumentParser | None
         :param static_pname: Static name in the namespace.pcommands dict
         :type static_pname: str | None
+        :param queued: Wait for the other commands in the chat. If False, command is started at once
+        :type queued: bool
 
         :returns: func with the changed attributes
         """
@@ -532,6 +735,8 @@ class Plugin:
                     raise IncorrectCommandAliasesError(self.plugin_name, func.__name__)
 
             func.ap = ap
+            func.plugin_name = self.plugin_name
+            func.queued = queued
 
             # pname - name in the permissions list
             pname = static_pname if static_pname is not None else func.__name__
@@ -540,14 +745,32 @@ class Plugin:
             for a in aliases:
                 self.namespace.commands[a] = func
 
-            self.logger.debug(f'Create permissions list for the function {func.__name__}(), pname: {pname}')
+            if self.exports is not None:
+                self.exports['commands'].append({'aliases': [str(a) for a in aliases], 'name': func.__name__,
+                                                 'pname': str(pname), 'queued': queued})
 
-            # create a function in the commands permissions list
-            self.namespace.pcommands[pname] = [] + self.namespace.instance.owner_ids
+            # permissions list of the deferred plugin is already created
+            if pname not in self.namespace.pcommands:
+                self.logger.debug(f'Create permissions list for the function {func.__name__}(), pname: {pname}')
+
+                # create a function in the commands permissions list
+                self.namespace.pcommands[pname] = [] + self.namespace.instance.owner_ids
             return func
 
         return deco
 
+    def on_unload(self, func):
+        """Decorator, that registers the function, which is called when the plugin is unloaded or reloaded.
+        Use it to stop the tasks and close the resources of the plugin
+
+        :param func: Function without arguments
+
+        :returns: func
+        """
+
+        self.unload_callbacks.append(func)
+        return func
+
     def only(self, platforms: list[str] | str, alt: ... = lambda: None):
         """Decorator, that returns function only if concrete platform(s) is supported
 
@@ -582,6 +805,19 @@ class PluginsList:
     :type plugins_dir: str
     :ivar namespace: Global namespace
     :type namespace: Namespace | None
+    :ivar update_report: Results of the last update check by the plugin names
+    :type update_report: dict[str, UpdateResult]
+    :ivar activation_workers: Number of the plugins, that run the check_requirements() step at the same time
+    :type activation_workers: int
+    :ivar activation_report: Level, state and required plugins of the activated plugins by the plugin names
+    :type activation_report: dict[str, dict]
+    :ivar lazy_manifest: Recorded exports of the plugins. If set, plugins with the valid exports are deferred
+        (executed on the first use of their command or namespace)
+    :type lazy_manifest: LazyManifest | None
+    :ivar eager: Names of the plugins, that are never deferred
+    :type eager: set[str]
+    :ivar all_languages: Download the translations of all the languages, not only the current and English
+    :type all_languages: bool
     :ivar logger: Logger instance
     :type logger: logging.Logger
     """
@@ -600,9 +836,31 @@ class PluginsList:
         self.plugins = plugins if plugins is not None else {}
         self.plugins_dir = plugins_dir
         self.namespace = namespace if namespace is not None else Namespace()
+        self.update_report = {}
+        self.activation_workers = 4
+        self.activation_report = {}
+        self.lazy_manifest = None
+        self.eager = set()
+        self.all_languages = False
+
+        self._translations_key = None
+        # the same lock creates the lazy values of the namespace (see source.namespace.lazy_lock)
+        self._deferred_lock = lazy_lock
 
         self.logger = logging.getLogger('EasyTl : PluginsList')
 
+    def _phase(self, name: str):
+        """(System method) Returns the context manager, that records the time of the phase by the namespace.profiler
+
+        :param name: Name of the phase
+        :type name: str
+
+        :returns: Context manager
+        """
+
+        profiler = self.namespace.get('profiler')
+        return profiler.phase(name) if profiler is not None and profiler.enabled else nullcontext()
+
     def plugin_is_active(self, plugin_name: str) -> bool:
         """Checks if plugin is active
 
@@ -660,23 +918,592 @@ class PluginsList:
 
             self.logger.info(f'Plugin {n} successfully updated!')
 
+    def check_updates(self) -> dict[str, UpdateResult]:
+        """Checks for the updates of all the not checked plugins concurrently, before the activation.
+        Requests are sent by the namespace.updater, updates are applied one by one
+
+        :returns: Dict with the results of the update check by the plugin names
+        :rtype: dict[str, UpdateResult]
+        """
+
+        links = {}
+
+        for n, p in self.plugins.items():
+            if p.update_result is not None or p.errored or p.active:
+                continue
+
+            p.namespace = self.namespace  # set plugin namespace
+
+            profiler = self.namespace.get('profiler')
+            with profiler.step(n, 'prepare_update') if profiler is not None and profiler.enabled else nullcontext():
+                update_link = p.prepare_update()
+
+            if update_link is not None:
+                links[n] = update_link
+
+        if links:
+            self.logger.info(f'Checking for the updates of {len(links)} plugins')
+
+        started = time.perf_counter()
+
+        for n, result in self.namespace.updater.fetch_all(links).items():
+            try:
+                self.plugins[n].apply_update(result, languages=False)
+            except Exception as e:
+                log_exception(self.logger, e)
+
+                self.namespace.notify_stack.append(
+                    self.namespace.translations['core']['error_notify'].format(
+                        self.namespace.translations['core']['pluginapi']['send_request_error'].format(n)
+                    )
+                )
+                result.status = 'error'
+                self.plugins[n].errored = True
+
+        self.update_report = {n: p.update_result for n, p in self.plugins.items() if p.update_result is not None}
+
+        if links:
+            self.logger.info(f'Update check is finished in {time.perf_counter() - started:.2f}s')
+
+            for r in self.update_report.values():
+                if r.url is not None:
+                    self.logger.info(f'  {r.plugin_name:<24} {r.status:<13} {r.http_status or "-":<4} '
+                                     f'{r.elapsed:.3f}s {r.error or ""}')
+
+        return self.update_report
+
+    def download_languages(self) -> dict[str, UpdateResult]:
+        """Downloads the translations files concurrently: files of the updated plugins and the missing files
+        of the other plugins. Only the used languages are downloaded (see Translator.used_languages()
+        and PluginsList.all_languages)
+
+        :returns: Dict with the results by the file names
+        :rtype: dict[str, UpdateResult]
+        """
+
+        links, files = {}, {}
+
+        for n, p in self.plugins.items():
+            if p.errored or p.active or p.info is None:
+                continue
+
+            p.namespace = self.namespace
+            updated = p.update_result is not None and p.update_result.status == 'updated'
+
+            for f, link, sha256 in p.language_links(self.all_languages):
+                missing = not os.path.exists(os.path.join(self.namespace.translator.lang_dir, f))
+
+                if missing:
+                    self.namespace.updater.forget('lang-' + f)  # request without the conditional headers
+
+                if updated or missing:
+                    links['lang-' + f] = link
+                    files[f] = (p, sha256, updated)
+
+        if not links:
+            return {}
+
+        started = time.perf_counter()
+        results = self.namespace.updater.fetch_all(links)
+
+        for f, (p, sha256, updated) in files.items():
+            result = results['lang-' + f]
+
+            try:
+                ok = p.apply_language(f, sha256, result)
+            except Exception as e:
+                log_exception(p.logger, e)
+                ok, result.status = False, 'error'
+
+            # broken translations of the updated plugin can't be used, missing files are downloaded on the next start
+            if not ok and updated and not p.errored:
+                self.namespace.notify_stack.append(
+                    self.namespace.translations['core']['error_notify'].format(
+                        self.namespace.translations['core']['pluginapi']['download_languages_error'].format(
+                            p.plugin_name)
+                    )
+                )
+                p.update_result.status = 'error'
+                p.errored = True
+
+        self.logger.info(f'{len(links)} languages files are checked in {time.perf_counter() - started:.2f}s: '
+                         + ', '.join(f'{f} ({results["lang-" + f].status})' for f in files))
+
+        return {f: results['lang-' + f] for f in files}
+
+    def resolve_requirements(self) -> dict[str, list[str]]:
+        """Resolves the requirements of all the not activated plugins at once by the namespace.requirements
+
+        :returns: Names of the requirements, that can't be installed, by the plugin names
+        :rtype: dict[str, list[str]]
+        """
+
+        if self.namespace.get('requirements') is None:
+            return {}
+
+        requirements = {n: p.info['requirements'] for n, p in self.plugins.items()
+                        if not p.errored and not p.active and p.info is not None
+                        and isinstance(p.info.get('requirements'), list)}
+
+        if not requirements:
+            return {}
+
+        started = time.perf_counter()
+        results = self.namespace.requirements.resolve(requirements)
+
+        self.logger.info(f'Requirements of {len(requirements)} plugins are resolved '
+                         f'in {time.perf_counter() - started:.2f}s')
+
+        return results
+
+    def resolve_activation_order(self) -> (list[list[str]], dict[str, list[str]]):
+        """Builds the dependency graph from the "required_plugins" info lines and splits the plugins
+        to the levels in the topological order: plugins of the level depend only on the plugins of the previous levels.
+        Required plugins, that are not in the list, are ignored here (check_required_plugins() reports them)
+
+        :returns: List with the levels (sorted lists of the plugin names) and dict with the paths to the cycles
+            by the names of the plugins, that are in the cycle or depend on it (path ends with the repeated plugin)
+        :rtype: (list[list[str]], dict[str, list[str]])
+        """
+
+        graph = {n: [d for d in p.dependencies() if d in self.plugins and d != n] for n, p in self.plugins.items()}
+        remaining = {n: len(set(deps)) for n, deps in graph.items()}
+
+        dependents = {n: [] for n in graph}
+        for n, deps in graph.items():
+            for d in set(deps):
+                dependents[d].append(n)
+
+        levels = []
+        level = sorted(n for n, c in remaining.items() if c == 0)
+
+        # Kahn's algorithm by the levels
+        while level:
+            levels.append(level)
+            next_level = []
+
+            for n in level:
+                for d in dependents[n]:
+                    remaining[d] -= 1
+                    if remaining[d] == 0:
+                        next_level.append(d)
+
+            level = sorted(next_level)
+
+        # plugins with the not resolved dependencies are in the cycle or depend on it
+        cycles = {}
+        for n in sorted(n for n, c in remaining.items() if c > 0):
+            path = [n]
+
+            # follow the not resolved dependencies until the plugin is repeated
+            while path.count(path[-1]) < 2:
+                path.append(next(d for d in graph[path[-1]] if remaining[d] > 0))
+
+            cycles[n] = path
+
+        return levels, cycles
+
+    def _translations(self) -> str:
+        """(System method) Returns the fingerprint of the translations, that is calculated once
+
+        :returns: Hex digest of the hash
+        :rtype: str
+        """
+
+        if self._translations_key is None:
+            self._translations_key = self.namespace.translator.fingerprint()
+
+        return self._translations_key
+
+    def can_defer(self, p: Plugin) -> dict | None:
+        """Checks if the plugin can be activated on the first use
+
+        :param p: The plugin, that passed the checks before the execution
+        :type p: Plugin
+
+        :returns: Recorded exports of the plugin or None, if the plugin must be executed now
+        :rtype: dict | None
+        """
+
+        if self.lazy_manifest is None or p.plugin_name in self.eager or p.info.get('lazy', True) is False:
+            return None
+
+        return self.lazy_manifest.get(p.plugin_name, p.plugin_path, self._translations())
+
+    def record_exports(self, p: Plugin):
+        """Records the exports of the executed plugin to the lazy manifest
+
+        :param p: The executed plugin
+        :type p: Plugin
+        """
+
+        if self.lazy_manifest is None or not p.active or p.exports is None:
+            return
+
+        # "danger" marks are added by the plugin body, so they are recorded to be restored by the defer()
+        for c in p.exports['commands']:
+            c['danger'] = 'danger' in self.namespace.pcommands.get(c['pname'], ())
+
+        self.lazy_manifest.record(p.plugin_name, p.plugin_path, self._translations(),
+                                  p.exports['commands'], p.exports['namespaces'])
+
+    def defer(self, p: Plugin, exports: dict):
+        """Registers the stubs of the plugin commands and lazy values of its namespace names instead of the execution.
+        Plugin is executed by the activate_deferred(), when the command is called or the name is used
+
+        :param p: The plugin, that passed the checks before the execution
+        :type p: Plugin
+        :param exports: Recorded exports of the plugin
+        :type exports: dict
+        """
+
+        name = p.plugin_name
+
+        for c in exports['commands']:
+            async def stub(event, args, _name=name):
+                self.activate_deferred(_name)
+
+            stub.__name__ = c['name']
+            stub.ap = None
+            stub.plugin_name = name
+            stub.queued = c['queued']
+            stub.deferred_plugin = name
+
+            for a in c['aliases']:
+                self.namespace.commands[a] = stub
+
+            # permissions are given before the execution, so they are not reset by it
+            if c['pname'] not in self.namespace.pcommands:
+                self.namespace.pcommands[c['pname']] = [] + self.namespace.instance.owner_ids
+
+            # danger commands can't be trusted before the plugin is executed
+            if c.get('danger') and 'danger' not in self.namespace.pcommands[c['pname']]:
+                self.namespace.pcommands[c['pname']].append('danger')
+
+        for n in exports['namespaces']:
+            def factory(_n=n):
+                if not self.activate_deferred(name) or _n not in self.namespace.__dict__:
+                    raise AttributeError(f'Plugin {name} didn\'t create the namespace value "{_n}"')
+                return self.namespace.__dict__[_n]
+
+            self.namespace.set_lazy(n, factory)
+
+        p.exports = exports
+        p.deferred = True
+
+        self.logger.debug(f'Plugin {name} is deferred until the first use')
+
+    def activate_deferred(self, plugin_name: str) -> bool:
+        """Executes the deferred plugin and its deferred required plugins
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+
+        :returns: True, if the plugin is active
+        :rtype: bool
+        """
+
+        if (p := self.plugins.get(plugin_name)) is None:
+            return False
+
+        with self._deferred_lock:
+            if not p.deferred:
+                return p.active
+
+            p.deferred = False
+
+            for d in p.dependencies():
+                if d in self.plugins and self.plugins[d].deferred:
+                    self.activate_deferred(d)
+
+            # stubs are replaced by the real commands and values
+            for c in p.exports['commands']:
+                for a in c['aliases']:
+                    if getattr(self.namespace.commands.get(a), 'deferred_plugin', None) == plugin_name:
+                        del self.namespace.commands[a]
+
+            for n in p.exports['namespaces']:
+                self.namespace.discard_lazy(n)
+
+            self.logger.info(f'Activating the deferred plugin {plugin_name}')
+
+            started = time.perf_counter()
+            steps = p.activation_steps
+            i = next((i for i, s in enumerate(steps) if s[0] == p.check_requirements), len(steps))
+
+            if p.run_steps(steps[i + 1:]):
+                # "danger" marks, restored by the defer(), are added again by the plugin body
+                for c in p.exports['commands']:
+                    perms = self.namespace.pcommands.get(c['pname'], [])
+                    while perms.count('danger') > 1:
+                        perms.remove('danger')
+
+                self.record_exports(p)
+
+                if self.lazy_manifest is not None:
+                    self.lazy_manifest.save()
+
+            if plugin_name in self.activation_report:
+                self.activation_report[plugin_name].update(active=p.active, errored=p.errored, deferred=False)
+
+            self.logger.info(f'Plugin {plugin_name} is {"activated" if p.active else "not activated"} '
+                             f'in {time.perf_counter() - started:.2f}s')
+
+        return p.active
+
+    def unload_plugin(self, plugin_name: str) -> bool:
+        """Unloads the plugin: calls its unload callbacks, removes its commands, permissions lists
+        and namespace values. Plugin stays in the list
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+
+        :returns: True, if the plugin was active or deferred
+        :rtype: bool
+        """
+
+        if (p := self.plugins.get(plugin_name)) is None or not (p.active or p.deferred):
+            return False
+
+        self.logger.debug(f'Unloading the plugin {plugin_name}')
+
+        for func in p.unload_callbacks:
+            try:
+                func()
+            except Exception as e:
+                log_exception(p.logger, e)
+
+        for a in [a for a, f in self.namespace.commands.items() if getattr(f, 'plugin_name', None) == plugin_name]:
+            del self.namespace.commands[a]
+
+        exports = p.exports or {'commands': [], 'namespaces': []}
+
+        for c in exports['commands']:
+            self.namespace.pcommands.pop(c['pname'], None)
+
+        for n in exports['namespaces']:
+            self.namespace.__dict__.pop(n, None)
+            self.namespace.discard_lazy(n)
+
+        # requirements are checked again, they may be changed
+        if (resolver := self.namespace.get('requirements')) is not None:
+            resolver.results.pop(plugin_name, None)
+
+        p.unload_callbacks = []
+        p.active = p.deferred = False
+
+        return True
+
+    def reload_plugin(self, plugin_name: str) -> bool:
+        """Reloads the plugin from its file without the update check. Active plugins, that require it,
+        are reloaded too, because they may use its old values
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+
+        :returns: True, if the plugin is active after the reload
+        :rtype: bool
+        """
+
+        if plugin_name not in self.plugins:
+            return False
+
+        started = time.perf_counter()
+
+        # the plugin and its dependents in the activation order
+        levels, _ = self.resolve_activation_order()
+        affected = {plugin_name}
+
+        for level in levels:
+            for n in level:
+                p = self.plugins[n]
+                if (p.active or p.deferred) and affected.intersection(p.dependencies()):
+                    affected.add(n)
+
+        order = [n for level in levels for n in level if n in affected]
+        if plugin_name not in order:  # plugin is in the dependency cycle
+            order = [plugin_name]
+
+        for n in reversed(order):
+            self.unload_plugin(n)
+
+        for n in order:
+            p = self.plugins[n] = Plugin(n, self.plugins[n].plugin_path)  # new object has the clean state
+            p.namespace = self.namespace
+
+            p.prepare_update()  # parses the info lines, the update isn't downloaded
+            p.activate()
+            self.record_exports(p)
+
+            if n in self.activation_report:
+                self.activation_report[n].update(active=p.active, errored=p.errored, deferred=False)
+
+        if self.lazy_manifest is not None:
+            self.lazy_manifest.save()
+
+        active = self.plugins[plugin_name].active
+        self.logger.info(f'Plugin {plugin_name} is {"reloaded" if active else "not reloaded"} '
+                         f'in {(time.perf_counter() - started) * 1000:.1f}ms'
+                         + (f' (with {", ".join(order[1:])})' if len(order) > 1 else ''))
+
+        return active
+
+    def reload_files(self, paths: list[str]):
+        """Reloads the plugins by the changed files (see source.watcher.FileWatcher).
+        Changed plugins files are reloaded, new plugins are activated, plugins with the removed files are unloaded.
+        Changed translations files are loaded again, plugins with these files in the "lang_links" are reloaded
+
+        :param paths: Paths to the changed files
+        :type paths: list[str]
+        """
+
+        plugins_dir = os.path.abspath(self.plugins_dir)
+        translator = self.namespace.translator
+        lang_dir = os.path.abspath(translator.lang_dir)
+        reload = []
+
+        for path in paths:
+            directory, f = os.path.split(os.path.abspath(path))
+
+            if directory == plugins_dir and f.endswith('.plugin.py'):
+                n = f[:-10]
+
+                if not os.path.exists(path):
+                    if n in self.plugins:
+                        self.logger.info(f'Plugin file of {n} is removed. Unloading it')
+                        self.unload_plugin(n)
+                        del self.plugins[n]
+                    continue
+
+                if n not in self.plugins:
+                    self.plugins[n] = Plugin(n, path)
+                reload.append(n)
+
+            elif directory == lang_dir and f.endswith('.toml') and os.path.exists(path):
+                head, file_lang = f[:-5].rpartition('_')[::2]
+
+                # file of the current language or of its fallback language, that is merged under it
+                if file_lang == translator.lang or (file_lang in translator.chain(translator.lang)
+                                                    and head in self.namespace.translations):
+                    translator.load_file(path)
+
+                translator.forget_locales()
+                self._translations_key = None
+
+                for n, p in self.plugins.items():
+                    if p.info is not None and isinstance(p.info.get('lang_links'), list) \
+                            and any(link[0] == f for link in p.info['lang_links']) and (p.active or p.deferred):
+                        reload.append(n)
+
+        for n in dict.fromkeys(reload):
+            if n in self.plugins:
+                self.reload_plugin(n)
+
+    def activate_level(self, names: list[str]):
+        """Activates the independent plugins. Steps before the check_requirements() and the execution
+        are called one by one, the check_requirements() steps are called in parallel
+
+        :param names: Names of the plugins
+        :type names: list[str]
+        """
+
+        parallel = []
+
+        for n in names:
+            p = self.plugins[n]
+            p.namespace = self.namespace  # set plugin namespace
+
+            steps = p.activation_steps
+            i = next((i for i, s in enumerate(steps) if s[0] == p.check_requirements), len(steps))
+
+            if p.run_steps(steps[:i]):
+                parallel.append((p, steps[i:i + 1], steps[i + 1:]))
+
+        if len(parallel) > 1 and self.activation_workers > 1:
+            with ThreadPoolExecutor(min(self.activation_workers, len(parallel)),
+                                    thread_name_prefix='EasyTl-activation') as pool:
+                results = list(pool.map(lambda t: t[0].run_steps(t[1]), parallel))
+        else:
+            results = [t[0].run_steps(t[1]) for t in parallel]
+
+        # plugins are executed in the main thread
+        for (p, _, post), ok in zip(parallel, results):
+            if not ok:
+                continue
+
+            if (exports := self.can_defer(p)) is not None:
+                self.defer(p, exports)
+            elif p.run_steps(post):
+                self.record_exports(p)
+
     def activate_plugin_list(self, plugins: dict[str, Plugin] | None = None):
-        """Activates current plugin list
+        """Activates current plugin list. Updates of the plugins are checked before the activation,
+        then plugins are activated by the levels of the dependency graph
 
         :param plugins: Dict of the plugins, that will be added to the current list
         :type plugins: dict[str, Plugin]
         """
 
-        self.logger.info(f'Activating all plugins in the list')
-
         self.plugins.update(plugins if plugins is not None else {})  # update the plugins list with an argument
-        for n, p in self.plugins.items():  # iterate plugins (n - name, p - plugin)
-            self.logger.info(f'Activating the plugin {n}')
 
-            p.namespace = self.namespace  # set plugin namespace
-            self.activate_plugin(n)
-            if p.errored or not p.active:
-                self.logger.info(f'Plugin {n} doesn\'t activated')
-                continue
+        with self._phase('plugins.check_updates'):
+            self.check_updates()
+
+        with self._phase('plugins.download_languages'):
+            self.download_languages()
+
+        with self._phase('plugins.resolve_requirements'):
+            self.resolve_requirements()
 
-            self.logger.info(f'Plugin {n} successfully activated!')
+        with self._phase('plugins.resolve_activation_order'):
+            levels, cycles = self.resolve_activation_order()
+
+        for n, path in cycles.items():
+            self.logger.error(f'Plugin {n} can\'t be activated, dependency cycle: {" -> ".join(path)}')
+
+            self.namespace.notify_stack.append(
+                self.namespace.translations['core']['error_notify'].format(
+                    self.namespace.translations['core']['pluginapi']['dependency_cycle_error'].format(
+                        n, ' -> '.join(path))
+                )
+            )
+            self.plugins[n].errored = True
+
+        self.logger.info(f'Activating all plugins in the list')
+
+        self.activation_report = {}
+
+        for i, level in enumerate(levels):
+            self.logger.info(f'Activating the plugins of the level {i}: {", ".join(level)}')
+
+            started = time.perf_counter()
+            with self._phase(f'plugins.level {i}'):
+                self.activate_level(level)
+            elapsed = time.perf_counter() - started
+
+            for n in level:
+                p = self.plugins[n]
+                self.activation_report[n] = {'level': i, 'active': p.active, 'errored': p.errored,
+                                             'deferred': p.deferred, 'requires': p.dependencies(),
+                                             'missing': [d for d in p.dependencies() if not self.plugin_is_active(d)
+                                                         and not (d in self.plugins and self.plugins[d].deferred)]}
+
+            self.logger.info(f'Level {i} is activated in {elapsed:.2f}s')
+
+        for n, path in cycles.items():
+            self.activation_report[n] = {'level': None, 'active': False, 'errored': True,
+                                         'requires': self.plugins[n].dependencies(), 'cycle': path}
+
+        # report
+        for n, r in self.activation_report.items():
+            if r['active']:
+                self.logger.info(f'Plugin {n} successfully activated! (level {r["level"]})')
+            elif r.get('deferred'):
+                self.logger.info(f'Plugin {n} is deferred until the first use (level {r["level"]})')
+            elif 'cycle' in r:
+                self.logger.info(f'Plugin {n} doesn\'t activated: dependency cycle {" -> ".join(r["cycle"])}')
+            elif r['missing']:
+                self.logger.info(f'Plugin {n} doesn\'t activated: required plugins are not active: '
+                                 f'{", ".join(r["missing"])}')
+            else:
+                self.logger.info(f'Plugin {n} doesn\'t activated')
@@ -0,0 +1,139 @@
+import os
+import json
+import logging
+from .utils import read_plugin_information, log_exception
+from .manifest import FileManifest
+
+
+class PluginIndex:
+    """Persistent index of the plugins information. Keeps the parsed info lines of the plugins
+    with the sha256 hash of the files from the manifest, so the info lines of the unchanged plugins are not parsed
+
+    :ivar path: Path to the index file
+    :type path: str
+    :ivar manifest: Fingerprints of the files
+    :type manifest: FileManifest
+    :ivar entries: Dict with the "sha256" and "info" by the plugin paths
+    :type entries: dict[str, dict]
+    :ivar changed: Index is changed and must be saved
+    :type changed: bool
+    :ivar hits: Number of the info, that are taken from the index
+    :type hits: int
+    :ivar misses: Number of the parsed info
+    :type misses: int
+    :ivar logger: Logger of the index
+    :type logger: logging.Logger
+    """
+
+    VERSION = 2
+
+    def __init__(self, path: str, manifest: FileManifest):
+        """
+        :param path: Path to the index file
+        :type path: str
+        :param manifest: Fingerprints of the files
+        :type manifest: FileManifest
+        """
+
+        self.path = path
+        self.manifest = manifest
+        self.entries = {}
+        self.changed = False
+
+        self.hits = 0
+        self.misses = 0
+
+        self.logger = logging.getLogger('EasyTl : PluginIndex')
+
+        self.load()
+
+    def load(self):
+        """Loads the index file. Index is empty, if the file isn't exists or has the other version"""
+
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+
+            if data.get('version') == self.VERSION:
+                self.entries = data['plugins']
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning('Can\'t load the plugins index. It will be created again')
+            log_exception(self.logger, e)
+
+    def save(self):
+        """Writes the index file, if it was changed"""
+
+        if not self.changed:
+            return
+
+        try:
+            with open(self.path + '.tmp', 'w') as f:
+                json.dump({'version': self.VERSION, 'plugins': self.entries}, f)
+
+            os.replace(self.path + '.tmp', self.path)
+            self.changed = False
+        except Exception as e:
+            self.logger.warning('Can\'t write the plugins index')
+            log_exception(self.logger, e)
+
+    ####
+
+    def get_info(self, plugin_path: str) -> (bool, dict):
+        """Returns the information about the plugin. Info is taken from the index, if the file hash
+        in the manifest is not changed. Otherwise, info lines are parsed
+
+        :param plugin_path: Path to the plugin file
+        :type plugin_path: str
+
+        :return: Same as utils.parse_plugin_information()
+        :rtype: (bool, dict)
+        """
+
+        key = os.path.abspath(plugin_path)
+        sha256 = self.manifest.sha256(plugin_path)  # file is hashed only if its size or mtime is changed
+        entry = self.entries.get(key)
+
+        if entry is not None and entry['sha256'] == sha256:
+            self.hits += 1
+            return True, entry['info']
+
+        self.misses += 1
+        is_v2, info = read_plugin_information(plugin_path)
+
+        # the old format isn't indexed, so the error is reported every time
+        if is_v2:
+            try:
+                json.dumps(info)
+            except TypeError:
+                self.logger.debug(f'get_info() : Info of the {plugin_path} can\'t be indexed')
+                return is_v2, info
+
+            self.entries[key] = {'sha256': sha256, 'info': info}
+            self.changed = True
+
+        return is_v2, info
+
+    def remove(self, plugin_path: str):
+        """Removes the plugin from the index
+
+        :param plugin_path: Path to the plugin file
+        :type plugin_path: str
+        """
+
+        if self.entries.pop(os.path.abspath(plugin_path), None) is not None:
+            self.changed = True
+
+    def prune(self, plugin_paths: list[str]):
+        """Removes the plugins, that are not in the given list, from the index
+
+        :param plugin_paths: Paths to the existing plugins
+        :type plugin_paths: list[str]
+        """
+
+        keep = {os.path.abspath(p) for p in plugin_paths}
+
+        for key in [k for k in self.entries if k not in keep]:
+            del self.entries[key]
+            self.changed = True
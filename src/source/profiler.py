@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from .utils import log_exception
+
+
+class StartupProfiler:
+    """Records the wall and CPU time of the startup phases and the activation steps of the plugins.
+    CPU time of the phases is the time of the process (all threads), CPU time of the plugins steps
+    is the time of the thread, that runs the step (steps of the different plugins may run in parallel)
+
+    :ivar records: Recorded "kind" ("phase" or "step"), "name", "plugin", "wall" and "cpu" (in seconds)
+    :type records: list[dict]
+    :ivar enabled: Record the new times. Disabled by finish()
+    :type enabled: bool
+    :ivar started: perf_counter() of the profiler creation
+    :type started: float
+    :ivar logger: Logger of the profiler
+    :type logger: logging.Logger
+    """
+
+    def __init__(self):
+        self.records = []
+        self.enabled = True
+        self.started = time.perf_counter()
+
+        self._started_cpu = time.process_time()
+        self._total = None
+        self._lock = threading.Lock()
+
+        self.logger = logging.getLogger('EasyTl : StartupProfiler')
+
+    def record(self, kind: str, name: str, wall: float, cpu: float, plugin: str | None = None):
+        """Records the time
+
+        :param kind: "phase" or "step"
+        :type kind: str
+        :param name: Name of the phase or step
+        :type name: str
+        :param wall: Wall time in seconds
+        :type wall: float
+        :param cpu: CPU time in seconds
+        :type cpu: float
+        :param plugin: Name of the plugin (for the steps)
+        :type plugin: str | None
+        """
+
+        if not self.enabled:
+            return
+
+        with self._lock:
+            self.records.append({'kind': kind, 'name': name, 'plugin': plugin, 'wall': wall, 'cpu': cpu})
+
+    @contextmanager
+    def phase(self, name: str):
+        """Context manager, that records the time of the startup phase
+
+        :param name: Name of the phase
+        :type name: str
+        """
+
+        wall, cpu = time.perf_counter(), time.process_time()
+
+        try:
+            yield
+        finally:
+            self.record('phase', name, time.perf_counter() - wall, time.process_time() - cpu)
+
+    @contextmanager
+    def step(self, plugin: str, name: str):
+        """Context manager, that records the time of the activation step of the plugin
+
+        :param plugin: Name of the plugin
+        :type plugin: str
+        :param name: Name of the step
+        :type name: str
+        """
+
+        wall, cpu = time.perf_counter(), time.thread_time()
+
+        try:
+            yield
+        finally:
+            self.record('step', name, time.perf_counter() - wall, time.thread_time() - cpu, plugin)
+
+    ####
+
+    def finish(self):
+        """Stops the recording. Total time is counted from the profiler creation"""
+
+        if self.enabled:
+            self._total = (time.perf_counter() - self.started, time.process_time() - self._started_cpu)
+            self.enabled = False
+
+    def report(self) -> dict:
+        """Returns the report with the records, sorted by the wall time (slowest first)
+
+        :returns: Dict with the "total" and "records"
+        :rtype: dict
+        """
+
+        total = self._total or (time.perf_counter() - self.started, time.process_time() - self._started_cpu)
+
+        with self._lock:
+            records = sorted(self.records, key=lambda r: r['wall'], reverse=True)
+
+        return {'created': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime()), 'pid': os.getpid(),
+                'total': {'wall': round(total[0], 6), 'cpu': round(total[1], 6)},
+                'records': [dict(r, wall=round(r['wall'], 6), cpu=round(r['cpu'], 6)) for r in records]}
+
+    def log_table(self, limit: int = 30):
+        """Writes the slowest phases and steps to the log
+
+        :param limit: Number of the records in the table
+        :type limit: int
+        """
+
+        report = self.report()
+
+        self.logger.info(f'Startup is finished in {report["total"]["wall"]:.3f}s '
+                         f'(CPU {report["total"]["cpu"]:.3f}s). Slowest phases and plugins steps:')
+        self.logger.info(f'  {"wall, ms":>10} {"cpu, ms":>10}  {"kind":<6} {"plugin":<20} name')
+
+        for r in report['records'][:limit]:
+            self.logger.info(f'  {r["wall"] * 1000:>10.1f} {r["cpu"] * 1000:>10.1f}  {r["kind"]:<6} '
+                             f'{r["plugin"] or "-":<20} {r["name"]}')
+
+    def save(self, path: str):
+        """Writes the report to the JSON file
+
+        :param path: Path to the file
+        :type path: str
+        """
+
+        try:
+            with open(path + '.tmp', 'w') as f:
+                json.dump(self.report(), f, indent=2)
+
+            os.replace(path + '.tmp', path)
+        except Exception as e:
+            self.logger.warning('Can\'t write the startup profile')
+            log_exception(self.logger, e)
@@ -0,0 +1,247 @@
+import os
+import re
+import sys
+import json
+import time
+import logging
+import subprocess
+import importlib
+import importlib.metadata
+from .utils import log_exception
+
+
+def normalize_name(name: str) -> str:
+    """Normalizes the name of the distribution (PEP 503)
+
+    :param name: Name of the distribution
+    :type name: str
+
+    :returns: Normalized name
+    :rtype: str
+    """
+
+    return re.sub(r'[-_.]+', '-', name).lower()
+
+
+def parse_requirements(requirements: list[str | list[str]]) -> dict[str, str]:
+    """Parses the "requirements" info line of the plugin
+
+    :param requirements: List with the names of the distributions or [name, pip argument] lists
+    :type requirements: list[str | list[str]]
+
+    :returns: Dict with the pip arguments by the normalized names
+    :rtype: dict[str, str]
+    """
+
+    parsed = {}
+
+    for r in requirements:
+        # [name, pip argument] form (for example, [ "googletrans", "googletrans==4.0.0-rc1" ])
+        if isinstance(r, list):
+            parsed[normalize_name(r[0])] = r[1]
+            continue
+
+        parsed[normalize_name(r)] = r
+
+    return parsed
+
+
+def installed_distributions() -> set[str]:
+    """Returns the snapshot of the installed distributions
+
+    :returns: Set with the normalized names of the distributions
+    :rtype: set[str]
+    """
+
+    return {normalize_name(name) for d in importlib.metadata.distributions() if (name := d.metadata['Name'])}
+
+
+def pip_install(specs: list[str], pip_logs_dir: str, wheelhouse: str | None = None, offline: bool = False):
+    """Installs the packages by the one pip call. Output of the pip is written to the pip-*-log.txt in the logs dir
+
+    :param specs: Arguments of the "pip install" (requirement specifiers)
+    :type specs: list[str]
+    :param pip_logs_dir: Path to the directory with the pip logs
+    :type pip_logs_dir: str
+    :param wheelhouse: (Optional) Path to the directory with the wheels, that are used before the index
+    :type wheelhouse: str | None
+    :param offline: Install only from the wheelhouse, without the index
+    :type offline: bool
+
+    :raises subprocess.CalledProcessError: pip returned non 0 code
+    """
+
+    args = [sys.executable, '-m', 'pip', 'install']
+
+    if wheelhouse:
+        args += ['--find-links', wheelhouse] + (['--no-index'] if offline else [])
+
+    with open(os.path.join(pip_logs_dir, f'pip-{time.strftime("%Y-%m-%d_%H-%M", time.localtime())}-log.txt'),
+              'a') as l_f:
+        # run PIP to install the packages
+        subprocess.check_call(args + specs, stdout=l_f, stderr=subprocess.STDOUT)
+
+    # new packages must be found by the imports
+    importlib.invalidate_caches()
+
+
+class RequirementsResolver:
+    """Resolves the requirements of all the plugins at once: takes one snapshot of the installed distributions
+    and installs the missing packages by the one pip call. Satisfied requirements are cached in the file
+    while the Python and its site directories are not changed, so the snapshot is skipped on the next starts
+
+    :ivar cache_path: Path to the cache file
+    :type cache_path: str
+    :ivar pip_logs_dir: Path to the directory with the pip logs
+    :type pip_logs_dir: str
+    :ivar wheelhouse: Path to the directory with the wheels
+    :type wheelhouse: str | None
+    :ivar offline: Install only from the wheelhouse
+    :type offline: bool
+    :ivar results: Names of the not installed requirements by the plugin names
+    :type results: dict[str, list[str]]
+    :ivar logger: Logger of the resolver
+    :type logger: logging.Logger
+    """
+
+    VERSION = 1
+
+    def __init__(self, cache_path: str, pip_logs_dir: str, wheelhouse: str | None = None, offline: bool = False):
+        """
+        :param cache_path: Path to the cache file
+        :type cache_path: str
+        :param pip_logs_dir: Path to the directory with the pip logs
+        :type pip_logs_dir: str
+        :param wheelhouse: (Optional) Path to the directory with the wheels
+        :type wheelhouse: str | None
+        :param offline: Install only from the wheelhouse
+        :type offline: bool
+        """
+
+        self.cache_path = cache_path
+        self.pip_logs_dir = pip_logs_dir
+        self.wheelhouse = wheelhouse or None
+        self.offline = offline
+
+        self.results = {}
+
+        self.logger = logging.getLogger('EasyTl : RequirementsResolver')
+
+    @staticmethod
+    def environment() -> dict:
+        """Returns the key of the Python environment. It's changed, when the packages are installed or removed
+
+        :returns: Dict with the executable, version and mtime of the site directories
+        :rtype: dict
+        """
+
+        return {'executable': sys.executable, 'version': sys.version,
+                'paths': {p: os.stat(p).st_mtime_ns for p in sys.path if p and os.path.isdir(p)}}
+
+    def _load_cache(self) -> set[str]:
+        """(System method) Loads the cached satisfied requirements
+
+        :returns: Set with the names, empty if the environment is changed
+        :rtype: set[str]
+        """
+
+        try:
+            with open(self.cache_path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return set()
+
+        if data.get('version') != self.VERSION or data.get('environment') != self.environment():
+            return set()
+
+        return set(data.get('satisfied', []))
+
+    def _save_cache(self, satisfied: set[str]):
+        """(System method) Writes the satisfied requirements to the cache
+
+        :param satisfied: Set with the names
+        :type satisfied: set[str]
+        """
+
+        try:
+            with open(self.cache_path + '.tmp', 'w') as f:
+                json.dump({'version': self.VERSION, 'environment': self.environment(),
+                           'satisfied': sorted(satisfied)}, f)
+
+            os.replace(self.cache_path + '.tmp', self.cache_path)
+        except Exception as e:
+            self.logger.warning('Can\'t write the requirements cache')
+            log_exception(self.logger, e)
+
+    ####
+
+    def resolve(self, requirements: dict[str, list[str | list[str]]]) -> dict[str, list[str]]:
+        """Checks the requirements of the plugins and installs the missing packages
+
+        :param requirements: "requirements" info lines by the plugin names
+        :type requirements: dict[str, list[str | list[str]]]
+
+        :returns: Names of the requirements, that can't be installed, by the plugin names
+        :rtype: dict[str, list[str]]
+        """
+
+        parsed = {n: parse_requirements(r) for n, r in requirements.items()}
+
+        specs = {}
+        for reqs in parsed.values():
+            specs.update(reqs)
+
+        cached = self._load_cache()
+        failed = set()
+
+        if not set(specs) <= cached:
+            self.logger.debug('resolve() : Getting list of the installed packages')
+            installed = installed_distributions()
+
+            if missing := sorted(set(specs) - installed):
+                self.logger.info('Installing missing packages: ' + ', '.join(missing))
+
+                try:
+                    pip_install([specs[n] for n in missing], self.pip_logs_dir, self.wheelhouse, self.offline)
+                except Exception as e:
+                    self.logger.warning('Can\'t install the packages by the one call. Installing them by the plugins')
+                    log_exception(self.logger, e)
+
+                    failed = self._install_by_plugins(parsed, missing)
+
+            self._save_cache((cached | set(specs)) - failed)
+
+        results = {n: sorted(set(reqs) & failed) for n, reqs in parsed.items()}
+        self.results.update(results)
+
+        return results
+
+    def _install_by_plugins(self, parsed: dict[str, dict[str, str]], missing: list[str]) -> set[str]:
+        """(System method) Installs the missing packages by the separate pip call for the every plugin,
+        so the broken requirement of the one plugin doesn't break the others
+
+        :param parsed: Parsed requirements by the plugin names
+        :type parsed: dict[str, dict[str, str]]
+        :param missing: Names of the missing requirements
+        :type missing: list[str]
+
+        :returns: Names of the requirements, that can't be installed
+        :rtype: set[str]
+        """
+
+        installed, failed = set(), set()
+
+        for n, reqs in parsed.items():
+            if not (plugin_missing := [m for m in missing if m in reqs and m not in installed]):
+                continue
+
+            try:
+                pip_install([reqs[m] for m in plugin_missing], self.pip_logs_dir, self.wheelhouse, self.offline)
+                installed.update(plugin_missing)
+            except Exception as e:
+                self.logger.error(f'Can\'t install the requirements of the plugin {n}: ' + ', '.join(plugin_missing))
+                log_exception(self.logger, e)
+
+                failed.update(plugin_missing)
+
+        return failed - installed
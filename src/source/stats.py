@@ -0,0 +1,272 @@
+import os
+import json
+import time
+import asyncio
+import logging
+import contextvars
+from collections import deque
+from contextlib import contextmanager
+from .utils import log_exception
+
+# trace of the command, that is executing in the current task
+_current_trace = contextvars.ContextVar('easytl_command_trace', default=None)
+
+
+class Histogram:
+    """Keeps the recent samples and calculates the percentiles of it
+
+    :ivar samples: Recent samples
+    :type samples: deque[float]
+    :ivar count: Number of all the added samples
+    :type count: int
+    :ivar sum: Sum of all the added samples
+    :type sum: float
+    :ivar max: Maximum of all the added samples
+    :type max: float
+    """
+
+    def __init__(self, size: int = 1024):
+        """
+        :param size: Number of the recent samples to keep
+        :type size: int
+        """
+
+        self.samples = deque(maxlen=size)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def add(self, value: float):
+        """Adds the sample
+
+        :param value: The sample
+        :type value: float
+        """
+
+        self.samples.append(value)
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def summary(self) -> dict[str, float]:
+        """Returns the count, average, maximum and p50/p95/p99 of the samples
+
+        :returns: Dict with the values
+        :rtype: dict[str, float]
+        """
+
+        samples = sorted(self.samples)
+
+        def percentile(p):
+            return samples[min(len(samples) - 1, int(len(samples) * p))] if samples else 0.0
+
+        return {'count': self.count, 'avg': self.sum / self.count if self.count else 0.0, 'max': self.max,
+                'p50': percentile(0.50), 'p95': percentile(0.95), 'p99': percentile(0.99)}
+
+
+class CommandTrace:
+    """Time of the phases of the one command call. Time of the nested phases isn't counted in the outer phase
+
+    :ivar name: Name of the command
+    :type name: str
+    :ivar phases: Seconds, spent in the phases
+    :type phases: dict[str, float]
+    :ivar started: Time (time.perf_counter()) when the command was started
+    :type started: float
+    """
+
+    def __init__(self, name: str):
+        """
+        :param name: Name of the command
+        :type name: str
+        """
+
+        self.name = name
+        self.phases = {}
+        self.started = time.perf_counter()
+
+        self._stack = []
+
+    def enter(self, phase: str) -> list:
+        """Starts the phase
+
+        :param phase: Name of the phase
+        :type phase: str
+
+        :returns: Token of the phase to pass it to the CommandTrace.exit()
+        :rtype: list
+        """
+
+        now = time.perf_counter()
+
+        # pause the outer phase
+        if self._stack:
+            outer = self._stack[-1]
+            self.phases[outer[0]] = self.phases.get(outer[0], 0.0) + now - outer[1]
+            outer[1] = now
+
+        self._stack.append(token := [phase, now])
+        return token
+
+    def exit(self, token: list):
+        """Stops the phase
+
+        :param token: Token of the phase, returned by the CommandTrace.enter()
+        :type token: list
+        """
+
+        now = time.perf_counter()
+        self.phases[token[0]] = self.phases.get(token[0], 0.0) + now - token[1]
+
+        # phases of the concurrent tasks may exit not in order
+        is_last = self._stack[-1] is token
+        self._stack.remove(token)
+
+        # resume the outer phase
+        if is_last and self._stack:
+            self._stack[-1][1] = now
+
+
+class CommandStats:
+    """Collects the time of the commands phases and the errors of the commands
+
+    :ivar samples: Number of the recent samples to keep in the histograms
+    :type samples: int
+    :ivar commands: Dict with the statistics by the command names
+    :type commands: dict[str, dict]
+    :ivar logger: Logger of the statistics
+    :type logger: logging.Logger
+    """
+
+    def __init__(self, samples: int = 1024):
+        """
+        :param samples: Number of the recent samples to keep in the histograms
+        :type samples: int
+        """
+
+        self.samples = samples
+        self.commands = {}
+
+        self.logger = logging.getLogger('EasyTl : CommandStats')
+
+    def _command(self, name: str) -> dict:
+        """(System method) Gets the statistics of the command
+
+        :param name: Name of the command
+        :type name: str
+
+        :returns: Dict with the statistics
+        :rtype: dict
+        """
+
+        if name not in self.commands:
+            self.commands[name] = {'count': 0, 'errors': {}, 'phases': {}}
+
+        return self.commands[name]
+
+    def start(self, name: str) -> CommandTrace:
+        """Starts the trace of the command in the current task
+
+        :param name: Name of the command
+        :type name: str
+
+        :returns: Trace of the command
+        :rtype: CommandTrace
+        """
+
+        trace = CommandTrace(name)
+        _current_trace.set(trace)
+
+        return trace
+
+    def finish(self, trace: CommandTrace):
+        """Records the phases of the finished command
+
+        :param trace: Trace of the command
+        :type trace: CommandTrace
+        """
+
+        stats = self._command(trace.name)
+        stats['count'] += 1
+
+        for phase, seconds in list(trace.phases.items()) + [('total', time.perf_counter() - trace.started)]:
+            if phase not in stats['phases']:
+                stats['phases'][phase] = Histogram(self.samples)
+            stats['phases'][phase].add(seconds)
+
+    def error(self, name: str, error: str):
+        """Counts the error of the command
+
+        :param name: Name of the command
+        :type name: str
+        :param error: Name of the error
+        :type error: str
+        """
+
+        errors = self._command(name)['errors']
+        errors[error] = errors.get(error, 0) + 1
+
+    @contextmanager
+    def phase(self, name: str):
+        """Context manager, that measures the phase of the current command.
+        Does nothing, if it used outside the command
+
+        :param name: Name of the phase
+        :type name: str
+        """
+
+        if (trace := _current_trace.get()) is None:
+            yield
+            return
+
+        token = trace.enter(name)
+        try:
+            yield
+        finally:
+            trace.exit(token)
+
+    ####
+
+    def snapshot(self) -> dict:
+        """Returns the statistics as the JSON serializable dict
+
+        :returns: Dict with the statistics by the command names
+        :rtype: dict
+        """
+
+        return {
+            name: {'count': s['count'],
+                   'errors': dict(s['errors']),
+                   'phases': {p: h.summary() for p, h in s['phases'].items()}}
+            for name, s in self.commands.items()
+        }
+
+    def write_snapshot(self, path: str):
+        """Writes the statistics to the JSON file
+
+        :param path: Path to the file
+        :type path: str
+        """
+
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'time': time.time(), 'commands': self.snapshot()}, f, indent=2)
+
+        os.replace(path + '.tmp', path)
+
+    async def snapshot_loop(self, path: str, interval: float):
+        """Writes the statistics to the JSON file periodically
+
+        :param path: Path to the file
+        :type path: str
+        :param interval: Seconds between the snapshots
+        :type interval: float
+        """
+
+        while True:
+            await asyncio.sleep(interval)
+
+            try:
+                self.write_snapshot(path)
+            except Exception as e:
+                self.logger.warning('Can\'t write the snapshot of the statistics')
+                log_exception(self.logger, e)
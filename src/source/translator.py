@@ -1,33 +1,319 @@
-import os.path
-import tomlkit
+import os
+import sys
+import json
+import string
+import hashlib
 import logging
+from .catalog import compile_catalog
+from .utils import LRUCache, log_exception
+
+
+def _flatten_catalog(head: str, catalog: dict, logger: logging.Logger) -> tuple[dict, set]:
+    """Flattens the catalog of the translations file to the interned keys ("head.table.key") and validates
+    the templates
+
+    :param head: Head of the translations file
+    :type head: str
+    :param catalog: Catalog of the file
+    :type catalog: dict
+    :param logger: Logger for the warnings about the broken templates
+    :type logger: logging.Logger
+
+    :returns: Values by the flat keys and the flat keys of the broken templates
+    :rtype: tuple[dict, set]
+    """
+
+    values, invalid = {}, set()
+    tables = [(head, catalog)]
+
+    while tables:
+        prefix, table = tables.pop()
+
+        for k, v in table.items():
+            key = sys.intern(f'{prefix}.{k}')
+
+            if isinstance(v, dict):
+                tables.append((key, v))
+                continue
+
+            if isinstance(v, str):
+                try:
+                    list(string.Formatter().parse(v))
+                except ValueError as e:
+                    logger.warning(f'Translation {key} isn\'t valid template: {e}')
+                    invalid.add(key)
+
+            values[key] = v
+
+    return values, invalid
+
+
+def _merge_catalogs(base: dict, catalog: dict) -> dict:
+    """Merges the catalog of the more preferred language over the catalog of the fallback language.
+    Catalogs aren't changed (they may be shared with the snapshot), merged tables are the new dicts
+
+    :param base: Catalog of the fallback language
+    :type base: dict
+    :param catalog: Catalog of the more preferred language
+    :type catalog: dict
+
+    :returns: Merged catalog
+    :rtype: dict
+    """
+
+    merged = dict(base)
+
+    for k, v in catalog.items():
+        merged[k] = _merge_catalogs(merged[k], v) if isinstance(v, dict) and isinstance(merged.get(k), dict) else v
+
+    return merged
+
+
+def _locale_sizeof(_, locale) -> int:
+    """(System function) Estimates the size of the locale in the bytes (see LRUCache.sizeof)"""
+
+    return locale.size
+
+
+class Locale:
+    """Flat translations of the one language, merged with the translations of its fallback chain
+    (keys, that aren't translated to the language, have the values of the next languages in the chain)
+
+    :ivar lang: Language (Country code)
+    :type lang: str
+    :ivar chain: Languages in the order of the lookup (for example, ["ru", "uk", "en"])
+    :type chain: list[str]
+    :ivar flat: Values by the flat keys
+    :type flat: dict[str, Any]
+    :ivar invalid: Flat keys of the templates, that can't be formatted
+    :type invalid: set[str]
+    :ivar version: Version of the translator, when the locale was built
+    :type version: int
+    :ivar size: Estimated size of the values in the bytes
+    :type size: int
+    """
+
+    __slots__ = ('lang', 'chain', 'flat', 'invalid', 'version', 'size')
+
+    def __init__(self, lang: str, chain: list[str], flat: dict, invalid: set, version: int):
+        """
+        :param lang: Language (Country code)
+        :type lang: str
+        :param chain: Languages in the order of the lookup
+        :type chain: list[str]
+        :param flat: Values by the flat keys
+        :type flat: dict[str, Any]
+        :param invalid: Flat keys of the templates, that can't be formatted
+        :type invalid: set[str]
+        :param version: Version of the translator
+        :type version: int
+        """
+
+        self.lang, self.chain, self.flat, self.invalid, self.version = lang, chain, flat, invalid, version
+
+        # keys are interned and shared with the other locales, so only the values are counted
+        self.size = sys.getsizeof(flat) + sum(sys.getsizeof(v) for v in flat.values())
+
+    def get(self, key: str, default=None):
+        """Returns the value of the flat key
+
+        :param key: Flat key
+        :type key: str
+        :param default: Value, that returns if the key isn't translated
+
+        :returns: Value of the key or default
+        """
+
+        return self.flat.get(key, default)
+
+    def __repr__(self):
+        return f'Locale({self.lang!r}, chain={self.chain!r}, keys={len(self.flat)})'
+
+
+class TranslationKey:
+    """Bound accessor of the one key of the flat translations (see Translator.key()). Value and the format method
+    of the template are resolved once and again only after the translations are reloaded, so the use of the handle
+    costs one attribute comparison instead of the lookups in the nested dicts
+
+    :ivar translator: The translator
+    :type translator: Translator
+    :ivar key: Flat key (for example, "core.command.calc.output_message")
+    :type key: str
+    """
+
+    __slots__ = ('translator', 'key', '_version', '_value', '_format')
+
+    def __init__(self, translator, key: str):
+        """
+        :param translator: The translator
+        :type translator: Translator
+        :param key: Flat key
+        :type key: str
+        """
+
+        self.translator, self.key = translator, key
+        self._version = -1
+        self._value = self._format = None
+
+    def _resolve(self):
+        """(System method) Resolves the value of the key
+
+        :raises KeyError: Key isn't exists in the loaded translations
+        """
+
+        value = self.translator.flat[self.key]
+
+        # broken templates are returned as is, without the formatting
+        self._format = value.format if isinstance(value, str) and self.key not in self.translator.invalid \
+            else lambda *args, **kwargs: value
+        self._value = value
+        self._version = self.translator.version
+
+    @property
+    def value(self):
+        """Value of the key (string, list, number)"""
+
+        if self._version != self.translator.version:
+            self._resolve()
+
+        return self._value
+
+    def format(self, *args, **kwargs) -> str:
+        """Formats the template
+
+        :returns: Formatted string
+        :rtype: str
+        """
+
+        if self._version != self.translator.version:
+            self._resolve()
+
+        return self._format(*args, **kwargs)
+
+    __call__ = format
+
+    def get(self, lang: str | None = None):
+        """Returns the value of the key in the language (see Translator.locale())
+
+        :param lang: Language (Country code). None - default language of the translator
+        :type lang: str | None
+
+        :returns: Value of the key (string, list, number)
+        """
+
+        if lang is None or lang == self.translator.lang:
+            return self.value
+
+        return self.translator.locale(lang).flat[self.key]
+
+    def format_in(self, lang: str | None, *args, **kwargs) -> str:
+        """Formats the template of the language (see Translator.locale())
+
+        :param lang: Language (Country code). None - default language of the translator
+        :type lang: str | None
+
+        :returns: Formatted string
+        :rtype: str
+        """
+
+        if lang is None or lang == self.translator.lang:
+            return self.format(*args, **kwargs)
+
+        locale = self.translator.locale(lang)
+        value = locale.flat[self.key]
+
+        return value.format(*args, **kwargs) if isinstance(value, str) and self.key not in locale.invalid else value
+
+    def __str__(self):
+        return str(self.value)
+
+    def __repr__(self):
+        return f'TranslationKey({self.key!r})'
 
 
 class Translator:
-    """Translator object provides the easy methods to translate text
+    """Translator object provides the easy methods to translate text. Translations of the default language
+    are loaded at the startup, other languages (locales) are built on the first use from the compiled catalogs
+    and kept in the bounded cache. Language may be selected for the chat or for the user (see Translator.select())
 
     :ivar lang_dir: Path to the directory with the translation files
     :type lang_dir: str
-    :ivar lang: Language (Country code)
+    :ivar lang: Default language (Country code)
     :type lang: str
+    :ivar fallback: Languages, that are used for the keys, that aren't translated to the selected
+        and default languages
+    :type fallback: list[str]
     :ivar namespace: Instance of the Namespace
     :type namespace: Namespace
+    :ivar flat: Values of the loaded translations by the flat interned keys ("head.table.key")
+    :type flat: dict[str, Any]
+    :ivar invalid: Flat keys of the templates, that can't be formatted (for example, with the unclosed brace)
+    :type invalid: set[str]
+    :ivar version: Number of the loaded files. Handles of the keys are resolved again, when it's changed
+    :type version: int
+    :ivar default_locale: Locale of the default language. Shares the flat and invalid with the translator
+    :type default_locale: Locale
+    :ivar locales: Cache of the locales of the other languages
+    :type locales: LRUCache
+    :ivar chat_langs: Languages, selected for the chats
+    :type chat_langs: dict[int, str]
+    :ivar user_langs: Languages, selected for the users (have the priority over the chat languages)
+    :type user_langs: dict[int, str]
+    :ivar selections_path: Path to the JSON file with the selected languages, None - selections aren't saved
+    :type selections_path: str | None
     :ivar logger: Translator logger
     :type logger: logging.Logger
     """
 
-    def __init__(self, lang_dir: str = os.path.join('.', 'lang'), lang: str = 'en'):
+    def __init__(self, lang_dir: str = os.path.join('.', 'lang'), lang: str = 'en',
+                 fallback: list[str] | None = None, max_locales: int = 4, max_locales_bytes: int | None = None):
         """
         :param lang_dir: Path to the directory with the translation files
         :type lang_dir: str
-        :param lang: Language (Country code)
+        :param lang: Default language (Country code)
         :type lang: str
+        :param fallback: Fallback languages (Default: ["en"])
+        :type fallback: list[str] | None
+        :param max_locales: Maximum number of the cached locales of the other languages
+        :type max_locales: int
+        :param max_locales_bytes: Maximum estimated size of the cached locales, None - without limit
+        :type max_locales_bytes: int | None
         """
         self.lang_dir, self.lang = lang_dir, lang
+        self.fallback = fallback if fallback is not None else ['en']
 
         self.namespace = None
+        self.flat = {}
+        self.invalid = set()
+        self.version = 0
+
+        self.default_locale = Locale(lang, self.chain(lang), self.flat, self.invalid, 0)
+        self.locales = LRUCache(max_locales, max_locales_bytes, _locale_sizeof)
+
+        self.chat_langs = {}
+        self.user_langs = {}
+        self.selections_path = None
+
+        self._head_keys = {}
+        self._head_layers = {}
+        self._handles = {}
+
         self.logger = logging.getLogger('EasyTl : Translator')
 
+    def _catalog(self, path: str) -> dict:
+        """(System method) Returns the compiled catalog of the translations file
+
+        :param path: Path to the file
+        :type path: str
+
+        :returns: Catalog of the file
+        :rtype: dict
+        """
+
+        # compiled catalog is taken from the snapshot in the cache directory, if the file isn't changed
+        catalogs = self.namespace.get('catalogs') if self.namespace is not None else None
+        return catalogs.get(path) if catalogs is not None else compile_catalog(path)
+
     def load_file(self, path: str):
         """(System method) Loads a file to the translations dictionary
 
@@ -37,25 +323,102 @@ class Translator:
 
         self.logger.debug('Loading languages from the file by path '+path)
 
-        n = os.path.basename(path)[:-8]
-        with open(path, 'rb') as f:
-            self.namespace.translations[n] = tomlkit.load(f)
+        n, lang = os.path.basename(path)[:-5].rsplit('_', 1)
+
+        # catalogs of the languages of the chain are merged, so the keys, that aren't translated
+        # to the language, have the values of the fallback languages (as in the other locales)
+        layers = self._head_layers.setdefault(n, {})
+        layers[lang] = self._catalog(path)
+
+        chain = [layers[chain_lang] for chain_lang in reversed(self.chain(self.lang)) if chain_lang in layers]
+        catalog = chain[0] if chain else layers[lang]
+
+        for c in chain[1:]:
+            catalog = _merge_catalogs(catalog, c)
+
+        self.namespace.translations[n] = catalog
+
+        self._flatten(n, self.namespace.translations[n])
+
+    def _flatten(self, head: str, catalog: dict):
+        """(System method) Adds the values of the catalog to the flat translations and validates the templates
+
+        :param head: Head of the translations file
+        :type head: str
+        :param catalog: Catalog of the file
+        :type catalog: dict
+        """
+
+        # keys of the previous file with the same head are removed
+        for key in self._head_keys.pop(head, ()):
+            self.flat.pop(key, None)
+            self.invalid.discard(key)
+
+        values, invalid = _flatten_catalog(head, catalog, self.logger)
+
+        self.flat.update(values)
+        self.invalid |= invalid
+
+        self._head_keys[head] = list(values)
+        self.version += 1
+
+    def key(self, key: str) -> TranslationKey:
+        """Returns the bound accessor of the flat key. Get it once (for example, when the plugin is loaded)
+        and use it on every message
+
+        :param key: Flat key (for example, "core.command.calc.output_message")
+        :type key: str
+
+        :returns: Handle of the key. Value is resolved on the first use
+        :rtype: TranslationKey
+        """
+
+        if (handle := self._handles.get(key)) is None:
+            handle = self._handles[key] = TranslationKey(self, sys.intern(key))
+
+        return handle
+
+    def text(self, key: str, *args, lang: str | None = None, **kwargs) -> str:
+        """Returns the formatted value of the flat key (without the handle)
+
+        :param key: Flat key
+        :type key: str
+        :param lang: Language (Country code). None - default language
+        :type lang: str | None
+
+        :returns: Formatted string
+        :rtype: str
+        """
+
+        return self.key(key).format_in(lang, *args, **kwargs)
 
     def load_languages(self):
         """(System method) Loads the languages to the current languages dictionary"""
 
         # check for the translations dict in the namespace
-        if 'translations' not in dir(self.namespace):
+        if 'translations' not in self.namespace:
             self.namespace.instance.logger.debug('Create translations dict in the namespace')
             self.namespace.translations = {}
 
-        files = [f for f in os.listdir(self.lang_dir) if f.endswith(self.lang+'.toml')]
+        self.default_locale.chain = self.chain(self.lang)
+
+        # files of the fallback languages are loaded first, the values of the language override them
+        files = sorted(os.listdir(self.lang_dir))
+        files = [f for chain_lang in reversed(self.default_locale.chain) for f in files
+                 if f.endswith(f'_{chain_lang}.toml')]
+
+        # fingerprints of the translations are recorded to the manifest
+        manifest = self.namespace.get('manifest')
 
         for f in files:
-            self.load_file(os.path.join(self.lang_dir, f))
+            self.load_file(path := os.path.join(self.lang_dir, f))
+
+            if manifest is not None:
+                manifest.fingerprint(path)
 
     def initialize(self, head: str):
-        """Initializes the concrete translations file (loads it to the English language)
+        """Initializes the concrete translations file (loads the files of the languages of the chain,
+        if the head isn't loaded yet)
 
         :param head: Head of the translations file
         :type head: str
@@ -68,4 +431,227 @@ class Translator:
             self.namespace.instance.logger.debug('Already initialized')
             return
 
-        self.load_file(os.path.join(self.lang_dir, head+'_en.toml'))
+        paths = [path for chain_lang in reversed(self.chain(self.lang))
+                 if os.path.exists(path := os.path.join(self.lang_dir, f'{head}_{chain_lang}.toml'))]
+
+        for path in paths or [os.path.join(self.lang_dir, head+'_en.toml')]:
+            self.load_file(path)
+
+    def fingerprint(self) -> str:
+        """Returns the hash of the language and all translations files. It's changed, when any file is changed,
+        so the data, that depends on the translations (for example, aliases of the commands), can be cached
+
+        :returns: Hex digest of the hash
+        :rtype: str
+        """
+
+        h = hashlib.sha256(self.lang.encode())
+        manifest = self.namespace.get('manifest')
+
+        for f in sorted(f for f in os.listdir(self.lang_dir) if f.endswith('.toml')):
+            path = os.path.join(self.lang_dir, f)
+
+            if manifest is not None:
+                h.update(f'{f}:{manifest.sha256(path)};'.encode())
+            else:
+                st = os.stat(path)
+                h.update(f'{f}:{st.st_size}:{st.st_mtime_ns};'.encode())
+
+        return h.hexdigest()
+
+    ####
+
+    def chain(self, lang: str) -> list[str]:
+        """Returns the fallback chain of the language: the language, the default language and the fallback languages
+
+        :param lang: Language (Country code)
+        :type lang: str
+
+        :returns: Languages in the order of the lookup
+        :rtype: list[str]
+        """
+
+        return list(dict.fromkeys([lang, self.lang, *self.fallback]))
+
+    def available_languages(self) -> list[str]:
+        """Returns the languages, that have the translations files in the directory
+
+        :returns: Sorted list of the languages
+        :rtype: list[str]
+        """
+
+        return sorted({f[:-5].rsplit('_', 1)[1] for f in os.listdir(self.lang_dir)
+                       if f.endswith('.toml') and '_' in f})
+
+    def used_languages(self) -> set[str]:
+        """Returns the default, fallback and selected languages. Translations files of these languages
+        are downloaded with the plugins (see Plugin.language_links())
+
+        :returns: Set of the languages
+        :rtype: set[str]
+        """
+
+        return {self.lang, *self.fallback, *self.chat_langs.values(), *self.user_langs.values()}
+
+    def _build_locale(self, lang: str) -> Locale:
+        """(System method) Builds the locale from the catalogs of the translations files of the fallback chain
+
+        :param lang: Language (Country code)
+        :type lang: str
+
+        :returns: Built locale
+        :rtype: Locale
+        """
+
+        chain = self.chain(lang)
+        files = sorted(os.listdir(self.lang_dir))
+        flat, invalid = {}, set()
+
+        # values of the more preferred languages override the values of the next languages in the chain
+        for chain_lang in reversed(chain):
+            suffix = f'_{chain_lang}.toml'
+
+            for f in files:
+                if not f.endswith(suffix):
+                    continue
+
+                values, bad = _flatten_catalog(f[:-len(suffix)], self._catalog(os.path.join(self.lang_dir, f)),
+                                               self.logger)
+                invalid.difference_update(values)
+                invalid |= bad
+                flat.update(values)
+
+        self.logger.debug(f'Locale {lang} is built ({len(flat)} keys, chain: {", ".join(chain)})')
+
+        return Locale(lang, chain, flat, invalid, self.version)
+
+    def locale(self, lang: str | None) -> Locale:
+        """Returns the locale of the language. Locales of the other languages are built on the first use
+        and built again after the translations are reloaded
+
+        :param lang: Language (Country code). None - default language
+        :type lang: str | None
+
+        :returns: Locale of the language
+        :rtype: Locale
+        """
+
+        if lang is None or lang == self.lang:
+            return self.default_locale
+
+        locale = self.locales.get(lang)
+
+        if locale is None or locale.version != self.version:
+            locale = self._build_locale(lang)
+            self.locales.put(lang, locale)
+
+        return locale
+
+    def forget_locales(self):
+        """Removes the cached locales of the other languages (for example, when their files are changed)"""
+
+        self.locales.clear()
+
+    def set_locales_limits(self, max_locales: int, max_locales_bytes: int | None = None):
+        """Sets the limits of the cache of the locales of the other languages. Cached locales are removed
+
+        :param max_locales: Maximum number of the cached locales of the other languages
+        :type max_locales: int
+        :param max_locales_bytes: Maximum estimated size of the cached locales, None - without limit
+        :type max_locales_bytes: int | None
+        """
+
+        self.locales = LRUCache(max_locales, max_locales_bytes, _locale_sizeof)
+
+    ####
+
+    def lang_for(self, chat_id: int | None = None, user_id: int | None = None) -> str:
+        """Returns the selected language of the user or the chat, otherwise the default language
+
+        :param chat_id: Id of the chat
+        :type chat_id: int | None
+        :param user_id: Id of the user
+        :type user_id: int | None
+
+        :returns: Language (Country code)
+        :rtype: str
+        """
+
+        return self.user_langs.get(user_id) or self.chat_langs.get(chat_id) or self.lang
+
+    def lang_of(self, event) -> str:
+        """Returns the language of the event (see Translator.lang_for())
+
+        :param event: Telethon's event variable
+
+        :returns: Language (Country code)
+        :rtype: str
+        """
+
+        if not self.user_langs and not self.chat_langs:
+            return self.lang
+
+        return self.lang_for(event.chat_id, event.sender_id)
+
+    def select(self, lang: str | None, chat_id: int | None = None, user_id: int | None = None):
+        """Selects the language for the chat or the user. Selections are saved, if the selections_path is set
+
+        :param lang: Language (Country code). None - reset to the default language
+        :type lang: str | None
+        :param chat_id: Id of the chat
+        :type chat_id: int | None
+        :param user_id: Id of the user
+        :type user_id: int | None
+
+        :raises ValueError: Language hasn't the translations files
+        """
+
+        if lang is not None and lang not in self.available_languages():
+            raise ValueError(f'Language {lang} hasn\'t the translations files')
+
+        for selections, id_ in ((self.chat_langs, chat_id), (self.user_langs, user_id)):
+            if id_ is None:
+                continue
+
+            if lang is None:
+                selections.pop(id_, None)
+            else:
+                selections[id_] = lang
+
+        self.save_selections()
+
+    def load_selections(self, path: str):
+        """Loads the selected languages from the JSON file and saves the next selections to it
+
+        :param path: Path to the file
+        :type path: str
+        """
+
+        self.selections_path = path
+
+        try:
+            with open(path) as f:
+                data = json.load(f)
+
+            self.chat_langs = {int(k): v for k, v in data.get('chats', {}).items()}
+            self.user_langs = {int(k): v for k, v in data.get('users', {}).items()}
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            self.logger.warning('Can\'t load the selected languages')
+            log_exception(self.logger, e)
+
+    def save_selections(self):
+        """Writes the selected languages to the selections_path"""
+
+        if self.selections_path is None:
+            return
+
+        try:
+            with open(self.selections_path + '.tmp', 'w') as f:
+                json.dump({'chats': self.chat_langs, 'users': self.user_langs}, f, indent=2)
+
+            os.replace(self.selections_path + '.tmp', self.selections_path)
+        except Exception as e:
+            self.logger.warning('Can\'t write the selected languages')
+            log_exception(self.logger, e)
@@ -0,0 +1,245 @@
+import os
+import json
+import time
+import logging
+import requests
+from requests.adapters import HTTPAdapter
+from concurrent.futures import ThreadPoolExecutor
+from .utils import log_exception
+
+
+class UpdateResult:
+    """Result of the update check of the one plugin
+
+    :ivar plugin_name: Name of the plugin
+    :type plugin_name: str
+    :ivar url: Update link of the plugin
+    :type url: str | None
+    :ivar status: Status of the check: "disabled", "no_link", "not_modified", "unchanged", "updated",
+        "failed" (request failed or returned non 200 code) or "error" (update can't be applied)
+    :type status: str
+    :ivar http_status: Status code of the response
+    :type http_status: int | None
+    :ivar content: Content of the response, if it was received
+    :type content: bytes | None
+    :ivar etag: ETag header of the response
+    :type etag: str | None
+    :ivar last_modified: Last-Modified header of the response
+    :type last_modified: str | None
+    :ivar elapsed: Seconds, spent to the request
+    :type elapsed: float
+    :ivar error: Text of the error
+    :type error: str | None
+    """
+
+    def __init__(self, plugin_name: str, url: str | None = None, status: str = 'no_link'):
+        """
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+        :param url: Update link of the plugin
+        :type url: str | None
+        :param status: Status of the check
+        :type status: str
+        """
+
+        self.plugin_name, self.url, self.status = plugin_name, url, status
+
+        self.http_status = None
+        self.content = None
+        self.etag = None
+        self.last_modified = None
+        self.elapsed = 0.0
+        self.error = None
+
+    def report(self) -> dict:
+        """Returns the result without the content
+
+        :returns: Dict with the result
+        :rtype: dict
+        """
+
+        return {'plugin': self.plugin_name, 'status': self.status, 'http_status': self.http_status,
+                'size': len(self.content) if self.content is not None else None,
+                'elapsed': round(self.elapsed, 3), 'error': self.error}
+
+
+class PluginUpdater:
+    """Downloads the plugins updates concurrently with the pooled keep-alive HTTP session.
+    ETag and Last-Modified of the responses are stored in the "<plugin>.http" files in the cache directory
+    and sent back as If-None-Match and If-Modified-Since
+
+    :ivar cache_dir: Path to the directory with the cache
+    :type cache_dir: str
+    :ivar max_workers: Number of the requests, that are sent at the same time
+    :type max_workers: int
+    :ivar timeout: Connect and read timeouts of the requests in seconds
+    :type timeout: tuple[float, float]
+    :ivar session: HTTP session of the updater
+    :type session: requests.Session
+    :ivar logger: Logger of the updater
+    :type logger: logging.Logger
+    """
+
+    def __init__(self, cache_dir: str, max_workers: int = 8, connect_timeout: float = 5, read_timeout: float = 30,
+                 session: requests.Session | None = None):
+        """
+        :param cache_dir: Path to the directory with the cache
+        :type cache_dir: str
+        :param max_workers: Number of the requests, that are sent at the same time
+        :type max_workers: int
+        :param connect_timeout: Seconds to wait for the connection
+        :type connect_timeout: float
+        :param read_timeout: Seconds to wait for the response data
+        :type read_timeout: float
+        :param session: (Optional) HTTP session to use
+        :type session: requests.Session | None
+        """
+
+        self.cache_dir = cache_dir
+        self.max_workers = max(1, max_workers)
+        self.timeout = (connect_timeout, read_timeout)
+
+        if session is None:
+            session = requests.Session()
+
+            adapter = HTTPAdapter(pool_connections=self.max_workers, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+
+        self.session = session
+
+        self.logger = logging.getLogger('EasyTl : PluginUpdater')
+
+    def _meta_path(self, plugin_name: str) -> str:
+        """(System method) Returns the path to the file with the conditional request headers of the plugin
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+
+        :returns: Path to the file
+        :rtype: str
+        """
+
+        return os.path.join(self.cache_dir, plugin_name + '.http')
+
+    def load_meta(self, plugin_name: str, url: str) -> dict:
+        """Loads the stored ETag and Last-Modified of the plugin. They are ignored, if update link was changed
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+        :param url: Current update link of the plugin
+        :type url: str
+
+        :returns: Dict with the "etag" and "last_modified"
+        :rtype: dict
+        """
+
+        try:
+            with open(self._meta_path(plugin_name)) as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+        return meta if isinstance(meta, dict) and meta.get('url') == url else {}
+
+    def commit(self, result: UpdateResult):
+        """Stores the ETag and Last-Modified of the response. Must be called after the update is applied,
+        otherwise the next check will get the "not modified" response for the not applied update
+
+        :param result: Result of the update check
+        :type result: UpdateResult
+        """
+
+        if result.content is None or (result.etag is None and result.last_modified is None):
+            return
+
+        path = self._meta_path(result.plugin_name)
+
+        with open(path + '.tmp', 'w') as f:
+            json.dump({'url': result.url, 'etag': result.etag, 'last_modified': result.last_modified}, f)
+
+        os.replace(path + '.tmp', path)
+
+    def forget(self, plugin_name: str):
+        """Removes the stored ETag and Last-Modified, so the next request isn't conditional
+        (for example, when the local file is removed)
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+        """
+
+        try:
+            os.remove(self._meta_path(plugin_name))
+        except FileNotFoundError:
+            pass
+
+    ####
+
+    def fetch(self, plugin_name: str, url: str) -> UpdateResult:
+        """Sends the conditional request to the update link. Doesn't raise the exceptions
+
+        :param plugin_name: Name of the plugin
+        :type plugin_name: str
+        :param url: Update link of the plugin
+        :type url: str
+
+        :returns: Result with the "not_modified", "failed" or "unchanged" status and the content
+            (status is changed to the "updated" by the plugin, if the content differs)
+        :rtype: UpdateResult
+        """
+
+        result = UpdateResult(plugin_name, url, 'failed')
+        meta = self.load_meta(plugin_name, url)
+
+        headers = {}
+        if meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        started = time.perf_counter()
+
+        try:
+            r = self.session.get(url, headers=headers, timeout=self.timeout)
+            result.http_status = r.status_code
+
+            if r.status_code == 304:
+                result.status = 'not_modified'
+            elif r.status_code != 200:
+                result.error = f'HTTP {r.status_code}'
+            else:
+                result.status = 'unchanged'
+                result.content = r.content
+                result.etag = r.headers.get('ETag')
+                result.last_modified = r.headers.get('Last-Modified')
+
+        except Exception as e:
+            log_exception(self.logger, e)
+            result.error = f'{e.__class__.__name__}: {e}'
+
+        result.elapsed = time.perf_counter() - started
+        self.logger.debug(f'fetch() : {plugin_name} - {result.status} ({result.elapsed:.3f}s)')
+
+        return result
+
+    def fetch_all(self, links: dict[str, str]) -> dict[str, UpdateResult]:
+        """Sends the requests to the update links concurrently
+
+        :param links: Dict with the update links by the plugin names
+        :type links: dict[str, str]
+
+        :returns: Dict with the results by the plugin names
+        :rtype: dict[str, UpdateResult]
+        """
+
+        if not links:
+            return {}
+
+        with ThreadPoolExecutor(min(self.max_workers, len(links)), thread_name_prefix='EasyTl-updater') as pool:
+            futures = {n: pool.submit(self.fetch, n, url) for n, url in links.items()}
+
+        return {n: f.result() for n, f in futures.items()}
+
+    def close(self):
+        """Closes the HTTP session"""
+        self.session.close()
@@ -1,12 +1,12 @@
 import logging
-import tomlkit
 import traceback
-import pkg_resources
-import time
-import os
-import sys
-import subprocess
 from enum import Enum
+from collections import OrderedDict
+
+try:
+    from tomllib import loads as toml_loads  # python 3.11+
+except ImportError:
+    from tomlkit import loads as toml_loads
 
 PLUGIN_INFO_PREFIX = '# '
 utils_logger = logging.getLogger('EasyTl : Utils')
@@ -147,52 +147,185 @@ def check_version_compatibility(
 ####
 
 
-def parse_plugin_information(file_lines: list[str]) -> (bool, dict):
-    """Parses the information about the plugin in TOML format
+def parse_plugin_information(file_lines) -> (bool, dict):
+    """Parses the information about the plugin in TOML format. Lines after the "end info" line are not read
 
-    :param file_lines: List with the file lines separated by newline
-    :type file_lines: list[str]
+    :param file_lines: Iterable with the file lines (list or opened file)
+    :type file_lines: Iterable[str]
 
     :return: True or False as first value - it detects if plugin has info lines v2 format. (will be deleted in 1.5+)
              Second value - TOML dict with the information about the plugin
     :rtype: (bool, dict)
     """
 
-    utils_logger.debug('parse_plugin_information() : '
-                       'Start parsing the info lines')
-
     v2_format = False
-
-    begin = False
-    toml_lines = ""
+    toml_lines = []
 
     for line in file_lines:
         if line.startswith(PLUGIN_INFO_PREFIX + 'begin info'):
             v2_format = True
-            begin = True
-
-            utils_logger.debug('parse_plugin_information() : '
-                               'Found a begin of info line')
 
         elif line.startswith(PLUGIN_INFO_PREFIX + 'end info'):
-            begin = False
+            break
 
-            utils_logger.debug('parse_plugin_information() : '
-                               'Found the end of info line')
-        else:
-            if begin:
-                utils_logger.debug('parse_plugin_information() : '
-                                   'Add TOML line : ' + (toml_line := line.removeprefix(PLUGIN_INFO_PREFIX + ' ')))
-                toml_lines += toml_line + '\n'
+        elif v2_format:
+            toml_lines.append(line.rstrip('\r\n').removeprefix(PLUGIN_INFO_PREFIX + ' '))
+
+    utils_logger.debug('parse_plugin_information() : Plugin is v2_format? : %s, %s TOML lines',
+                       'yes' if v2_format else 'no', len(toml_lines))
+
+    return v2_format, toml_loads('\n'.join(toml_lines))
 
-    utils_logger.debug('parse_plugin_information() : '
-                       'Plugin is v2_format? : ' + 'yes' if v2_format else 'no')
 
-    for line in toml_lines.split('\n'):
-        utils_logger.debug('parse_plugin_information() : '
-                           'TOML LINES : ' + line)
+def read_plugin_information(path: str) -> (bool, dict):
+    """Reads the information about the plugin from the file. Stops reading at the "end info" line
 
-    return v2_format, tomlkit.loads(toml_lines)
+    :param path: Path to the plugin file
+    :type path: str
+
+    :return: Same as parse_plugin_information()
+    :rtype: (bool, dict)
+    """
+
+    with open(path, encoding='utf-8') as f:
+        return parse_plugin_information(f)
+
+
+####
+
+
+class LRUCache:
+    """Bounded dict, that evicts the least recently used values
+
+    :ivar maxsize: Maximum number of the values in the cache
+    :type maxsize: int
+    :ivar maxbytes: Maximum size of the values in the bytes (requires "sizeof"), None - without limit
+    :type maxbytes: int | None
+    :ivar sizeof: Function, that estimates the size of the (key, value) in the bytes
+    :type sizeof: ((Any, Any) -> int) | None
+    :ivar bytes: Estimated size of the values in the cache
+    :type bytes: int
+    :ivar hits: Number of the found values
+    :type hits: int
+    :ivar misses: Number of the not found values
+    :type misses: int
+    :ivar evictions: Number of the evicted values
+    :type evictions: int
+    """
+
+    def __init__(self, maxsize: int = 1000, maxbytes: int | None = None, sizeof=None):
+        """
+        :param maxsize: Maximum number of the values in the cache
+        :type maxsize: int
+        :param maxbytes: Maximum size of the values in the bytes (requires "sizeof"), None - without limit
+        :type maxbytes: int | None
+        :param sizeof: Function, that estimates the size of the (key, value) in the bytes
+        :type sizeof: ((Any, Any) -> int) | None
+        """
+
+        self.maxsize, self.maxbytes, self.sizeof = maxsize, maxbytes, sizeof
+        self.bytes = 0
+        self.hits = self.misses = self.evictions = 0
+
+        self._data = OrderedDict()
+        self._sizes = {}
+
+    def __contains__(self, key) -> bool:
+        return key in self._data
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def keys(self) -> list:
+        """Returns the keys of the cache from the least recently used ones
+
+        :returns: List with the keys
+        :rtype: list
+        """
+
+        return list(self._data)
+
+    def get(self, key, default=None):
+        """Gets the value and marks it as recently used
+
+        :param key: Key of the value
+        :param default: Value, that returns if key isn't in the cache
+
+        :returns: Cached value or default
+        """
+
+        try:
+            self._data.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return default
+
+        self.hits += 1
+        return self._data[key]
+
+    def put(self, key, value):
+        """Puts the value to the cache. Evicts the least recently used values, if cache is full.
+        Values, that are bigger than the maxbytes, aren't cached (the old value of the key is evicted)
+
+        :param key: Key of the value
+        :param value: The value
+        """
+
+        if self.sizeof is not None:
+            size = self.sizeof(key, value)
+
+            if self.maxbytes is not None and size > self.maxbytes:
+                # the old value must not be returned instead of the new one
+                if key in self._data:
+                    del self._data[key]
+                    self.bytes -= self._sizes.pop(key, 0)
+                    self.evictions += 1
+                return
+
+            self.bytes += size - self._sizes.get(key, 0)
+            self._sizes[key] = size
+
+        self._data[key] = value
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize or (self.maxbytes is not None and self.bytes > self.maxbytes):
+            old_key, _ = self._data.popitem(last=False)
+            self.bytes -= self._sizes.pop(old_key, 0)
+            self.evictions += 1
+
+    def discard(self, key) -> bool:
+        """Removes the value from the cache (for example, the value is changed outside the cache)
+
+        :param key: Key of the value
+
+        :returns: True, if the value was in the cache
+        :rtype: bool
+        """
+
+        if key not in self._data:
+            return False
+
+        del self._data[key]
+        self.bytes -= self._sizes.pop(key, 0)
+
+        return True
+
+    def clear(self):
+        """Clears the cache"""
+
+        self._data.clear()
+        self._sizes.clear()
+        self.bytes = 0
+
+    def stats(self) -> dict[str, int]:
+        """Returns the statistics of the cache
+
+        :returns: Dict with the size, bytes, hits, misses and evictions
+        :rtype: dict[str, int]
+        """
+
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'bytes': self.bytes, 'maxbytes': self.maxbytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
 
 
 ####
@@ -222,37 +355,24 @@ def log_exception(logger: logging.Logger, e: Exception):
 
 
 def install_requirements(requirements: list[str | list[str, str]], pip_logs_dir: str):
-    requirements_names = []
-    requirements_dict = dict()
-
-    # check for the new "install_requirement" feature
-    for value in requirements:
-        if isinstance(value, list):
-            requirements_names.append(value[0].lower())
-            requirements_dict[value[0]] = value[1]
-            continue
-        requirements_names.append(value_low := value.lower())
-        requirements_dict[value_low] = value
+    """Installs the missing requirements of the one plugin. At the startup, requirements of all the plugins
+    are installed at once by the requirements.RequirementsResolver
 
-    utils_logger.debug('check_requirements() : Requirements are found. Checking it')
-    utils_logger.debug('check_requirements() : Getting list of the installed packages')
+    :param requirements: List with the names of the distributions or [name, pip argument] lists
+    :type requirements: list[str | list[str, str]]
+    :param pip_logs_dir: Path to the directory with the pip logs
+    :type pip_logs_dir: str
 
-    # define missing packages
-    plugin_requirements = set(requirements_names)
-    installed = {pkg.key for pkg in pkg_resources.working_set}
-    missing = plugin_requirements - installed
+    :raises subprocess.CalledProcessError: pip returned non 0 code
+    """
 
-    if missing:
-        utils_logger.debug('check_requirements() : Installing missing packages: ' + ', '.join(missing))
+    from .requirements import parse_requirements, installed_distributions, pip_install
 
-        l_f = open(os.path.join(pip_logs_dir,
-                                f'pip-{time.strftime("%Y-%m-%d_%H-%M", time.localtime())}-log.txt'),
-                   'w')
+    specs = parse_requirements(requirements)
 
-        # run PIP to install the package
-        subprocess.check_call(
-            [sys.executable, '-m', 'pip', 'install', ] + [cmd for n, cmd in requirements_dict.items() if n in missing],
-            stdout=l_f
-        )
+    utils_logger.debug('install_requirements() : Requirements are found. Checking it')
 
-        l_f.close()
+    # define missing packages
+    if missing := sorted(set(specs) - installed_distributions()):
+        utils_logger.debug('install_requirements() : Installing missing packages: ' + ', '.join(missing))
+        pip_install([specs[n] for n in missing], pip_logs_dir)
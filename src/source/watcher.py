@@ -0,0 +1,243 @@
+import os
+import sys
+import struct
+import asyncio
+import logging
+import ctypes
+import ctypes.util
+from .utils import log_exception
+
+# inotify(7) events: file is written and closed, moved to/from the directory, created or deleted
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+
+INOTIFY_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+INOTIFY_EVENT = struct.Struct('iIII')
+
+
+class FileWatcher:
+    """Watches the directories for the changed files and calls the callback with the changed paths.
+    Uses the inotify on Linux, otherwise (or if the inotify isn't available) polls the size and mtime of the files.
+    Changes are collected for the debounce time, so the file, that is saved by parts, is reported once
+
+    :ivar paths: Paths to the watched directories (not recursive)
+    :type paths: list[str]
+    :ivar callback: Function, that is called with the sorted list of the changed paths
+    :type callback: (list[str]) -> None
+    :ivar suffixes: Only files with these suffixes are watched
+    :type suffixes: tuple[str, ...]
+    :ivar interval: Seconds between the polls (polling mode)
+    :type interval: float
+    :ivar debounce: Seconds to collect the changes before the callback
+    :type debounce: float
+    :ivar use_inotify: Try to use the inotify
+    :type use_inotify: bool
+    :ivar mode: "inotify" or "polling", None if the watcher isn't started
+    :type mode: str | None
+    :ivar logger: Logger of the watcher
+    :type logger: logging.Logger
+    """
+
+    def __init__(self, paths: list[str], callback, suffixes: tuple[str, ...] = ('.py', '.toml'),
+                 interval: float = 1.0, debounce: float = 0.5, use_inotify: bool = True):
+        """
+        :param paths: Paths to the watched directories
+        :type paths: list[str]
+        :param callback: Function, that is called with the sorted list of the changed paths
+        :type callback: (list[str]) -> None
+        :param suffixes: Only files with these suffixes are watched
+        :type suffixes: tuple[str, ...]
+        :param interval: Seconds between the polls (polling mode)
+        :type interval: float
+        :param debounce: Seconds to collect the changes before the callback
+        :type debounce: float
+        :param use_inotify: Try to use the inotify
+        :type use_inotify: bool
+        """
+
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.callback = callback
+        self.suffixes = suffixes
+        self.interval = interval
+        self.debounce = debounce
+        self.use_inotify = use_inotify
+        self.mode = None
+
+        self._pending = set()
+        self._flush_handle = None
+        self._fd = None
+        self._wds = {}
+        self._stopped = None
+
+        self.logger = logging.getLogger('EasyTl : FileWatcher')
+
+    def _watched(self, path: str) -> bool:
+        """(System method) Checks if the file must be reported
+
+        :param path: Path to the file
+        :type path: str
+
+        :returns: True, if the file has the watched suffix
+        :rtype: bool
+        """
+
+        return path.endswith(self.suffixes)
+
+    def _changed(self, path: str):
+        """(System method) Adds the changed file and schedules the callback after the debounce time
+
+        :param path: Path to the file
+        :type path: str
+        """
+
+        if not self._watched(path):
+            return
+
+        self._pending.add(path)
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+        self._flush_handle = asyncio.get_running_loop().call_later(self.debounce, self._flush)
+
+    def _flush(self):
+        """(System method) Calls the callback with the collected changes"""
+
+        self._flush_handle = None
+        changed, self._pending = sorted(self._pending), set()
+
+        self.logger.debug('Changed files: ' + ', '.join(changed))
+
+        try:
+            self.callback(changed)
+        except Exception as e:
+            log_exception(self.logger, e)
+
+    ####
+
+    def _open_inotify(self) -> bool:
+        """(System method) Creates the inotify instance and watches the directories
+
+        :returns: False, if the inotify isn't available
+        :rtype: bool
+        """
+
+        if not self.use_inotify or not sys.platform.startswith('linux'):
+            return False
+
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+
+            if (fd := libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)) < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_init1() failed')
+
+            for p in self.paths:
+                if (wd := libc.inotify_add_watch(fd, os.fsencode(p), INOTIFY_MASK)) < 0:
+                    os.close(fd)
+                    raise OSError(ctypes.get_errno(), f'inotify_add_watch() failed for {p}')
+                self._wds[wd] = p
+
+        except (OSError, AttributeError) as e:
+            self.logger.debug('inotify isn\'t available, polling is used')
+            log_exception(self.logger, e)
+
+            self._wds = {}
+            return False
+
+        self._fd = fd
+        return True
+
+    def _read_events(self):
+        """(System method) Reads the inotify events"""
+
+        try:
+            data = os.read(self._fd, 65536)
+        except BlockingIOError:
+            return
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, cookie, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if name and wd in self._wds:
+                self._changed(os.path.join(self._wds[wd], os.fsdecode(name)))
+
+    def _snapshot(self) -> dict[str, tuple[int, int]]:
+        """(System method) Returns the size and mtime of the watched files
+
+        :returns: Dict with the (size, mtime_ns) by the paths
+        :rtype: dict[str, tuple[int, int]]
+        """
+
+        snapshot = {}
+
+        for p in self.paths:
+            try:
+                with os.scandir(p) as it:
+                    for entry in it:
+                        if self._watched(entry.name) and entry.is_file():
+                            st = entry.stat()
+                            snapshot[entry.path] = (st.st_size, st.st_mtime_ns)
+            except FileNotFoundError:
+                pass
+
+        return snapshot
+
+    async def _poll(self):
+        """(System method) Polls the files until the watcher is stopped"""
+
+        previous = self._snapshot()
+
+        while not self._stopped.is_set():
+            try:
+                await asyncio.wait_for(self._stopped.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+            current = self._snapshot()
+
+            for path in previous.keys() | current.keys():
+                if previous.get(path) != current.get(path):
+                    self._changed(path)
+
+            previous = current
+
+    ####
+
+    async def run(self):
+        """Watches the directories until the stop() is called"""
+
+        self._stopped = asyncio.Event()
+
+        if self._open_inotify():
+            self.mode = 'inotify'
+            loop = asyncio.get_running_loop()
+            loop.add_reader(self._fd, self._read_events)
+
+            try:
+                self.logger.info('Watching for the changes (inotify): ' + ', '.join(self.paths))
+                await self._stopped.wait()
+            finally:
+                loop.remove_reader(self._fd)
+                os.close(self._fd)
+                self._fd = None
+        else:
+            self.mode = 'polling'
+            self.logger.info(f'Watching for the changes (polling every {self.interval}s): ' + ', '.join(self.paths))
+            await self._poll()
+
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+    def stop(self):
+        """Stops the watcher"""
+
+        if self._stopped is not None:
+            self._stopped.set()
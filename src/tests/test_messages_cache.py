@@ -0,0 +1,53 @@
+import types
+import asyncio
+import pytest
+from source.utils import LRUCache
+
+core = pytest.importorskip('source.core')
+
+
+class FakeClient:
+    """Client, that counts the requests of the messages"""
+
+    def __init__(self):
+        self.requests = 0
+
+    async def get_messages(self, chat_id, ids):
+        self.requests += 1
+        return types.SimpleNamespace(id=ids, text='from telegram')
+
+
+def make_instance():
+    instance = core.Instance.__new__(core.Instance)
+    instance.messages_cache = LRUCache(10)
+    instance.client = FakeClient()
+    instance.logger = core.logging.getLogger('EasyTl : Tests')
+    return instance
+
+
+def message_event(chat_id: int, message_id: int, text: str):
+    return types.SimpleNamespace(chat_id=chat_id, message=types.SimpleNamespace(id=message_id, text=text))
+
+
+def test_edited_message_replaces_cached():
+    instance = make_instance()
+
+    asyncio.run(instance.cache_handler(message_event(1, 10, 'old')))
+    asyncio.run(instance.cache_handler(message_event(1, 10, 'new')))
+
+    assert asyncio.run(instance.get_message(1, 10)).text == 'new'
+    assert instance.client.requests == 0
+
+
+@pytest.mark.parametrize('chat_id', [1, None])
+def test_deleted_message_is_evicted(chat_id):
+    instance = make_instance()
+
+    asyncio.run(instance.cache_handler(message_event(1, 10, 'deleted')))
+    asyncio.run(instance.cache_handler(message_event(1, 11, 'kept')))
+    asyncio.run(instance.cache_delete_handler(types.SimpleNamespace(chat_id=chat_id, deleted_ids=[10])))
+
+    assert (1, 10) not in instance.messages_cache
+    assert asyncio.run(instance.get_message(1, 11)).text == 'kept'
+    assert asyncio.run(instance.get_message(1, 10)).text == 'from telegram'
+    assert instance.client.requests == 1
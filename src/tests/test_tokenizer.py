@@ -0,0 +1,44 @@
+import types
+import pytest
+from hypothesis import given, settings, strategies as st
+from source.argumentparser import ArgumentParser, tokenize_scanner
+
+# quotes, escaping, spaces and the "\00" sentinel are mixed with the arbitrary unicode,
+# so the special characters are met often enough
+special_text = st.text(st.one_of(st.sampled_from(['"', "'", '\\', ' ', '\00', 'n', 't', 'a']), st.characters()))
+
+
+def parse_legacy(string: str, enable_escaping: bool) -> list[str]:
+    """Parses the string by the character loop without the ArgumentParser instance"""
+
+    return ArgumentParser.parse_string_legacy(types.SimpleNamespace(enable_escaping=enable_escaping), string)
+
+
+@pytest.mark.parametrize('enable_escaping', [False, True])
+@settings(max_examples=5000, deadline=None)
+@given(string=special_text)
+def test_scanner_equals_legacy(enable_escaping: bool, string: str):
+    assert tokenize_scanner(string, enable_escaping) == parse_legacy(string, enable_escaping)
+
+
+@pytest.mark.parametrize('enable_escaping', [False, True])
+@settings(max_examples=5000, deadline=None)
+@given(args=st.lists(special_text, max_size=8))
+def test_scanner_equals_legacy_command(enable_escaping: bool, args: list[str]):
+    # the parser joins the arguments and adds the sentinel (see ArgumentParser.parse())
+    string = ' '.join(args) + '\00'
+
+    assert tokenize_scanner(string, enable_escaping) == parse_legacy(string, enable_escaping)
+
+
+@pytest.mark.parametrize('string, enable_escaping, expected', [
+    ('one two\00', False, ['one', 'two']),
+    ('"one two" three\00', False, ['one two', 'three']),
+    ("'say \"hi\"' x\00", False, ['say "hi"', 'x']),
+    ('a  b\00', False, ['a', '', 'b']),
+    ('a\\ b\00', False, ['a', 'b']),
+    ('a\\"b c\00', True, ['a"b', 'c']),
+    ('a\\nb\00', True, ['a\\nb']),
+])
+def test_scanner_examples(string: str, enable_escaping: bool, expected: list[str]):
+    assert tokenize_scanner(string, enable_escaping) == parse_legacy(string, enable_escaping) == expected
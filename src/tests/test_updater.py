@@ -0,0 +1,154 @@
+import time
+import socket
+import threading
+import email.utils
+import pytest
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from source.updater import PluginUpdater
+
+LAST_MODIFIED = email.utils.formatdate(0, usegmt=True)
+
+# served files: path -> (content, ETag header, Last-Modified header)
+FILES = {
+    '/etag.plugin.py': (b'# plugin with the etag\n', '"v1"', None),
+    '/modified.plugin.py': (b'# plugin with the last modified\n', None, LAST_MODIFIED),
+}
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves the FILES with the conditional requests and the slow files for the concurrency checks"""
+
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_GET(self):
+        if self.path.startswith('/slow/'):
+            with Handler.lock:
+                Handler.active += 1
+                Handler.max_active = max(Handler.max_active, Handler.active)
+
+            time.sleep(0.2)
+
+            with Handler.lock:
+                Handler.active -= 1
+
+            return self.reply(200, b'# slow plugin\n')
+
+        if (path := self.path.partition('?')[0]) not in FILES:
+            return self.reply(404, b'')
+
+        content, etag, last_modified = FILES[path]
+
+        if (etag is not None and self.headers.get('If-None-Match') == etag) \
+                or (last_modified is not None and self.headers.get('If-Modified-Since') == last_modified):
+            return self.reply(304, b'')
+
+        headers = {}
+        if etag is not None:
+            headers['ETag'] = etag
+        if last_modified is not None:
+            headers['Last-Modified'] = last_modified
+
+        self.reply(200, content, headers)
+
+    def reply(self, code: int, content: bytes, headers: dict | None = None):
+        self.send_response(code)
+
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+
+        if code != 304:
+            self.wfile.write(content)
+
+    def log_message(self, *_):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+
+    yield f'http://127.0.0.1:{httpd.server_address[1]}'
+
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def updater(tmp_path):
+    updater = PluginUpdater(str(tmp_path), max_workers=4, connect_timeout=0.5, read_timeout=5)
+    yield updater
+    updater.close()
+
+
+@pytest.mark.parametrize('path', ['/etag.plugin.py', '/modified.plugin.py'])
+def test_conditional_request(server, updater, path):
+    result = updater.fetch('plugin', server + path)
+
+    assert (result.status, result.http_status, result.content) == ('unchanged', 200, FILES[path][0])
+
+    # the stored headers are sent only after the update is applied
+    assert updater.fetch('plugin', server + path).status == 'unchanged'
+
+    updater.commit(result)
+    result = updater.fetch('plugin', server + path)
+
+    assert (result.status, result.http_status, result.content) == ('not_modified', 304, None)
+
+    # headers of the other link aren't sent
+    assert updater.fetch('plugin', server + path + '?moved').status == 'unchanged'
+
+    updater.forget('plugin')
+    assert updater.fetch('plugin', server + path).status == 'unchanged'
+
+
+def test_http_error_is_failed(server, updater):
+    result = updater.fetch('plugin', server + '/missing.plugin.py')
+
+    assert (result.status, result.http_status, result.error) == ('failed', 404, 'HTTP 404')
+
+
+def test_connect_timeout_is_failed(updater):
+    # the listening socket, that never accepts: new connections hang, when its backlog is full
+    listener = socket.socket()
+    listener.bind(('127.0.0.1', 0))
+    listener.listen(0)
+    port = listener.getsockname()[1]
+
+    backlog = []
+    for _ in range(3):
+        s = socket.socket()
+        s.setblocking(False)
+        s.connect_ex(('127.0.0.1', port))
+        backlog.append(s)
+
+    try:
+        result = updater.fetch('plugin', f'http://127.0.0.1:{port}/plugin.py')
+    finally:
+        for s in backlog + [listener]:
+            s.close()
+
+    assert result.status == 'failed'
+    assert result.error.startswith('ConnectTimeout')
+    assert result.elapsed < 5
+
+
+def test_fetch_all_concurrency(server, updater):
+    Handler.max_active = 0
+    links = {f'plugin{i}': f'{server}/slow/{i}' for i in range(8)}
+
+    started = time.perf_counter()
+    results = updater.fetch_all(links)
+    elapsed = time.perf_counter() - started
+
+    assert list(results) == list(links)
+    assert all(r.status == 'unchanged' for r in results.values())
+
+    # 8 requests by 0.2 seconds in 4 workers
+    assert Handler.max_active == updater.max_workers
+    assert elapsed < 8 * 0.2